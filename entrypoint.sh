@@ -2,6 +2,7 @@
 
 python manage.py makemigrations --no-input
 python manage.py migrate --no-input
+python manage.py sales_rollups --only-outdated
 python manage.py collectstatic --no-input
 
 gunicorn root.wsgi:application --bind 0.0.0.0:8000
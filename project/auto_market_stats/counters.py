@@ -0,0 +1,60 @@
+"""This module contains persistent per profile and car park counters of sold cars, which are
+updated with daily sales deltas, and the most sold cars lookups over them"""
+
+from django.db.models import F, OuterRef, Subquery
+
+from .models import (BaseSoldCarCounterModel, DealerSoldCarCounterModel,
+                     SellerSoldCarCounterModel)
+
+SOLD_CARS_COUNTER_MODELS: dict[str, type[BaseSoldCarCounterModel]] = {
+    'dealer': DealerSoldCarCounterModel,
+    'seller': SellerSoldCarCounterModel
+}
+
+
+def sold_cars_counters_updater(filter_param: str,
+                               sold_cars_deltas: dict[tuple[int, int], int],
+                               recounted_profile_ids: list[int]):
+    """Takes profile field name, map of (profile id, car park id) pairs to number of cars
+    sold since the last update and ids of profiles, whose counters are recounted from their
+    whole history, and adds sold cars to counters, missing counters are created"""
+    counter_model = SOLD_CARS_COUNTER_MODELS[filter_param]
+    if recounted_profile_ids:
+        counter_model.objects.filter(**{f'{filter_param}__in': recounted_profile_ids}).delete()
+    if not sold_cars_deltas:
+        return
+    counter_model.objects.\
+        bulk_create([counter_model(**{f'{filter_param}_id': profile_id}, car_park_id=park_id)
+                     for profile_id, park_id in sold_cars_deltas], ignore_conflicts=True)
+    counters = counter_model.objects.select_for_update().\
+        filter(**{f'{filter_param}__in': {key[0] for key in sold_cars_deltas}},
+               car_park__in={key[1] for key in sold_cars_deltas}).order_by('pk')
+    updated_counters = []
+    for counter in counters:
+        sold_quantity = sold_cars_deltas.get((getattr(counter, f'{filter_param}_id'),
+                                              counter.car_park_id))
+        if sold_quantity:
+            counter.sold_quantity = int(counter.sold_quantity) + sold_quantity
+            updated_counters.append(counter)
+    counter_model.objects.bulk_update(updated_counters, ['sold_quantity'])
+
+
+def most_sold_cars_finder(filter_param: str, profile_ids: list[int]) -> dict[int, int | None]:
+    """Takes profile field name and ids of profiles and returns map of profile ids to market
+    available car ids of their most sold cars, read from top counter of each profile"""
+    counter_model = SOLD_CARS_COUNTER_MODELS[filter_param]
+    profile_model = counter_model._meta.get_field(filter_param).related_model
+    top_counters = counter_model.objects.filter(**{filter_param: OuterRef('pk')}).\
+        order_by('-sold_quantity', 'car_park')
+    return dict(profile_model.objects.filter(pk__in=profile_ids).
+                annotate(most_sold_car=Subquery(top_counters.values('car_park__car_model')[:1])).
+                values_list('pk', 'most_sold_car'))
+
+
+def best_sellers_getter(filter_param: str, profile_id: int, limit: int) -> list[dict]:
+    """Takes profile field name, profile id and number of best sellers and returns list of
+    profile car parks with the biggest numbers of sold cars, from the best seller"""
+    counter_model = SOLD_CARS_COUNTER_MODELS[filter_param]
+    return list(counter_model.objects.filter(**{filter_param: profile_id}).
+                order_by('-sold_quantity', 'car_park').
+                values('car_park', 'sold_quantity', car_model=F('car_park__car_model'))[:limit])
@@ -45,3 +45,32 @@ class OverallDealerStatisticsModel(BaseOverallSalesStatisticsModel,
 
 class OverallBuyerStatisticsModel(BaseOverallPurchaseStatisticsModel):
     buyer: OneToOneField = OneToOneField('user.CarBuyerModel', on_delete=models.CASCADE)
+
+
+class BaseSoldCarCounterModel(models.Model):
+    sold_quantity: IntegerField = IntegerField(default=0)
+
+    class Meta:
+        abstract = True
+
+
+class DealerSoldCarCounterModel(BaseSoldCarCounterModel):
+    dealer: ForeignKey = ForeignKey('user.AutoDealerModel', on_delete=models.CASCADE)
+    car_park: ForeignKey = ForeignKey('car_park.DealerCarParkModel', on_delete=models.CASCADE)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['dealer', 'car_park'],
+                                               name='dealer_sold_car_counter_key')]
+        indexes = [models.Index(fields=['dealer', '-sold_quantity'],
+                                name='dealer_sold_car_top_idx')]
+
+
+class SellerSoldCarCounterModel(BaseSoldCarCounterModel):
+    seller: ForeignKey = ForeignKey('user.AutoSellerModel', on_delete=models.CASCADE)
+    car_park: ForeignKey = ForeignKey('car_park.SellerCarParkModel', on_delete=models.CASCADE)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['seller', 'car_park'],
+                                               name='seller_sold_car_counter_key')]
+        indexes = [models.Index(fields=['seller', '-sold_quantity'],
+                                name='seller_sold_car_top_idx')]
@@ -1,9 +1,11 @@
 # pylint: skip-file
 
-from rest_framework.serializers import ModelSerializer
+from rest_framework.serializers import (ChoiceField, DateField, IntegerField,
+                                        ModelSerializer, Serializer, ValidationError)
 
 from .models import (OverallBuyerStatisticsModel, OverallDealerStatisticsModel,
                      OverallSellerStatisticsModel)
+from .series import SERIES_BUCKETS
 
 
 class OverallDealerStatisticsSerializer(ModelSerializer):
@@ -25,3 +27,19 @@ class OverallSellerStatisticsSerializer(ModelSerializer):
         model = OverallSellerStatisticsModel
         fields = ["sold_cars_number", "total_revenue", "avg_sold_car_price",
                   "uniq_buyers_number", "most_sold_car"]
+
+
+class SalesSeriesParamsSerializer(Serializer):
+    bucket = ChoiceField(choices=list(SERIES_BUCKETS), default='day')
+    date_from = DateField(required=False)
+    date_to = DateField(required=False)
+
+    def validate(self, attrs):
+        if attrs.get('date_from') and attrs.get('date_to') and \
+                attrs['date_from'] > attrs['date_to']:
+            raise ValidationError('date_from should not be later than date_to')
+        return attrs
+
+
+class BestSellersParamsSerializer(Serializer):
+    limit = IntegerField(min_value=1, max_value=100, default=10)
@@ -0,0 +1,56 @@
+"""This module contains calculation of time bucketed (daily, weekly or monthly) sales series
+of profiles from daily sales rollups, cached per profile, bucket and dates range"""
+
+import datetime
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Sum
+from django.db.models.functions import TruncDay, TruncMonth, TruncWeek
+from sales_history.rollups import RollupSpec, profile_rollups_version_key_creator
+
+SERIES_BUCKETS = {'day': TruncDay, 'week': TruncWeek, 'month': TruncMonth}
+
+
+def sales_series_calculator(spec: RollupSpec,
+                            profile_id: int,
+                            bucket: str,
+                            date_from: datetime.date | None = None,
+                            date_to: datetime.date | None = None) -> list[dict]:
+    """Takes rollup description, profile id, bucket name and optional dates range and
+    returns list of buckets (from earliest) with number of cars, sum of deals and average
+    car price of profile deals, calculated with one grouped query over profile rollups"""
+    rollups = spec.rollup_model.objects.filter(**{spec.rollup_profile_field: profile_id})
+    if date_from:
+        rollups = rollups.filter(date__gte=date_from)
+    if date_to:
+        rollups = rollups.filter(date__lte=date_to)
+    buckets = rollups.annotate(period=SERIES_BUCKETS[bucket]('date')).\
+        values('period').\
+        annotate(cars_number=Sum('cars_quantity'), deals_sum=Sum('deal_sum')).\
+        order_by('period')
+    return [{'period': bucket_totals['period'],
+             'cars_number': bucket_totals['cars_number'],
+             'deals_sum': Decimal(bucket_totals['deals_sum']).quantize(Decimal('0.01')),
+             'avg_car_price': (Decimal(bucket_totals['deals_sum']) /
+                               bucket_totals['cars_number']).quantize(Decimal('0.01'))
+             if bucket_totals['cars_number'] else Decimal('0.00')}
+            for bucket_totals in buckets]
+
+
+def sales_series_getter(spec: RollupSpec,
+                        profile_id: int,
+                        bucket: str,
+                        date_from: datetime.date | None = None,
+                        date_to: datetime.date | None = None) -> list[dict]:
+    """Returns cached sales series of profile, if its rollups were not changed since
+    the series calculation, otherwise calculates and caches new one"""
+    version = cache.get(profile_rollups_version_key_creator(spec.rollup_model, profile_id))
+    key = f'sales_series:{spec.rollup_model._meta.label_lower}:{profile_id}:{version}:' \
+          f'{bucket}:{date_from}:{date_to}'
+    series = cache.get(key)
+    if series is None:
+        series = sales_series_calculator(spec, profile_id, bucket, date_from, date_to)
+        cache.set(key, series, settings.SALES_SERIES_CACHE_TIMEOUT)
+    return series
@@ -6,239 +6,266 @@ import datetime
 from decimal import Decimal
 from typing import Type
 
-from car_market.models import MarketAvailableCarModel
-from car_park.models import DealerCarParkModel, SellerCarParkModel
 from celery import shared_task
-from django.db.models import QuerySet, Sum
+from django.db import transaction
+from django.db.models import Count, Sum
 from sales_history.models import (BaseSalesHistoryModel, CarBuyerHistoryModel,
                                   DealerSalesHistoryModel,
                                   SellerSalesHistoryModel)
+from sales_history.rollups import rollup_spec_getter
 from user.models import (AutoDealerModel, AutoSellerModel,
                          BuyerFromDealerPurchaseNumber, CarBuyerModel,
                          DealerFromSellerPurchaseNumber)
 
-from .models import (OverallBuyerStatisticsModel, OverallDealerStatisticsModel,
-                     OverallSellerStatisticsModel)
-
-
-def history_records_statistics_calculator(history_records:
-                                          QuerySet[BaseSalesHistoryModel]) \
-        -> dict[str, int | Decimal]:
-    """Calculates number of sold cars and revenue from given history records,
-    returns dictionary with calculated data"""
-    values_dict = history_records.aggregate(sold_cars_number=Sum('sold_cars_quantity'),
-                                            revenue=Sum('deal_sum'))
-    return values_dict
-
-
-def additional_history_stats_calculator(history_records:
-                                        QuerySet[BaseSalesHistoryModel |
-                                                 CarBuyerHistoryModel],
-                                        user_type: str) -> dict[str, int | Decimal]:
-    """Calculates number of bought cars and expenses from given history records,
-    returns dictionary with calculated data"""
-    if user_type == "buyer":
-        values_dict = history_records.aggregate(bought_cars_number=Sum('bought_quantity'),
-                                                expenses=Sum('deal_sum'))
-    else:
-        values_dict = history_records.aggregate(bought_cars_number=Sum('sold_cars_quantity'),
-                                                expenses=Sum('deal_sum'))
-    return values_dict
-
-
-def most_sold_cars_finder(filter_param: str,
-                          user_profile: AutoSellerModel | AutoDealerModel,
-                          history_records_model_type:
-                          Type[SellerSalesHistoryModel | DealerSalesHistoryModel]) \
-        -> None | MarketAvailableCarModel:
-    """Takes in parameter to filter history records, user profile model, type of history
-    records model and calculates the most sold cars model from all history records, returns
-    market available car model of the most sold car or None if no records were found"""
-    most_sold_car_model = None
-    history_records = history_records_model_type.objects.filter(**{filter_param: user_profile})
-    sold_cars = \
-        history_records.values("sold_car_model").\
-        annotate(sold_quantity=Sum('sold_cars_quantity')).\
-        order_by('-sold_quantity')
-    if sold_cars:
-        most_sold_car = sold_cars[0]['sold_car_model']
-        most_sold_car_model = SellerCarParkModel.objects.get(id=most_sold_car).car_model
-        if filter_param == 'dealer':
-            most_sold_car_model = DealerCarParkModel.objects.get(id=most_sold_car).car_model
-    return most_sold_car_model
-
-
-def history_records_collector(date: datetime.date,
-                              created: bool,
-                              user_history_model_type:
-                              Type[BaseSalesHistoryModel |
-                                   CarBuyerHistoryModel],
-                              filter_param: str,
-                              user_profile:
-                              AutoDealerModel |
-                              AutoSellerModel |
-                              CarBuyerModel,
-                              stats_model:
-                              OverallSellerStatisticsModel |
-                              OverallDealerStatisticsModel |
-                              OverallBuyerStatisticsModel) \
-        -> QuerySet[BaseSalesHistoryModel | CarBuyerHistoryModel] | None:
-    """Search for history records to be calculated from the given parameters, considering last
-    already analyzed date and current date given, returns history records queryset to be analyzed
-    or None if all available records were analyzed"""
-    history_records = None
-    if created:
-        history_records = user_history_model_type.objects.filter(date__lte=date,
-                                                                 **{filter_param: user_profile})
-    elif stats_model.last_analyzed_date and date > stats_model.last_analyzed_date:
-        history_records = \
-            user_history_model_type.objects.filter(date__gt=stats_model.last_analyzed_date,
-                                                   date__lte=date,
-                                                   **{filter_param: user_profile})
-    return history_records
+from .counters import most_sold_cars_finder, sold_cars_counters_updater
+from .models import (BaseOverallStatisticsModel, OverallBuyerStatisticsModel,
+                     OverallDealerStatisticsModel, OverallSellerStatisticsModel)
+
+
+SALES_STATISTICS_FIELDS = ['sold_cars_number', 'total_revenue', 'avg_sold_car_price',
+                           'most_sold_car', 'uniq_buyers_number']
+PURCHASE_STATISTICS_FIELDS = ['bought_cars_number', 'total_expenses', 'avg_bought_car_price']
+
+STATISTICS_UPDATE_BATCH_SIZE = 1000
+
+
+def profiles_statistics_collector(date: datetime.date,
+                                  profile_model_type:
+                                  Type[AutoSellerModel | AutoDealerModel | CarBuyerModel],
+                                  stats_model_type:
+                                  Type[OverallSellerStatisticsModel |
+                                       OverallDealerStatisticsModel |
+                                       OverallBuyerStatisticsModel],
+                                  profile_field: str) \
+        -> tuple[dict[int, BaseOverallStatisticsModel], dict[datetime.date | None, list[int]]]:
+    """Takes analyzed date, profile and statistics model types and name of statistics
+    profile field, creates statistics models of profiles, which have none, and returns map
+    of profile ids to their statistics models and map of analyzed periods starts (None for
+    the whole history of profiles with created statistics) to ids of profiles, whose history
+    records of the period should be analyzed"""
+    profile_ids = list(profile_model_type.objects.values_list('id', flat=True))
+    profiles_stats = {getattr(stats_model, f'{profile_field}_id'): stats_model
+                      for stats_model in stats_model_type.objects.
+                      filter(**{f'{profile_field}__in': profile_ids})}
+    created_stats = stats_model_type.objects.\
+        bulk_create([stats_model_type(**{f'{profile_field}_id': profile_id})
+                     for profile_id in profile_ids if profile_id not in profiles_stats])
+    periods: dict[datetime.date | None, list[int]] = {}
+    for profile_id, stats_model in profiles_stats.items():
+        if stats_model.last_analyzed_date and date > stats_model.last_analyzed_date:
+            periods.setdefault(stats_model.last_analyzed_date, []).append(profile_id)
+    for stats_model in created_stats:
+        profile_id = getattr(stats_model, f'{profile_field}_id')
+        profiles_stats[profile_id] = stats_model
+        periods.setdefault(None, []).append(profile_id)
+    return profiles_stats, periods
+
+
+def history_deltas_collector(date: datetime.date,
+                             periods: dict[datetime.date | None, list[int]],
+                             user_history_model_type:
+                             Type[BaseSalesHistoryModel | CarBuyerHistoryModel],
+                             filter_param: str) -> dict[int, dict[str, int | Decimal]]:
+    """Takes analyzed date, map of analyzed periods starts to profile ids, type of history
+    records model and its profile field name and returns map of profile ids to number of
+    cars and sum of deals from their history records of the analyzed periods, calculated
+    from daily rollups of the records with one grouped query per period, profiles without
+    records are omitted"""
+    spec = rollup_spec_getter(user_history_model_type, filter_param)
+    deltas = {}
+    for period_start, profile_ids in periods.items():
+        rollups = spec.rollup_model.objects.\
+            filter(date__lte=date, **{f'{spec.rollup_profile_field}__in': profile_ids})
+        if period_start:
+            rollups = rollups.filter(date__gt=period_start)
+        for rollup in rollups.values(spec.rollup_profile_field).\
+                annotate(cars_number=Sum('cars_quantity'), deals_sum=Sum('deal_sum')).\
+                order_by():
+            deltas[rollup[spec.rollup_profile_field]] = rollup
+    return deltas
+
+
+def sold_cars_deltas_collector(date: datetime.date,
+                               periods: dict[datetime.date | None, list[int]],
+                               history_records_model_type:
+                               Type[SellerSalesHistoryModel | DealerSalesHistoryModel],
+                               filter_param: str) -> dict[tuple[int, int], int]:
+    """Takes analyzed date, map of analyzed periods starts to profile ids, type of history
+    records model and its profile field name and returns map of (profile id, car park id)
+    pairs to number of cars sold within the analyzed periods, calculated from daily rollups
+    of the records with one grouped query per period"""
+    spec = rollup_spec_getter(history_records_model_type, filter_param)
+    deltas = {}
+    for period_start, profile_ids in periods.items():
+        rollups = spec.rollup_model.objects.\
+            filter(date__lte=date, **{f'{spec.rollup_profile_field}__in': profile_ids})
+        if period_start:
+            rollups = rollups.filter(date__gt=period_start)
+        for rollup in rollups.values(spec.rollup_profile_field, 'car_park').\
+                annotate(sold_quantity=Sum('cars_quantity')).order_by():
+            deltas[(rollup[spec.rollup_profile_field], rollup['car_park'])] = \
+                rollup['sold_quantity']
+    return deltas
+
+
+def statistics_totals_updater(profiles_stats: dict[int, BaseOverallStatisticsModel],
+                              deltas: dict[int, dict[str, int | Decimal]],
+                              number_field: str,
+                              sum_field: str,
+                              avg_field: str):
+    """Takes map of profile ids to statistics models, map of profile ids to number of cars
+    and sum of deals from new history records and names of statistics models cars number,
+    deals sum and average car price fields, adds new records data to statistics models"""
+    for profile_id, delta in deltas.items():
+        stats_model = profiles_stats[profile_id]
+        cars_number = int(getattr(stats_model, number_field)) + delta['cars_number']
+        deals_sum = Decimal(getattr(stats_model, sum_field)) + delta['deals_sum']
+        setattr(stats_model, number_field, cars_number)
+        setattr(stats_model, sum_field, deals_sum)
+        setattr(stats_model, avg_field, deals_sum / cars_number if cars_number else 0)
 
 
 def gather_seller_or_dealer_base_statistics(date: datetime.date,
                                             filter_param: str,
-                                            created: bool,
-                                            stats_model:
-                                            OverallSellerStatisticsModel |
-                                            OverallDealerStatisticsModel,
+                                            profiles_stats:
+                                            dict[int, OverallSellerStatisticsModel |
+                                                 OverallDealerStatisticsModel],
+                                            periods: dict[datetime.date | None, list[int]],
                                             user_history_model_type:
                                             Type[SellerSalesHistoryModel |
                                                  DealerSalesHistoryModel],
-                                            user_profile:
-                                            AutoDealerModel | AutoSellerModel,
                                             purchase_number_model:
                                             Type[DealerFromSellerPurchaseNumber |
-                                                 BuyerFromDealerPurchaseNumber]):
-    """Collects and calculates base dealer or seller statistics, and adds collected data to
-    corresponding statistics model"""
-    history_records = history_records_collector(date,
-                                                created,
-                                                user_history_model_type,
-                                                filter_param,
-                                                user_profile,
-                                                stats_model)
-    if history_records:
-        history_records_stats = history_records_statistics_calculator(history_records)
-        sold_cars_number = \
-            int(stats_model.sold_cars_number) + history_records_stats['sold_cars_number']
-        total_revenue = \
-            Decimal(stats_model.total_revenue) + history_records_stats['revenue']
-        avg_sold_car_price = 0
-        if sold_cars_number:
-            avg_sold_car_price = total_revenue / sold_cars_number
-        most_sold_car = most_sold_cars_finder(filter_param,
-                                              user_profile,
-                                              user_history_model_type)
-        uniq_buyers_number = \
-            purchase_number_model.objects.filter(**{filter_param: user_profile}).count()
-        stats_model.sold_cars_number = sold_cars_number
-        stats_model.total_revenue = total_revenue
-        stats_model.avg_sold_car_price = avg_sold_car_price
-        stats_model.most_sold_car = most_sold_car
-        stats_model.uniq_buyers_number = uniq_buyers_number
-        stats_model.save()
+                                                 BuyerFromDealerPurchaseNumber]) -> list[int]:
+    """Collects and calculates base dealers or sellers statistics, adds collected data to
+    corresponding statistics models of profiles, which have new history records, and returns
+    ids of these profiles"""
+    deltas = history_deltas_collector(date, periods, user_history_model_type, filter_param)
+    if not deltas:
+        return []
+    statistics_totals_updater(profiles_stats, deltas, 'sold_cars_number',
+                              'total_revenue', 'avg_sold_car_price')
+    sold_cars_counters_updater(filter_param,
+                               sold_cars_deltas_collector(date, periods,
+                                                          user_history_model_type,
+                                                          filter_param),
+                               periods.get(None, []))
+    most_sold_cars = most_sold_cars_finder(filter_param, list(deltas))
+    uniq_buyers_numbers = dict(purchase_number_model.objects.
+                               filter(**{f'{filter_param}__in': list(deltas)}).
+                               values(filter_param).annotate(buyers_number=Count('id')).
+                               order_by().values_list(filter_param, 'buyers_number'))
+    for profile_id in deltas:
+        stats_model = profiles_stats[profile_id]
+        stats_model.most_sold_car_id = most_sold_cars.get(profile_id)
+        stats_model.uniq_buyers_number = uniq_buyers_numbers.get(profile_id, 0)
+    return list(deltas)
 
 
 def gather_additional_statistics(date: datetime.date,
-                                 created: bool,
                                  filter_param: str,
-                                 stats_model:
-                                 OverallDealerStatisticsModel | OverallBuyerStatisticsModel,
-                                 user_profile: AutoDealerModel,
+                                 profiles_stats:
+                                 dict[int, OverallDealerStatisticsModel |
+                                      OverallBuyerStatisticsModel],
+                                 periods: dict[datetime.date | None, list[int]],
                                  user_history_model_type:
-                                 Type[SellerSalesHistoryModel | CarBuyerHistoryModel],
-                                 user_type: str):
-    """Collects and calculates additional statistics about purchases, and adds collected data to
-    corresponding statistics model"""
-    history_records = history_records_collector(date,
-                                                created,
-                                                user_history_model_type,
-                                                filter_param,
-                                                user_profile,
-                                                stats_model)
-    if history_records:
-        history_records_stats = additional_history_stats_calculator(history_records, user_type)
-        bought_cars_number = \
-            int(stats_model.bought_cars_number) + history_records_stats['bought_cars_number']
-        total_expenses = \
-            Decimal(stats_model.total_expenses) + history_records_stats['expenses']
-        avg_bought_car_price = 0
-        if bought_cars_number:
-            avg_bought_car_price = total_expenses / bought_cars_number
-        stats_model.bought_cars_number = bought_cars_number
-        stats_model.total_expenses = total_expenses
-        stats_model.avg_bought_car_price = avg_bought_car_price
-        stats_model.save()
+                                 Type[SellerSalesHistoryModel | CarBuyerHistoryModel]) \
+        -> list[int]:
+    """Collects and calculates additional statistics about purchases, adds collected data to
+    corresponding statistics models of profiles, which have new history records, and returns
+    ids of these profiles"""
+    deltas = history_deltas_collector(date, periods, user_history_model_type, filter_param)
+    statistics_totals_updater(profiles_stats, deltas, 'bought_cars_number',
+                              'total_expenses', 'avg_bought_car_price')
+    return list(deltas)
+
+
+def statistics_models_updater(date: datetime.date,
+                              stats_model_type:
+                              Type[OverallSellerStatisticsModel |
+                                   OverallDealerStatisticsModel |
+                                   OverallBuyerStatisticsModel],
+                              profile_field: str,
+                              profiles_stats: dict[int, BaseOverallStatisticsModel],
+                              changed_profile_ids: list[int],
+                              fields: list[str]):
+    """Takes analyzed date, statistics model type, name of statistics profile field, map of
+    profile ids to their statistics models, ids of profiles with changed statistics and names
+    of statistics fields, saves given fields of changed statistics models in batches and sets
+    analyzed date of all profiles statistics with one query"""
+    stats_model_type.objects.bulk_update([profiles_stats[profile_id]
+                                          for profile_id in set(changed_profile_ids)],
+                                         fields, batch_size=STATISTICS_UPDATE_BATCH_SIZE)
+    stats_model_type.objects.filter(**{f'{profile_field}__in': list(profiles_stats)}).\
+        update(last_analyzed_date=date)
 
 
 @shared_task(name='seller_stats')
+@transaction.atomic
 def get_seller_statistics():
     """Celery task to be run at night, which calculates and saves to seller statistics
     models new statistics data"""
     date = datetime.date.today() - datetime.timedelta(days=1)
-    for seller in AutoSellerModel.objects.all():
-        seller_stats = \
-            OverallSellerStatisticsModel.objects.get_or_create(seller=seller)
-        seller_stats_model = seller_stats[0]
-        gather_seller_or_dealer_base_statistics(date,
-                                                'seller',
-                                                seller_stats[1],
-                                                seller_stats_model,
-                                                SellerSalesHistoryModel,
-                                                seller,
-                                                DealerFromSellerPurchaseNumber)
-        seller_stats_model.last_analyzed_date = date
-        seller_stats_model.save()
+    sellers_stats, periods = profiles_statistics_collector(date,
+                                                           AutoSellerModel,
+                                                           OverallSellerStatisticsModel,
+                                                           'seller')
+    changed_seller_ids = gather_seller_or_dealer_base_statistics(date,
+                                                                 'seller',
+                                                                 sellers_stats,
+                                                                 periods,
+                                                                 SellerSalesHistoryModel,
+                                                                 DealerFromSellerPurchaseNumber)
+    statistics_models_updater(date, OverallSellerStatisticsModel, 'seller', sellers_stats,
+                              changed_seller_ids, SALES_STATISTICS_FIELDS)
 
 
 @shared_task(name='dealer_stats')
+@transaction.atomic
 def get_dealer_statistics():
     """Celery task to be run at night, which calculates and saves to dealer statistics
     models new statistics data"""
     date = datetime.date.today() - datetime.timedelta(days=1)
-    for dealer in AutoDealerModel.objects.all():
-        dealer_stats = \
-            OverallDealerStatisticsModel.objects.get_or_create(dealer=dealer)
-        dealer_stats_model = dealer_stats[0]
-        gather_seller_or_dealer_base_statistics(date,
-                                                'dealer',
-                                                dealer_stats[1],
-                                                dealer_stats_model,
-                                                DealerSalesHistoryModel,
-                                                dealer,
-                                                BuyerFromDealerPurchaseNumber)
-        gather_additional_statistics(date,
-                                     dealer_stats[1],
-                                     'car_buyer',
-                                     dealer_stats_model,
-                                     dealer,
-                                     SellerSalesHistoryModel,
-                                     'dealer')
+    dealers_stats, periods = profiles_statistics_collector(date,
+                                                           AutoDealerModel,
+                                                           OverallDealerStatisticsModel,
+                                                           'dealer')
+    changed_dealer_ids = gather_seller_or_dealer_base_statistics(date,
+                                                                 'dealer',
+                                                                 dealers_stats,
+                                                                 periods,
+                                                                 DealerSalesHistoryModel,
+                                                                 BuyerFromDealerPurchaseNumber)
+    changed_dealer_ids += gather_additional_statistics(date,
+                                                       'car_buyer',
+                                                       dealers_stats,
+                                                       periods,
+                                                       SellerSalesHistoryModel)
+    for dealer_id in changed_dealer_ids:
+        dealer_stats_model = dealers_stats[dealer_id]
         dealer_stats_model.total_profit = \
             Decimal(dealer_stats_model.total_revenue) - \
             Decimal(dealer_stats_model.total_expenses)
-        dealer_stats_model.last_analyzed_date = date
-        dealer_stats_model.save()
+    statistics_models_updater(date, OverallDealerStatisticsModel, 'dealer', dealers_stats,
+                              changed_dealer_ids,
+                              SALES_STATISTICS_FIELDS + PURCHASE_STATISTICS_FIELDS +
+                              ['total_profit'])
 
 
 @shared_task(name='buyer_stats')
+@transaction.atomic
 def get_buyer_statistics():
     """Celery task to be run at night, which calculates and saves to buyer statistics
     models new statistics data"""
     date = datetime.date.today() - datetime.timedelta(days=1)
-    for buyer in CarBuyerModel.objects.all():
-        buyer_stats = \
-            OverallBuyerStatisticsModel.objects.get_or_create(buyer=buyer)
-        buyer_stats_model = buyer_stats[0]
-        gather_additional_statistics(date,
-                                     buyer_stats[1],
-                                     'buyer',
-                                     buyer_stats_model,
-                                     buyer,
-                                     CarBuyerHistoryModel,
-                                     'buyer')
-        buyer_stats_model.last_analyzed_date = date
-        buyer_stats_model.save()
+    buyers_stats, periods = profiles_statistics_collector(date,
+                                                          CarBuyerModel,
+                                                          OverallBuyerStatisticsModel,
+                                                          'buyer')
+    changed_buyer_ids = gather_additional_statistics(date,
+                                                     'buyer',
+                                                     buyers_stats,
+                                                     periods,
+                                                     CarBuyerHistoryModel)
+    statistics_models_updater(date, OverallBuyerStatisticsModel, 'buyer', buyers_stats,
+                              changed_buyer_ids, PURCHASE_STATISTICS_FIELDS)
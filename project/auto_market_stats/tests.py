@@ -1,9 +1,19 @@
 # pylint: skip-file
 
+import datetime
+from decimal import Decimal
+
 import pytest
+from car_park.models import SellerCarParkModel
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from sales_history.models import (DealerDailySalesRollupModel, DealerSalesHistoryModel,
+                                  SellerSalesHistoryModel)
+from user.models import AutoDealerModel, AutoSellerModel, CarBuyerModel
 
 from .models import (OverallBuyerStatisticsModel, OverallDealerStatisticsModel,
-                     OverallSellerStatisticsModel)
+                     OverallSellerStatisticsModel, SellerSoldCarCounterModel)
 from .serializers import (OverallBuyerStatisticsSerializer,
                           OverallDealerStatisticsSerializer,
                           OverallSellerStatisticsSerializer)
@@ -43,3 +53,135 @@ def test_stats_tasks(predefined_stats_data_generator,
         stat_data = OverallBuyerStatisticsSerializer(stat).data
         for key, value in stat_data.items():
             assert value == predefined_buyer_stats[key]
+
+
+def test_stats_tasks_add_only_records_of_not_analyzed_days(predefined_stats_data_generator):
+    get_seller_statistics()
+    get_dealer_statistics()
+    get_buyer_statistics()
+    today = datetime.date.today()
+    yesterday = today - datetime.timedelta(days=1)
+    predefined_sellers_stats = predefined_stats_data_generator["predefined_seller_data"]
+    seller_id, analyzed_seller_id = list(predefined_sellers_stats)[:2]
+    dealer = AutoDealerModel.objects.first()
+    for history_seller_id, date in [(seller_id, yesterday), (seller_id, today),
+                                    (analyzed_seller_id, yesterday)]:
+        record = SellerSalesHistoryModel.objects.\
+            create(seller_id=history_seller_id, car_buyer=dealer, sold_cars_quantity=5,
+                   selling_price=Decimal(1000), deal_sum=Decimal(5000),
+                   sold_car_model=SellerCarParkModel.objects.filter(seller_id=seller_id).
+                   first())
+        record.date = date
+        record.save()
+    OverallSellerStatisticsModel.objects.filter(seller_id=seller_id).\
+        update(last_analyzed_date=today - datetime.timedelta(days=2))
+    get_seller_statistics()
+    stat_data = OverallSellerStatisticsSerializer(
+        OverallSellerStatisticsModel.objects.get(seller_id=seller_id)).data
+    assert stat_data['sold_cars_number'] == 35
+    assert stat_data['total_revenue'] == '45010.00'
+    assert stat_data['avg_sold_car_price'] == '1286.00'
+    assert stat_data['uniq_buyers_number'] == 2
+    assert OverallSellerStatisticsModel.objects.get(seller_id=seller_id).\
+        last_analyzed_date == yesterday
+    stat_data = OverallSellerStatisticsSerializer(
+        OverallSellerStatisticsModel.objects.get(seller_id=analyzed_seller_id)).data
+    for key, value in predefined_sellers_stats[analyzed_seller_id].items():
+        assert stat_data[key] == value
+    dealer_stats = OverallDealerStatisticsModel.objects.get(dealer=dealer)
+    assert dealer_stats.last_analyzed_date == yesterday
+
+
+def test_stats_tasks_query_count_does_not_depend_on_profiles_number(
+        predefined_stats_data_generator):
+    with CaptureQueriesContext(connection) as queries:
+        get_dealer_statistics()
+    assert AutoDealerModel.objects.count() == 3
+    assert len(queries) <= 16
+
+
+def test_stats_tasks_update_only_changed_statistics(predefined_stats_data_generator):
+    get_dealer_statistics()
+    with CaptureQueriesContext(connection) as queries:
+        get_dealer_statistics()
+    table = OverallDealerStatisticsModel._meta.db_table
+    updates = [query['sql'] for query in queries
+               if query['sql'].startswith(f'UPDATE "{table}"')]
+    assert len(updates) == 1
+    assert 'CASE' not in updates[0]
+    assert set(OverallDealerStatisticsModel.objects.values_list('last_analyzed_date',
+                                                                flat=True)) == \
+        {datetime.date.today() - datetime.timedelta(days=1)}
+
+
+def test_dealer_sales_series_are_bucketed_and_cached(predefined_stats_data_generator,
+                                                     client):
+    dealer_id = next(dealer_id for dealer_id, dealer_stats
+                     in predefined_stats_data_generator["predefined_dealer_data"].items()
+                     if dealer_stats['sold_cars_number'] == 3)
+    dealer = AutoDealerModel.objects.get(pk=dealer_id)
+    client.force_authenticate(user=dealer.user)
+    sales_date = datetime.date.today() - datetime.timedelta(days=2)
+    response = client.get(reverse('my-dealer-sales-series'), data={'bucket': 'day'})
+    assert response.status_code == 200
+    assert response.data == [{'period': sales_date, 'cars_number': 3,
+                              'deals_sum': Decimal('5500.00'),
+                              'avg_car_price': Decimal('1833.33')}]
+    response = client.get(reverse('my-dealer-sales-series'), data={'bucket': 'month'})
+    assert [bucket['period'] for bucket in response.data] == [sales_date.replace(day=1)]
+    response = client.get(reverse('my-dealer-purchases-series'))
+    assert response.data[0]['cars_number'] == 20
+    assert response.data[0]['deals_sum'] == Decimal('20010.00')
+    response = client.get(reverse('my-dealer-sales-series'),
+                          data={'date_from': sales_date + datetime.timedelta(days=1)})
+    assert response.data == []
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(reverse('my-dealer-sales-series'), data={'bucket': 'day'})
+    assert response.data[0]['cars_number'] == 3
+    assert not [query for query in queries
+                if DealerDailySalesRollupModel._meta.db_table in query['sql']]
+    park = dealer.dealercarparkmodel_set.first()
+    DealerSalesHistoryModel.objects.create(dealer=dealer, sold_car_model=park,
+                                           car_buyer=CarBuyerModel.objects.first(),
+                                           selling_price=Decimal(1000), sold_cars_quantity=1,
+                                           deal_sum=Decimal(1000))
+    response = client.get(reverse('my-dealer-sales-series'), data={'bucket': 'day'})
+    assert [bucket['cars_number'] for bucket in response.data] == [3, 1]
+    for data in [{'bucket': 'year'}, {'date_from': '2023-02-01', 'date_to': '2023-01-01'}]:
+        response = client.get(reverse('my-dealer-sales-series'), data=data)
+        assert response.status_code == 400
+
+
+def test_sold_cars_counters_are_updated_incrementally(predefined_stats_data_generator,
+                                                      client):
+    get_seller_statistics()
+    seller_id = next(seller_id for seller_id, seller_stats
+                     in predefined_stats_data_generator["predefined_seller_data"].items()
+                     if seller_stats['sold_cars_number'] == 40)
+    seller = AutoSellerModel.objects.get(pk=seller_id)
+    client.force_authenticate(user=seller.user)
+    response = client.get(reverse('my-seller-best-sellers'))
+    assert response.status_code == 200
+    assert [park['sold_quantity'] for park in response.data] == [30, 10]
+    top_park, second_park = [park['car_park'] for park in response.data]
+    assert response.data[0]['car_model'] == \
+        OverallSellerStatisticsModel.objects.get(seller=seller).most_sold_car_id
+    record = SellerSalesHistoryModel.objects.\
+        create(seller=seller, car_buyer=AutoDealerModel.objects.first(), sold_cars_quantity=25,
+               selling_price=Decimal(1000), deal_sum=Decimal(25000),
+               sold_car_model_id=second_park)
+    record.date = datetime.date.today() - datetime.timedelta(days=1)
+    record.save()
+    OverallSellerStatisticsModel.objects.filter(seller=seller).\
+        update(last_analyzed_date=datetime.date.today() - datetime.timedelta(days=2))
+    get_seller_statistics()
+    assert SellerSoldCarCounterModel.objects.get(seller=seller, car_park=second_park).\
+        sold_quantity == 35
+    assert SellerSoldCarCounterModel.objects.get(seller=seller, car_park=top_park).\
+        sold_quantity == 30
+    assert OverallSellerStatisticsModel.objects.get(seller=seller).most_sold_car_id == \
+        SellerCarParkModel.objects.get(pk=second_park).car_model_id
+    response = client.get(reverse('my-seller-best-sellers'), data={'limit': 1})
+    assert [park['car_park'] for park in response.data] == [second_park]
+    response = client.get(reverse('my-seller-best-sellers'), data={'limit': 101})
+    assert response.status_code == 400
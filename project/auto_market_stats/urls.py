@@ -0,0 +1,26 @@
+from django.urls import path
+
+from .views import (BuyerPurchasesSeriesView, DealerBestSellersView,
+                    DealerPurchasesSeriesView, DealerSalesSeriesView,
+                    SellerBestSellersView, SellerSalesSeriesView)
+
+urlpatterns = [
+    path('my_dealer_sales_series',
+         DealerSalesSeriesView.as_view(),
+         name='my-dealer-sales-series'),
+    path('my_dealer_purchases_series',
+         DealerPurchasesSeriesView.as_view(),
+         name='my-dealer-purchases-series'),
+    path('my_seller_sales_series',
+         SellerSalesSeriesView.as_view(),
+         name='my-seller-sales-series'),
+    path('my_purchases_series',
+         BuyerPurchasesSeriesView.as_view(),
+         name='my-purchases-series'),
+    path('my_dealer_best_sellers',
+         DealerBestSellersView.as_view(),
+         name='my-dealer-best-sellers'),
+    path('my_seller_best_sellers',
+         SellerBestSellersView.as_view(),
+         name='my-seller-best-sellers'),
+]
@@ -0,0 +1,84 @@
+from typing import Type
+
+from django.db.models import Model
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from root.common.permissions import IsBuyer, IsDealer, IsSeller, IsVerified
+from root.common.profiles import request_profile_getter
+from root.common.views import CustomRequest
+from sales_history.models import (CarBuyerHistoryModel, DealerSalesHistoryModel,
+                                  SellerSalesHistoryModel)
+from sales_history.rollups import rollup_spec_getter
+from user.models import AutoDealerModel, AutoSellerModel, CarBuyerModel
+
+from .counters import best_sellers_getter
+from .serializers import BestSellersParamsSerializer, SalesSeriesParamsSerializer
+from .series import sales_series_getter
+
+
+class BaseSalesSeriesView(APIView):
+    history_model: Type[Model]
+    profile_field: str
+    user_model: Type[Model]
+
+    def get(self, request: CustomRequest) -> Response:
+        params = SalesSeriesParamsSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        profile = request_profile_getter(request, self.user_model) or \
+            self.user_model.objects.get(user=request.user)
+        series = sales_series_getter(rollup_spec_getter(self.history_model, self.profile_field),
+                                     profile.pk, **params.validated_data)
+        return Response(series)
+
+
+class DealerSalesSeriesView(BaseSalesSeriesView):
+    permission_classes = [IsVerified & IsDealer]
+    history_model = DealerSalesHistoryModel
+    profile_field = 'dealer'
+    user_model = AutoDealerModel
+
+
+class DealerPurchasesSeriesView(BaseSalesSeriesView):
+    permission_classes = [IsVerified & IsDealer]
+    history_model = SellerSalesHistoryModel
+    profile_field = 'car_buyer'
+    user_model = AutoDealerModel
+
+
+class SellerSalesSeriesView(BaseSalesSeriesView):
+    permission_classes = [IsVerified & IsSeller]
+    history_model = SellerSalesHistoryModel
+    profile_field = 'seller'
+    user_model = AutoSellerModel
+
+
+class BuyerPurchasesSeriesView(BaseSalesSeriesView):
+    permission_classes = [IsVerified & IsBuyer]
+    history_model = CarBuyerHistoryModel
+    profile_field = 'buyer'
+    user_model = CarBuyerModel
+
+
+class BaseBestSellersView(APIView):
+    profile_field: str
+    user_model: Type[Model]
+
+    def get(self, request: CustomRequest) -> Response:
+        params = BestSellersParamsSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        profile = request_profile_getter(request, self.user_model) or \
+            self.user_model.objects.get(user=request.user)
+        return Response(best_sellers_getter(self.profile_field, profile.pk,
+                                            params.validated_data['limit']))
+
+
+class DealerBestSellersView(BaseBestSellersView):
+    permission_classes = [IsVerified & IsDealer]
+    profile_field = 'dealer'
+    user_model = AutoDealerModel
+
+
+class SellerBestSellersView(BaseBestSellersView):
+    permission_classes = [IsVerified & IsSeller]
+    profile_field = 'seller'
+    user_model = AutoSellerModel
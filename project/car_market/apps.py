@@ -1,6 +1,15 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate, pre_migrate
 
 
 class CarsAppConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "car_market"
+
+    def ready(self):
+        # pylint: disable=import-outside-toplevel, unused-import
+        from . import signals  # noqa: F401
+        from root.common.search import (trigram_extension_creator,
+                                        trigram_indexes_creator)
+        pre_migrate.connect(trigram_extension_creator, sender=self)
+        post_migrate.connect(trigram_indexes_creator, sender=self)
@@ -0,0 +1,31 @@
+"""This module contains management command reporting query plans of hot queries"""
+
+from django.core.management.base import BaseCommand, CommandError
+from root.common.hot_queries import hot_queries_plans_reporter
+
+
+class Command(BaseCommand):
+    help = 'Reports EXPLAIN plans of hot queries of tasks, filters and views and checks, ' \
+           'if the plans use indexes designed for them'
+
+    def add_arguments(self, parser):
+        parser.add_argument('names', nargs='*',
+                            help='Names of reported hot queries, all queries by default')
+        parser.add_argument('--analyze', action='store_true',
+                            help='Execute queries and report actual plans (PostgreSQL only)')
+        parser.add_argument('--strict', action='store_true',
+                            help='Fail if any plan does not use its expected index')
+
+    def handle(self, *args, **options):
+        explain_options = {'analyze': True} if options['analyze'] else {}
+        missed_indexes = []
+        for hot_query, plan, index_used in \
+                hot_queries_plans_reporter(options['names'], **explain_options):
+            self.stdout.write(self.style.MIGRATE_HEADING(hot_query.name))
+            self.stdout.write(plan)
+            if not index_used:
+                missed_indexes.append(f'{hot_query.name} does not use {hot_query.index_name}')
+                self.stdout.write(self.style.WARNING(missed_indexes[-1]))
+        if missed_indexes and options['strict']:
+            raise CommandError('\n'.join(missed_indexes))
+        self.stdout.write(self.style.SUCCESS('Hot queries plans reported'))
@@ -1,5 +1,5 @@
 from django.db.models import (BooleanField, CharField, DecimalField,
-                              FloatField, IntegerField)
+                              FloatField, Index, IntegerField, Q)
 from root.common.models import BaseModel
 
 
@@ -56,3 +56,13 @@ class MarketAvailableCarModel(BaseCarParametersModel):
     car_model_name: CharField = CharField(max_length=100)
     year_of_production: IntegerField = IntegerField()
     demand_level: DecimalField = DecimalField(max_digits=5, decimal_places=2, blank=True)
+
+    # trigram indexes of searched fields, created after migrations on PostgreSQL only
+    trigram_indexes = {'brand_name': 'market_car_brand_trgm_idx',
+                       'car_model_name': 'market_car_model_trgm_idx',
+                       'color': 'market_car_color_trgm_idx'}
+
+    class Meta:
+        indexes = [Index(fields=['year_of_production', 'engine_volume'],
+                         condition=Q(is_active=True),
+                         name='market_car_spec_idx')]
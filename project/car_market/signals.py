@@ -0,0 +1,14 @@
+"""This module contains signal receivers invalidating cached market cars responses"""
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from root.common.response_cache import response_cache_invalidator
+
+from .models import MarketAvailableCarModel
+
+
+@receiver(post_save, sender=MarketAvailableCarModel)
+@receiver(post_delete, sender=MarketAvailableCarModel)
+def invalidate_market_cars_responses(sender, **kwargs):
+    """Makes cached market cars responses stale after market car change"""
+    response_cache_invalidator(MarketAvailableCarModel)
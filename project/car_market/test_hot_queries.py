@@ -0,0 +1,31 @@
+# pylint: skip-file
+
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from root.common.hot_queries import HOT_QUERIES, hot_queries_plans_reporter
+
+pytestmark = pytest.mark.django_db
+
+
+def test_hot_queries_indexes_exist():
+    indexes = set()
+    with connection.cursor() as cursor:
+        for hot_query in HOT_QUERIES:
+            table = hot_query.queryset_creator().model._meta.db_table
+            indexes.update(connection.introspection.get_constraints(cursor, table))
+    assert {hot_query.index_name for hot_query in HOT_QUERIES} <= indexes
+
+
+def test_hot_queries_plans_are_reported():
+    reports = hot_queries_plans_reporter(['parks_to_buy_from', 'dealer_sales_history'])
+    assert [hot_query.name for hot_query, _, _ in reports] == ['parks_to_buy_from',
+                                                               'dealer_sales_history']
+    assert all(plan for _, plan, _ in reports)
+    output = StringIO()
+    call_command('hot_queries_plans', stdout=output)
+    for hot_query in HOT_QUERIES:
+        assert hot_query.name in output.getvalue()
+    assert 'Hot queries plans reported' in output.getvalue()
@@ -1,5 +1,15 @@
+import json
+from unittest.mock import patch
+
 import pytest
+from django.db import connection
+from django.db.backends.postgresql.base import DatabaseWrapper
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from root.common.pagination import LinkHeaderCursorPagination
+from root.common.search import TrigramSearchFilter, trigram_indexes_sql_creator
+
+from .models import MarketAvailableCarModel
 
 pytestmark = pytest.mark.django_db
 
@@ -102,3 +112,112 @@ def test_market_order_filters(client, verified_user, cars):
     assert response.status_code == 200
     assert response.data[0]['year_of_production'] <= data['max_year_of_production']
     assert float(response.data[0]['engine_volume']) <= float(response.data[1]['engine_volume'])
+
+
+@pytest.mark.parametrize('verified_user', ['BUYER'], indirect=True)
+def test_market_list_is_cursor_paginated(client, verified_user, cars):
+    client.force_authenticate(user=verified_user['user_instance'])
+    for ordering in [None, '-engine_volume']:
+        data = {'page_size': 30}
+        if ordering:
+            data['ordering'] = ordering
+        response = client.get(reverse('car-list'), data=data)
+        listed_cars = []
+        pages_number = 0
+        while True:
+            assert response.status_code == 200
+            assert len(response.data) <= 30
+            listed_cars.extend(response.data)
+            pages_number = pages_number + 1
+            next_links = [link for link in response.headers.get('Link', '').split(', ')
+                          if link.endswith('rel="next"')]
+            if not next_links:
+                break
+            response = client.get(next_links[0][1:next_links[0].index('>')])
+        assert pages_number == 4
+        assert sorted(car['id'] for car in listed_cars) == sorted(car.pk for car in cars)
+        if ordering:
+            assert [float(car['engine_volume']) for car in listed_cars] == \
+                sorted((float(car['engine_volume']) for car in listed_cars), reverse=True)
+
+
+@pytest.mark.parametrize('verified_user', ['BUYER'], indirect=True)
+def test_market_list_is_paginated_by_default(client, verified_user, cars):
+    client.force_authenticate(user=verified_user['user_instance'])
+    with patch.object(LinkHeaderCursorPagination, 'page_size', 10):
+        response = client.get(reverse('car-list'))
+        assert response.status_code == 200
+        assert len(response.data) == 10
+        assert 'rel="next"' in response['Link']
+        next_link = response['Link'][1:response['Link'].index('>')]
+        response = client.get(next_link)
+        assert response.status_code == 200
+        assert len(response.data) == 10
+        response = client.get(reverse('car-list'), data={'stream': 'ndjson'})
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        assert len(lines) == len(cars)
+
+
+@pytest.mark.parametrize('verified_user', ['BUYER'], indirect=True)
+def test_market_list_can_be_streamed_as_ndjson(client, verified_user, cars):
+    client.force_authenticate(user=verified_user['user_instance'])
+    response = client.get(reverse('car-list'), data={'stream': 'ndjson'})
+    assert response.status_code == 200
+    assert response['Content-Type'] == 'application/x-ndjson'
+    lines = b''.join(response.streaming_content).decode().splitlines()
+    assert sorted(json.loads(line)['id'] for line in lines) == sorted(car.pk for car in cars)
+
+
+@pytest.mark.parametrize('verified_user', ['BUYER'], indirect=True)
+def test_market_list_is_served_from_cache_with_etag(client, verified_user, cars,
+                                                    django_capture_on_commit_callbacks):
+    client.force_authenticate(user=verified_user['user_instance'])
+    response = client.get(reverse('car-list'), data={'ordering': '-engine_volume',
+                                                      'page_size': 10})
+    assert response.status_code == 200
+    etag = response['ETag']
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(reverse('car-list') + '?page_size=10&search=&'
+                                                    'ordering=-engine_volume')
+    assert response.status_code == 200
+    assert not queries
+    assert response['ETag'] == etag
+    assert len(response.data) == 10
+    assert response.has_header('Link')
+    response = client.get(reverse('car-list'), data={'ordering': '-engine_volume',
+                                                      'page_size': 10},
+                          HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 304
+    car = cars[0]
+    response = client.get(reverse('car-detail', kwargs={'pk': car.pk}))
+    assert response.data['car_model_name'] == car.car_model_name
+    car.car_model_name = 'Renamed'
+    with django_capture_on_commit_callbacks(execute=True):
+        car.save()
+    response = client.get(reverse('car-detail', kwargs={'pk': car.pk}))
+    assert response.data['car_model_name'] == 'Renamed'
+
+
+def test_trigram_search_is_ranked_by_similarity_on_postgres():
+    queryset = TrigramSearchFilter().\
+        trigram_filter_queryset(MarketAvailableCarModel.objects.all(),
+                                ['brand_name', 'car_model_name'], ['bmw', 'x5'])
+    postgres = DatabaseWrapper({**connection.settings_dict,
+                                'ENGINE': 'django.db.backends.postgresql'})
+    sql, params = queryset.query.get_compiler(connection=postgres).as_sql()
+    assert 'UPPER("car_market_marketavailablecarmodel"."brand_name") %%> %s' in sql
+    assert 'GREATEST(WORD_SIMILARITY' in sql
+    assert sql.endswith('DESC')
+    assert {'%BMW%', '%X5%', 'BMW', 'X5'} <= set(params)
+
+
+def test_trigram_indexes_are_not_part_of_model_state():
+    assert [index.name for index in MarketAvailableCarModel._meta.indexes] == \
+        ['market_car_spec_idx']
+    postgres = DatabaseWrapper({**connection.settings_dict,
+                                'ENGINE': 'django.db.backends.postgresql'})
+    statements = trigram_indexes_sql_creator(MarketAvailableCarModel, postgres.ops.quote_name)
+    assert statements[0] == 'CREATE INDEX IF NOT EXISTS "market_car_brand_trgm_idx" ON ' \
+                            '"car_market_marketavailablecarmodel" USING gin ' \
+                            '(UPPER("brand_name") gin_trgm_ops)'
+    assert len(statements) == 3
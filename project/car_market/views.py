@@ -1,5 +1,7 @@
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters
+from root.common.response_cache import CachedResponseMixin
+from root.common.search import TrigramSearchFilter
 from root.common.views import BaseReadOnlyView
 
 from .market_filter import CarFilter
@@ -7,11 +9,11 @@ from .models import MarketAvailableCarModel
 from .serializers import MarkerAvailableCarsModelSerializer
 
 
-class MarketAvailableCarModelView(BaseReadOnlyView):
+class MarketAvailableCarModelView(CachedResponseMixin, BaseReadOnlyView):
     serializer = MarkerAvailableCarsModelSerializer
     model = MarketAvailableCarModel
     filter_backends = (DjangoFilterBackend,
-                       filters.SearchFilter,
+                       TrigramSearchFilter,
                        filters.OrderingFilter,)
     filterset_class = CarFilter
     search_fields = ['brand_name', 'car_model_name']
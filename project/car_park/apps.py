@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class CarParksConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "car_park"
+
+    def ready(self):
+        # pylint: disable=import-outside-toplevel, unused-import
+        from . import signals  # noqa: F401
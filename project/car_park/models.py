@@ -1,5 +1,5 @@
 from django.db import models
-from django.db.models import DecimalField, ForeignKey, IntegerField
+from django.db.models import DecimalField, ForeignKey, Index, IntegerField, Q
 from root.common.models import BaseModel
 
 
@@ -16,6 +16,22 @@ class BaseCurrentCarParkModel(BaseModel):
 class DealerCarParkModel(BaseCurrentCarParkModel):
     dealer: ForeignKey = ForeignKey('user.AutoDealerModel', on_delete=models.CASCADE)
 
+    class Meta:
+        indexes = [Index(fields=['car_model', 'available_number'],
+                         condition=Q(is_active=True),
+                         name='dealer_park_stock_idx'),
+                   Index(fields=['dealer', 'car_model'],
+                         condition=Q(is_active=True),
+                         name='dealer_park_owner_idx')]
+
 
 class SellerCarParkModel(BaseCurrentCarParkModel):
     seller: ForeignKey = ForeignKey('user.AutoSellerModel', on_delete=models.CASCADE)
+
+    class Meta:
+        indexes = [Index(fields=['car_model', 'available_number'],
+                         condition=Q(is_active=True),
+                         name='seller_park_stock_idx'),
+                   Index(fields=['seller', 'car_model'],
+                         condition=Q(is_active=True),
+                         name='seller_park_owner_idx')]
@@ -0,0 +1,14 @@
+"""This module contains signal receivers invalidating cached dealer car parks responses"""
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from root.common.response_cache import response_cache_invalidator
+
+from .models import DealerCarParkModel
+
+
+@receiver(post_save, sender=DealerCarParkModel)
+@receiver(post_delete, sender=DealerCarParkModel)
+def invalidate_dealer_parks_responses(sender, **kwargs):
+    """Makes cached dealer car parks responses stale after dealer car park change"""
+    response_cache_invalidator(DealerCarParkModel)
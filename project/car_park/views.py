@@ -2,6 +2,7 @@ from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters
 from root.common.permissions import (IsDealer, IsOwnerOrAdmin, IsSeller,
                                      IsVerified)
+from root.common.response_cache import CachedResponseMixin
 from root.common.views import BaseOwnModelReadView, BaseReadOnlyView
 from user.models import AutoDealerModel, AutoSellerModel
 
@@ -10,7 +11,7 @@ from .park_filter import DealerParkFilter, SellerParkFilter
 from .serializers import DealerCarParkSerializer, SellersCarParkSerializer
 
 
-class DealerAutoParkFrontView(BaseReadOnlyView):
+class DealerAutoParkFrontView(CachedResponseMixin, BaseReadOnlyView):
     serializer = DealerCarParkSerializer
     model = DealerCarParkModel
     filterset_class = DealerParkFilter
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class CarSpecAppConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "car_spec"
+
+    def ready(self):
+        # pylint: disable=import-outside-toplevel, unused-import
+        from . import signals  # noqa: F401
@@ -0,0 +1,14 @@
+"""This module contains signal receivers keeping dealer suitable cars up to date"""
+
+from car_market.models import MarketAvailableCarModel
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .tasks import cars_suit_dealers_updater
+
+
+@receiver(post_save, sender=MarketAvailableCarModel)
+def match_saved_car_with_dealers(sender, instance: MarketAvailableCarModel, **kwargs):
+    """Re-matches created or changed market car against dealer specifications, which
+    could suit it, without rescanning all specifications"""
+    cars_suit_dealers_updater([instance.pk])
@@ -1,50 +1,189 @@
 """This module contains celery tasks for defining dealer-seller relations"""
 
-from contextlib import suppress
+import time
 from decimal import Decimal
 
 from car_market.models import MarketAvailableCarModel
 from car_park.models import SellerCarParkModel
-from celery import shared_task
+from celery import chord, shared_task
+from celery.utils.log import get_task_logger
+from discount.discount_ladder import (DiscountLadder,
+                                      seller_discount_ladder_getter)
 from discount.models import RegularCustomerDiscountLevelsModel
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import QuerySet
 from user.models import AutoDealerModel, DealerFromSellerPurchaseNumber
 
 from .models import (DealerSearchCarSpecificationModel, DealerSuitableCarModel,
                      DealerSuitableSellerModel)
-from .serializers import (DealerSearchCarSpecificationEstFieldsSerializer,
-                          DealerSuitableCarModelsSerializer)
+from .vectorized_pricing import (DealsPricingMismatchError,
+                                 vectorized_best_deals_finder)
+
+
+logger = get_task_logger(__name__)
+
+SUITABLE_SELLERS_LOCK = 'find_suit_sellers_for_dealers_lock'
+
+SPEC_STR_PARAMS = ['transmission', 'body_type', 'engine_fuel_type', 'drive_unit', 'color']
+SPEC_BOOL_PARAMS = ["safe_controls", "parking_help", "climate_controls",
+                    "multimedia", "additional_safety", "other_additions"]
 
 
 def suit_cars_adder(dealer_id: int, spec_data: dict):
-    """Gets or creates dealer suitable car model instance for given dealer_id and adds
-    to it suitable car models based on given car specification data"""
-    suit_cars = DealerSuitableCarModel.objects.get_or_create(dealer_id=dealer_id)[0]
-    suit_cars.car_model.clear()
-    str_list = ['transmission', 'body_type', 'engine_fuel_type', 'drive_unit', 'color']
-    bool_params = ["safe_controls", "parking_help", "climate_controls",
-                   "multimedia", "additional_safety", "other_additions"]
+    """Gets or creates dealer suitable car model instance for given dealer_id and updates
+    its suitable car models based on given car specification data, only changed relations
+    are rewritten"""
     spec_actual_data = {}
     for key, value in spec_data.items():
-        if key in str_list:
+        if key in SPEC_STR_PARAMS:
             spec_actual_data[key] = value
-        if key in bool_params and value:
+        if key in SPEC_BOOL_PARAMS and value:
             spec_actual_data[key] = value
     cars = MarketAvailableCarModel. \
         objects.filter(engine_volume__gte=spec_data['engine_volume'],
                        year_of_production__gte=spec_data['min_year_of_production'],
                        **spec_actual_data)
-    cars = list(cars)
-    suit_cars.car_model.add(*cars)
+    suit_cars_relations_updater({dealer_id: set(cars.values_list('id', flat=True))})
+
+
+def car_matches_spec(car_data: dict, spec_data: dict) -> bool:
+    """Takes market car and dealer specification values and returns True if the car
+    satisfies specification numeric limits and every required (True) bool parameter"""
+    if car_data['engine_volume'] < spec_data['engine_volume']:
+        return False
+    if car_data['year_of_production'] < spec_data['min_year_of_production']:
+        return False
+    return all(car_data[param] for param in SPEC_BOOL_PARAMS if spec_data[param])
+
+
+def market_cars_index_creator() -> dict[tuple, list[dict]]:
+    """Loads all market available cars with one query and returns them grouped by
+    the values of specification string parameters, which must match exactly"""
+    cars_index: dict[tuple, list[dict]] = {}
+    cars = MarketAvailableCarModel.objects.values('id', 'engine_volume',
+                                                  'year_of_production',
+                                                  *SPEC_STR_PARAMS, *SPEC_BOOL_PARAMS)
+    for car in cars:
+        key = tuple(car[param] for param in SPEC_STR_PARAMS)
+        cars_index.setdefault(key, []).append(car)
+    return cars_index
+
+
+def dealers_suit_cars_collector(specs: list[dict],
+                                cars_index: dict[tuple, list[dict]]) -> dict[int, set[int]]:
+    """Takes list of dealer specifications values and indexed market cars, returns map
+    of dealer ids to the set of ids of cars suitable within dealer specification"""
+    dealers_suit_cars: dict[int, set[int]] = {}
+    for spec in specs:
+        key = tuple(spec[param] for param in SPEC_STR_PARAMS)
+        suit_cars = dealers_suit_cars.setdefault(spec['dealer_id'], set())
+        suit_cars.update(car['id'] for car in cars_index.get(key, [])
+                         if car_matches_spec(car, spec))
+    return dealers_suit_cars
+
+
+def m2m_relations_synchronizer(m2m_descriptor, relations: dict[int, set[int]],
+                               reverse: bool = False) -> tuple[int, int]:
+    """Takes many-to-many field descriptor and map of owner instance ids to the sets of
+    related instance ids they should have (owners are the related model instances if
+    reverse is True), inserts missing and deletes redundant rows of the field through
+    table only, returns numbers of created and deleted rows"""
+    through = m2m_descriptor.through
+    owner_field = f'{m2m_descriptor.field.m2m_field_name()}_id'
+    related_field = f'{m2m_descriptor.field.m2m_reverse_field_name()}_id'
+    if reverse:
+        owner_field, related_field = related_field, owner_field
+    existing_rows = through.objects.filter(**{f'{owner_field}__in': list(relations)}). \
+        values_list('id', owner_field, related_field)
+    existing_relations = set()
+    rows_to_delete = []
+    for row_id, owner_id, related_id in existing_rows:
+        if related_id in relations[owner_id]:
+            existing_relations.add((owner_id, related_id))
+        else:
+            rows_to_delete.append(row_id)
+    rows_to_create = [through(**{owner_field: owner_id, related_field: related_id})
+                      for owner_id, related_ids in relations.items()
+                      for related_id in related_ids
+                      if (owner_id, related_id) not in existing_relations]
+    if rows_to_delete:
+        through.objects.filter(id__in=rows_to_delete).delete()
+    through.objects.bulk_create(rows_to_create)
+    return len(rows_to_create), len(rows_to_delete)
+
+
+def dealers_suit_cars_ids_getter(dealer_ids: set[int]) -> dict[int, int]:
+    """Takes ids of dealers, creates missing dealer suitable car model instances and
+    returns map of dealer ids to ids of their dealer suitable car model instances"""
+    suit_cars_ids = dict(DealerSuitableCarModel.objects.
+                         filter(dealer_id__in=list(dealer_ids)).
+                         values_list('dealer_id', 'id'))
+    new_suit_cars = DealerSuitableCarModel.objects.bulk_create(
+        [DealerSuitableCarModel(dealer_id=dealer_id) for dealer_id in dealer_ids
+         if dealer_id not in suit_cars_ids])
+    suit_cars_ids.update({suit_cars.dealer_id: suit_cars.pk for suit_cars in new_suit_cars})
+    return suit_cars_ids
+
+
+def suit_cars_relations_updater(dealers_suit_cars: dict[int, set[int]]) -> tuple[int, int]:
+    """Takes map of dealer ids to their suitable car ids, creates missing dealer suitable
+    car model instances and updates their car models relations with changed rows only,
+    returns numbers of created and deleted relations"""
+    suit_cars_ids = dealers_suit_cars_ids_getter(set(dealers_suit_cars))
+    relations = {suit_cars_ids[dealer_id]: car_ids
+                 for dealer_id, car_ids in dealers_suit_cars.items()}
+    return m2m_relations_synchronizer(DealerSuitableCarModel.car_model, relations)
 
 
 @shared_task(name='find_dealers_suit_cars')
 def task_find_suit_cars_for_all_dealers():
-    """Celery script that checks all dealer specifications parameters,
-    finds suitable car models and adds suitable cars to corresponding model"""
-    for spec in DealerSearchCarSpecificationModel.objects.all():
-        dealer_id = spec.dealer.pk
-        spec_data = DealerSearchCarSpecificationEstFieldsSerializer(spec).data
-        suit_cars_adder(dealer_id, spec_data)
+    """Celery script that checks all dealer specifications parameters, finds suitable
+    car models for all dealers at once and updates corresponding model relations
+    which have changed since the previous run"""
+    specs = list(DealerSearchCarSpecificationModel.objects.
+                 values('dealer_id', 'engine_volume', 'min_year_of_production',
+                        *SPEC_STR_PARAMS, *SPEC_BOOL_PARAMS))
+    dealers_suit_cars = dealers_suit_cars_collector(specs, market_cars_index_creator())
+    suit_cars_relations_updater(dealers_suit_cars)
+
+
+def cars_suit_dealers_updater(car_ids: list[int]) -> tuple[int, int]:
+    """Takes ids of new or changed market cars, checks them against dealer specifications
+    only, which criteria could match those cars, and updates suitable cars relations of
+    matched dealers for those cars (dealers, which have no suitable cars yet, get them),
+    returns numbers of created and deleted relations"""
+    cars = list(MarketAvailableCarModel.objects.filter(id__in=car_ids).
+                values('id', 'engine_volume', 'year_of_production',
+                       *SPEC_STR_PARAMS, *SPEC_BOOL_PARAMS))
+    cars_dealers: dict[int, set[int]] = {car_id: set() for car_id in car_ids}
+    if cars:
+        specs_filter = {f'{param}__in': {car[param] for car in cars}
+                        for param in SPEC_STR_PARAMS}
+        specs = DealerSearchCarSpecificationModel.objects. \
+            filter(engine_volume__lte=max(car['engine_volume'] for car in cars),
+                   min_year_of_production__lte=max(car['year_of_production'] for car in cars),
+                   **specs_filter). \
+            values('dealer_id', 'engine_volume', 'min_year_of_production',
+                   *SPEC_STR_PARAMS, *SPEC_BOOL_PARAMS)
+        for spec in specs:
+            for car in cars:
+                if all(car[param] == spec[param] for param in SPEC_STR_PARAMS) \
+                        and car_matches_spec(car, spec):
+                    cars_dealers[car['id']].add(spec['dealer_id'])
+    suit_cars_ids = dealers_suit_cars_ids_getter(set().union(*cars_dealers.values()))
+    cars_relations = {car_id: {suit_cars_ids[dealer_id] for dealer_id in dealer_ids}
+                      for car_id, dealer_ids in cars_dealers.items()}
+    return m2m_relations_synchronizer(DealerSuitableCarModel.car_model,
+                                      cars_relations,
+                                      reverse=True)
+
+
+@shared_task(name='match_cars_with_dealers')
+def task_match_cars_with_dealers(car_ids: list[int]):
+    """Celery script that takes ids of new or changed market cars (e.g. after catalog
+    import) and adds them to or removes them from suitable cars of matched dealers"""
+    cars_suit_dealers_updater(car_ids)
 
 
 @shared_task(name='find_suit_cars_for_dealer')
@@ -59,104 +198,211 @@ def purchase_map_creator(discount_map: dict, current_purchase_number: int) -> di
     """Takes seller discount map and number of dealer purchases (from this seller) and
     returns map with discount levels and future number of purchases to make within
     each level"""
-    sorted_discounts_list = sorted([int(purchase_number) for
-                                    purchase_number in discount_map.keys()],
-                                   reverse=True)
-    purchase_map = {}
-    purchases = 100
-    for purchase_number in sorted_discounts_list:
-        if current_purchase_number < purchase_number \
-                < current_purchase_number + 100:
-            index = sorted_discounts_list.index(purchase_number)
-            if index < (len(sorted_discounts_list) - 1):
-                diff = purchase_number - sorted_discounts_list[index + 1]
-                purchase_map[sorted_discounts_list[index + 1]] = diff
-                purchases = purchases - diff
-            else:
-                purchase_map[0] = purchase_number
-                purchases = purchases - purchase_number
-    if purchases > 0:
-        purchase_map[sorted_discounts_list[0]] = purchases
-    return purchase_map
+    return DiscountLadder.from_discount_map(discount_map).purchase_map(current_purchase_number)
 
 
 def deal_sum_calculator(discount_map: dict, current_purchase_number: int,
                         car_price: Decimal) -> Decimal:
     """Takes seller discount map and number of dealer purchases (from this seller) and
     price of the estimating car and returns value of the potential car purchase deal"""
-    purchase_map = purchase_map_creator(discount_map, current_purchase_number)
-    deal_sum = Decimal()
-    for level, value in purchase_map.items():
-        if str(level) in list(discount_map.keys()):
-            deal_sum = \
-                deal_sum + Decimal(car_price) * \
-                (100 - discount_map[str(level)]) / 100 * value
-        else:
-            deal_sum = \
-                deal_sum + Decimal(car_price) * value
-    return deal_sum
+    return DiscountLadder.from_discount_map(discount_map).deal_sum(current_purchase_number,
+                                                                   car_price)
+
+
+def deal_pricing_data_collector(dealer_ids: list[int],
+                                car_ids: set[int]) -> dict[str, dict]:
+    """Takes ids of dealers and cars to be evaluated and loads with three queries all
+    seller car parks selling those cars, seller discount ladders and dealer from seller
+    purchase numbers, returns them keyed for deals pricing without further db access"""
+    parks: dict[int, list[SellerCarParkModel]] = {}
+    car_parks = SellerCarParkModel.objects.filter(car_model__in=car_ids). \
+        select_related('seller', 'car_model').order_by('id')
+    for park in car_parks:
+        parks.setdefault(park.car_model_id, []).append(park)
+    seller_ids = {park.seller_id for car_parks_list in parks.values()
+                  for park in car_parks_list}
+    discount_ladders = {seller_id: seller_discount_ladder_getter(seller_id, updated_at,
+                                                                 discount_map)
+                        for seller_id, updated_at, discount_map in
+                        RegularCustomerDiscountLevelsModel.objects.
+                        filter(seller_id__in=seller_ids).
+                        values_list('seller_id', 'updated_at',
+                                    'purchase_number_discount_map')}
+    purchase_numbers = {(dealer_id, seller_id): int(purchase_number)
+                        for dealer_id, seller_id, purchase_number in
+                        DealerFromSellerPurchaseNumber.objects.
+                        filter(dealer_id__in=dealer_ids, seller_id__in=seller_ids).
+                        values_list('dealer_id', 'seller_id', 'purchase_number')}
+    return {'parks': parks,
+            'discount_ladders': discount_ladders,
+            'purchase_numbers': purchase_numbers}
 
 
-def deals_collector(suitable_cars_list: list[MarketAvailableCarModel],
-                    dealer: AutoDealerModel) -> list[dict]:
-    """Takes list of suitable for dealer cars and dealer model itself and returns
-    list of possible car purchase deals for passed in dealer"""
+def deals_collector(suitable_cars_list: list[int],
+                    dealer: AutoDealerModel,
+                    pricing_data: dict[str, dict] | None = None) -> list[dict]:
+    """Takes list of suitable for dealer car ids, dealer model itself and optionally
+    pricing data preloaded for the whole run, returns list of possible car purchase
+    deals for passed in dealer"""
+    if pricing_data is None:
+        pricing_data = deal_pricing_data_collector([dealer.pk], set(suitable_cars_list))
     deals = []
-    for car in suitable_cars_list:
-        for park in SellerCarParkModel.objects.filter(car_model=car):
-            discount_levels = None
-            # pylint: disable=no-member
-            with suppress(RegularCustomerDiscountLevelsModel.DoesNotExist):
-                discount_levels = RegularCustomerDiscountLevelsModel. \
-                    objects.get(seller=park.seller)
-            if discount_levels:
-                discount_map = discount_levels.purchase_number_discount_map
-                current_purchase_number = 0
-                # pylint: disable=no-member
-                with suppress(DealerFromSellerPurchaseNumber.DoesNotExist):
-                    current_purchase_number = \
-                        int(DealerFromSellerPurchaseNumber.
-                            objects.get(seller=park.seller,
-                                        dealer=dealer).purchase_number)
-                deal_sum = deal_sum_calculator(discount_map,
-                                               current_purchase_number,
-                                               park.car_price)
-                deals.append({'seller': park.seller,
-                              'deal_sum': deal_sum,
-                              'car_model': park.car_model})
+    for car_id in suitable_cars_list:
+        for park in pricing_data['parks'].get(car_id, []):
+            discount_ladder = pricing_data['discount_ladders'].get(park.seller_id)
+            if discount_ladder is not None:
+                current_purchase_number = \
+                    pricing_data['purchase_numbers'].get((dealer.pk, park.seller_id), 0)
+                deal_sum = discount_ladder.deal_sum(current_purchase_number, park.car_price)
             else:
                 deal_sum = Decimal(park.car_price) * 100
-                deals.append({'seller': park.seller,
-                              'deal_sum': deal_sum,
-                              'car_model': park.car_model})
+            deals.append({'seller': park.seller,
+                          'deal_sum': deal_sum,
+                          'car_model': park.car_model})
     return deals
 
 
-def suitable_seller_with_suitable_cars_adder(deals: list[dict],
-                                             suit_seller: DealerSuitableSellerModel):
-    """Takes list of possible deals and suitable for dealer sellers/cars model,
-    finds and adds best suitable sellers and cars to corresponding model"""
+def best_deals_finder(deals: list[dict]) -> list[dict]:
+    """Takes list of possible deals and returns deals with minimal deal sum"""
     best_deal_sum = min(deal['deal_sum'] for deal in deals)
-    suit_sellers_list = []
-    deal_car_models = []
-    for deal in deals:
-        if deal['deal_sum'] == best_deal_sum:
-            suit_sellers_list.append(deal['seller'])
-            deal_car_models.append(deal['car_model'])
-    suit_seller.suitable_seller.add(*suit_sellers_list)
-    suit_seller.deal_car_models.add(*deal_car_models)
+    return [deal for deal in deals if deal['deal_sum'] == best_deal_sum]
+
+
+def suit_sellers_relations_updater(dealers_best_deals: dict[int, list[dict]]) \
+        -> dict[str, tuple[int, int]]:
+    """Takes map of dealer ids to their best deals, creates missing dealer suitable sellers
+    model instances and updates their suitable sellers and deal car models relations with
+    changed rows only, returns numbers of created and deleted rows of each relation"""
+    suit_sellers_ids = dict(DealerSuitableSellerModel.objects.
+                            filter(dealer_id__in=list(dealers_best_deals)).
+                            values_list('dealer_id', 'id'))
+    new_suit_sellers = DealerSuitableSellerModel.objects.bulk_create(
+        [DealerSuitableSellerModel(dealer_id=dealer_id) for dealer_id in dealers_best_deals
+         if dealer_id not in suit_sellers_ids])
+    suit_sellers_ids.update({suit_seller.dealer_id: suit_seller.pk
+                             for suit_seller in new_suit_sellers})
+    sellers_relations = {suit_sellers_ids[dealer_id]: {deal['seller'].pk for deal in deals}
+                         for dealer_id, deals in dealers_best_deals.items()}
+    cars_relations = {suit_sellers_ids[dealer_id]: {deal['car_model'].pk for deal in deals}
+                      for dealer_id, deals in dealers_best_deals.items()}
+    return {'suitable_seller': m2m_relations_synchronizer(DealerSuitableSellerModel.
+                                                          suitable_seller,
+                                                          sellers_relations),
+            'deal_car_models': m2m_relations_synchronizer(DealerSuitableSellerModel.
+                                                          deal_car_models,
+                                                          cars_relations)}
+
+
+def vectorized_best_deals_verifier(dealers_cars: dict[AutoDealerModel, list[int]],
+                                   pricing_data: dict[str, dict],
+                                   vectorized_best_deals: dict[int, list[dict]]):
+    """Takes map of dealers to their suitable car ids, pricing data and best deals found
+    by vectorized pricing, prices the same deals with python Decimal arithmetic and raises
+    DealsPricingMismatchError if any dealer best deals are not exactly the same"""
+    for dealer, cars_list in dealers_cars.items():
+        deals = deals_collector(cars_list, dealer, pricing_data)
+        python_best_deals = best_deals_finder(deals) if deals else []
+        expected = sorted((deal['seller'].pk, deal['car_model'].pk, deal['deal_sum'])
+                          for deal in python_best_deals)
+        actual = sorted((deal['seller'].pk, deal['car_model'].pk, deal['deal_sum'])
+                        for deal in vectorized_best_deals.get(dealer.pk, []))
+        if expected != actual:
+            raise DealsPricingMismatchError(f'Vectorized best deals of dealer {dealer.pk} '
+                                            f'{actual} differ from expected {expected}')
+
+
+def suitable_sellers_updater(all_suitable_cars: QuerySet[DealerSuitableCarModel]) -> int:
+    """Takes dealer suitable cars models, updates suitable (which makes the best possible
+    deals) for dealers sellers/cars of corresponding models, pricing data is loaded once for all
+    dealers and deals are priced by python or (for large runs) vectorized numpy backend,
+    returns number of processed dealers"""
+    all_suitable_cars = all_suitable_cars.select_related('dealer').prefetch_related('car_model')
+    dealers_cars = {suitable_cars.dealer: [car.pk for car in suitable_cars.car_model.all()]
+                    for suitable_cars in all_suitable_cars}
+    pricing_data = deal_pricing_data_collector([dealer.pk for dealer in dealers_cars],
+                                               {car_id for cars_list in dealers_cars.values()
+                                                for car_id in cars_list})
+    vectorized_best_deals = None
+    if settings.DEALS_PRICING_BACKEND == 'numpy':
+        vectorized_best_deals = vectorized_best_deals_finder(dealers_cars, pricing_data)
+        if settings.DEALS_PRICING_VERIFICATION:
+            vectorized_best_deals_verifier(dealers_cars, pricing_data, vectorized_best_deals)
+    dealers_best_deals = {}
+    for dealer, cars_list in dealers_cars.items():
+        if vectorized_best_deals is None:
+            deals = deals_collector(cars_list, dealer, pricing_data)
+            dealers_best_deals[dealer.pk] = best_deals_finder(deals) if deals else []
+        else:
+            dealers_best_deals[dealer.pk] = vectorized_best_deals.get(dealer.pk, [])
+    suit_sellers_relations_updater(dealers_best_deals)
+    return len(dealers_cars)
+
+
+def dealers_shards_creator(shard_size: int) -> list[tuple[int, int]]:
+    """Splits ids of dealers having suitable cars into ranges of given number of dealers,
+    returns list of first and last dealer ids of each range"""
+    dealer_ids = list(DealerSuitableCarModel.objects.order_by('dealer_id').
+                      values_list('dealer_id', flat=True))
+    return [(dealer_ids[index], dealer_ids[min(index + shard_size, len(dealer_ids)) - 1])
+            for index in range(0, len(dealer_ids), shard_size)]
+
+
+@shared_task(name='find_suit_sellers_for_dealers_shard')
+def task_find_suitable_sellers_for_shard(first_dealer_id: int, last_dealer_id: int) -> dict:
+    """Celery script that finds suitable sellers/cars for dealers within given dealer
+    ids range and returns shard timing data"""
+    start = time.monotonic()
+    dealers_number = suitable_sellers_updater(DealerSuitableCarModel.objects.
+                                              filter(dealer_id__gte=first_dealer_id,
+                                                     dealer_id__lte=last_dealer_id))
+    return {'first_dealer_id': first_dealer_id,
+            'last_dealer_id': last_dealer_id,
+            'dealers_number': dealers_number,
+            'duration': round(time.monotonic() - start, 3)}
+
+
+@shared_task(name='release_suit_sellers_search_lock')
+def task_release_suitable_sellers_lock(*args):
+    """Celery script that releases suitable sellers search lock (e.g. after failed run)"""
+    cache.delete(SUITABLE_SELLERS_LOCK)
+
+
+@shared_task(name='summarize_suit_sellers_shards')
+def task_suitable_sellers_shards_summary(shards_timings: list[dict]) -> dict:
+    """Celery script that logs and returns timing summary of suitable sellers search
+    shards and releases suitable sellers search lock"""
+    cache.delete(SUITABLE_SELLERS_LOCK)
+    for shard in shards_timings:
+        logger.info('Suitable sellers shard of dealers %s-%s (%s dealers) took %ss',
+                    shard['first_dealer_id'], shard['last_dealer_id'],
+                    shard['dealers_number'], shard['duration'])
+    durations = [shard['duration'] for shard in shards_timings]
+    summary = {'shards_number': len(shards_timings),
+               'dealers_number': sum(shard['dealers_number'] for shard in shards_timings),
+               'total_duration': round(sum(durations), 3),
+               'max_shard_duration': max(durations, default=0)}
+    logger.info('Suitable sellers search summary: %s', summary)
+    return summary
 
 
 @shared_task(name='find_suit_sellers_for_dealers')
-def task_find_suitable_sellers():
+def task_find_suitable_sellers() -> dict | None:
     """Celery script that checks all suitable within dealer car specification parameters
     cars and adds suitable (which makes the best possible deals) for dealer
-    sellers/cars to corresponding model"""
-    for suitable_cars in DealerSuitableCarModel.objects.all():
-        dealer = suitable_cars.dealer
-        cars_list = DealerSuitableCarModelsSerializer(suitable_cars).data['car_model']
-        suit_seller = DealerSuitableSellerModel.objects.get_or_create(dealer=dealer)[0]
-        suit_seller.suitable_seller.clear()
-        deals = deals_collector(cars_list, dealer)
-        if deals:
-            suitable_seller_with_suitable_cars_adder(deals, suit_seller)
+    sellers/cars to corresponding model, dealers are split into shards processed in
+    parallel by chord of shard tasks, the run is skipped if the previous one is not
+    finished yet"""
+    if not cache.add(SUITABLE_SELLERS_LOCK, True, settings.SUITABLE_SELLERS_LOCK_TIMEOUT):
+        logger.warning('Previous suitable sellers search is still running, skipped')
+        return None
+    shards = dealers_shards_creator(settings.SUITABLE_SELLERS_SHARD_SIZE)
+    if len(shards) > 1:
+        summary = task_suitable_sellers_shards_summary.s(). \
+            on_error(task_release_suitable_sellers_lock.si())
+        chord(task_find_suitable_sellers_for_shard.s(*shard) for shard in shards)(summary)
+        return None
+    try:
+        return task_suitable_sellers_shards_summary([task_find_suitable_sellers_for_shard(*shard)
+                                                     for shard in shards])
+    finally:
+        cache.delete(SUITABLE_SELLERS_LOCK)
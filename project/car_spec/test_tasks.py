@@ -1,14 +1,23 @@
 # pylint: skip-file
 
 import pytest
+from car_market.models import MarketAvailableCarModel
+from car_park.models import SellerCarParkModel
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from user.models import AutoDealerModel, DealerFromSellerPurchaseNumber
 
 from .models import (DealerSearchCarSpecificationModel, DealerSuitableCarModel,
                      DealerSuitableSellerModel)
 from .serializers import (DealerSearchCarSpecificationsSerializer,
                           DealerSuitableCarModelsSerializer,
                           DealerSuitableSellerSerializer)
-from .tasks import (task_find_suit_cars_for_all_dealers,
-                    task_find_suit_cars_for_dealer, task_find_suitable_sellers)
+from .tasks import (SUITABLE_SELLERS_LOCK, deal_pricing_data_collector,
+                    deals_collector,
+                    task_find_suit_cars_for_all_dealers,
+                    task_find_suit_cars_for_dealer, task_find_suitable_sellers,
+                    task_match_cars_with_dealers)
 
 pytestmark = pytest.mark.django_db(transaction=True)
 
@@ -16,8 +25,7 @@ pytestmark = pytest.mark.django_db(transaction=True)
 def test_task_all_dealers_suitable_cars_search(celery_app,
                                                celery_worker,
                                                control_case_suit_cars_for_dealer):
-    suit_cars = DealerSuitableCarModel.objects.all()
-    assert not bool(suit_cars)
+    DealerSuitableCarModel.objects.all().delete()
     task_find_suit_cars_for_all_dealers.delay()
     suit_cars = DealerSuitableCarModel.objects.all()
     assert bool(suit_cars)
@@ -35,13 +43,31 @@ def test_task_all_dealers_suitable_cars_search(celery_app,
     assert not cars
 
 
+def test_task_all_dealers_suitable_cars_search_rewrites_changed_relations_only(
+        control_case_suit_cars_for_dealer,
+        celery_app,
+        celery_worker):
+    dealer_id = control_case_suit_cars_for_dealer['first_case']['dealer_id']
+    predefined_suit_car_id = control_case_suit_cars_for_dealer['first_case']['car_id']
+    unsuit_car_id = control_case_suit_cars_for_dealer['unsuit_cars_id'][0]
+    through = DealerSuitableCarModel.car_model.through
+    task_find_suit_cars_for_all_dealers.delay()
+    suit_cars = DealerSuitableCarModel.objects.get(dealer_id=dealer_id)
+    suit_car_row = through.objects.get(dealersuitablecarmodel=suit_cars,
+                                       marketavailablecarmodel_id=predefined_suit_car_id)
+    suit_cars.car_model.add(unsuit_car_id)
+    task_find_suit_cars_for_all_dealers.delay()
+    rows = through.objects.filter(dealersuitablecarmodel=suit_cars)
+    assert unsuit_car_id not in [row.marketavailablecarmodel_id for row in rows]
+    assert suit_car_row in rows
+
+
 def test_task_dealer_suitable_cars_search(control_case_suit_cars_for_dealer,
                                           celery_app,
                                           celery_worker,
                                           client):
     dealer_id = control_case_suit_cars_for_dealer['first_case']['dealer_id']
-    suit_cars = DealerSuitableCarModel.objects.get_or_none(dealer_id=dealer_id)
-    assert not bool(suit_cars)
+    DealerSuitableCarModel.objects.filter(dealer_id=dealer_id).delete()
     spec = DealerSearchCarSpecificationModel.objects.get(dealer_id=dealer_id)
     spec_data = DealerSearchCarSpecificationsSerializer(spec).data
     task_find_suit_cars_for_dealer.delay(spec_data)
@@ -54,6 +80,43 @@ def test_task_dealer_suitable_cars_search(control_case_suit_cars_for_dealer,
         assert car not in cars
 
 
+def test_changed_car_is_matched_with_dealers_incrementally(control_case_suit_cars_for_dealer,
+                                                         celery_app,
+                                                         celery_worker):
+    task_find_suit_cars_for_all_dealers.delay()
+    dealer_id = control_case_suit_cars_for_dealer['first_case']['dealer_id']
+    suit_car_id = control_case_suit_cars_for_dealer['first_case']['car_id']
+    suit_cars = DealerSuitableCarModel.objects.get(dealer_id=dealer_id)
+    new_car = MarketAvailableCarModel.objects.get(id=suit_car_id)
+    new_car.pk = None
+    new_car.save()
+    assert new_car in suit_cars.car_model.all()
+    new_car.engine_volume = 1.2
+    new_car.save()
+    assert new_car not in suit_cars.car_model.all()
+    MarketAvailableCarModel.objects.filter(id=new_car.pk).update(engine_volume=2.0)
+    task_match_cars_with_dealers.delay([new_car.pk])
+    assert new_car in suit_cars.car_model.all()
+    other_dealer_id = control_case_suit_cars_for_dealer['second_case']['dealer_id']
+    other_suit_cars = DealerSuitableCarModel.objects.get(dealer_id=other_dealer_id)
+    assert new_car not in other_suit_cars.car_model.all()
+
+
+def test_changed_car_is_matched_with_dealers_without_suitable_cars(
+        control_case_suit_cars_for_dealer):
+    dealer_id = control_case_suit_cars_for_dealer['first_case']['dealer_id']
+    DealerSuitableCarModel.objects.filter(dealer_id=dealer_id).delete()
+    new_car = MarketAvailableCarModel.objects.\
+        get(id=control_case_suit_cars_for_dealer['first_case']['car_id'])
+    new_car.pk = None
+    with CaptureQueriesContext(connection) as queries:
+        new_car.save()
+    assert new_car in DealerSuitableCarModel.objects.get(dealer_id=dealer_id).car_model.all()
+    assert all('WHERE' in query['sql'] for query in queries
+               if query['sql'].startswith('SELECT') and
+               DealerSuitableCarModel._meta.db_table in query['sql'])
+
+
 def test_task_find_suitable_sellers_for_dealers(control_case_suit_seller,
                                                 celery_app,
                                                 celery_worker):
@@ -72,3 +135,96 @@ def test_task_find_suitable_sellers_for_dealers(control_case_suit_seller,
     assert car_model_id in control_case_data["deal_car_models"]
     for seller in control_case_suit_seller['unsuit_sellers']:
         assert seller not in control_case_data["suitable_seller"]
+
+
+def test_task_find_suitable_sellers_runs_dealer_shards(control_case_suit_seller,
+                                                       celery_app,
+                                                       celery_worker,
+                                                       settings):
+    settings.SUITABLE_SELLERS_SHARD_SIZE = 1
+    task_find_suit_cars_for_all_dealers()
+    cache.add(SUITABLE_SELLERS_LOCK, True)
+    task_find_suitable_sellers.delay()
+    assert not DealerSuitableSellerModel.objects.all()
+    cache.delete(SUITABLE_SELLERS_LOCK)
+    task_find_suitable_sellers.delay()
+    assert DealerSuitableSellerModel.objects.count() == 3
+    assert cache.add(SUITABLE_SELLERS_LOCK, True)
+    cache.delete(SUITABLE_SELLERS_LOCK)
+    control_case = DealerSuitableSellerModel.objects. \
+        get(dealer_id=control_case_suit_seller['dealer_id'])
+    control_case_data = DealerSuitableSellerSerializer(control_case).data
+    assert control_case_data["suitable_seller"] == [control_case_suit_seller['seller'].pk]
+
+
+def test_task_find_suitable_sellers_with_verified_numpy_pricing(control_case_suit_seller,
+                                                                celery_app,
+                                                                celery_worker,
+                                                                settings):
+    pytest.importorskip('numpy')
+    settings.DEALS_PRICING_BACKEND = 'numpy'
+    settings.DEALS_PRICING_VERIFICATION = True
+    seller = control_case_suit_seller['seller']
+    dealer_id = control_case_suit_seller['dealer_id']
+    DealerFromSellerPurchaseNumber.objects.create(seller=seller, dealer_id=dealer_id,
+                                                  purchase_number=3)
+    task_find_suit_cars_for_all_dealers()
+    task_find_suitable_sellers.delay()
+    control_case = DealerSuitableSellerModel.objects.get(dealer_id=dealer_id)
+    control_case_data = DealerSuitableSellerSerializer(control_case).data
+    assert control_case_data["suitable_seller"] == [seller.pk]
+    assert control_case_data["deal_car_models"] == [control_case_suit_seller['car_model'].pk]
+
+
+def test_deals_are_priced_from_preloaded_data(control_case_suit_seller,
+                                              django_assert_num_queries):
+    dealer = AutoDealerModel.objects.get(id=control_case_suit_seller['dealer_id'])
+    cars_list = [control_case_suit_seller['car_model'].pk]
+    pricing_data = deal_pricing_data_collector([dealer.pk], set(cars_list))
+    with django_assert_num_queries(0):
+        deals = deals_collector(cars_list, dealer, pricing_data)
+    deal_sums = {deal['seller'].pk: deal['deal_sum'] for deal in deals}
+    assert deal_sums[control_case_suit_seller['seller'].pk] == 88550
+    assert deal_sums[control_case_suit_seller['unsuit_sellers'][0]] == 100000
+    assert deals == deals_collector(cars_list, dealer)
+
+
+def test_task_find_suitable_sellers_query_count_does_not_grow_with_parks(
+        control_case_suit_seller,
+        celery_app,
+        celery_worker):
+    task_find_suit_cars_for_all_dealers()
+    task_find_suitable_sellers()
+    with CaptureQueriesContext(connection) as queries_before:
+        task_find_suitable_sellers()
+    for seller_id in control_case_suit_seller['unsuit_sellers']:
+        SellerCarParkModel.objects.bulk_create(
+            [SellerCarParkModel(car_model=control_case_suit_seller['car_model'],
+                                seller_id=seller_id,
+                                available_number=10,
+                                car_price=5000 + price) for price in range(20)])
+    with CaptureQueriesContext(connection) as queries_after:
+        task_find_suitable_sellers()
+    assert len(queries_after) == len(queries_before)
+
+
+def test_task_find_suitable_sellers_rewrites_changed_relations_only(control_case_suit_seller,
+                                                                    celery_app,
+                                                                    celery_worker):
+    task_find_suit_cars_for_all_dealers()
+    task_find_suitable_sellers()
+    with CaptureQueriesContext(connection) as queries:
+        task_find_suitable_sellers()
+    assert not [query for query in queries.captured_queries
+                if query['sql'].split()[0] in ('INSERT', 'UPDATE', 'DELETE')]
+    dealer_id = control_case_suit_seller['dealer_id']
+    cheaper_seller_id = control_case_suit_seller['unsuit_sellers'][0]
+    other_car = MarketAvailableCarModel.objects.get(car_model_name='Case_1', parking_help=False)
+    DealerSuitableCarModel.objects.get(dealer_id=dealer_id).car_model.add(other_car)
+    SellerCarParkModel.objects.create(car_model=other_car, seller_id=cheaper_seller_id,
+                                      available_number=10, car_price=10)
+    task_find_suitable_sellers()
+    control_case = DealerSuitableSellerModel.objects.get(dealer_id=dealer_id)
+    control_case_data = DealerSuitableSellerSerializer(control_case).data
+    assert control_case_data["suitable_seller"] == [cheaper_seller_id]
+    assert control_case_data["deal_car_models"] == [other_car.pk]
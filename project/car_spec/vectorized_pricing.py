@@ -0,0 +1,93 @@
+"""This module contains optional NumPy backend, which prices all dealer and seller car park
+candidate deals and finds best deals of each dealer in one vectorized pass"""
+
+from decimal import Decimal
+
+from discount.discount_ladder import DEAL_CARS_NUMBER, DiscountLadder
+from django.core.exceptions import ImproperlyConfigured
+from user.models import AutoDealerModel
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+NO_DISCOUNT_LADDER = DiscountLadder.from_discount_map({})
+
+
+class DealsPricingMismatchError(Exception):
+    """Raised when vectorized deals pricing differs from python deals pricing"""
+
+
+def ladders_arrays_creator(ladders: list[DiscountLadder]) -> tuple:
+    """Takes list of discount ladders and returns arrays of their thresholds (padded with
+    values unreachable by purchase numbers), cumulative rates and highest levels rates"""
+    levels_number = max(len(ladder.thresholds) for ladder in ladders)
+    unreachable_threshold = np.iinfo(np.int64).max // 4
+    thresholds = np.full((len(ladders), max(levels_number, 1)), unreachable_threshold,
+                         dtype=np.int64)
+    cumulative_rates = np.zeros((len(ladders), levels_number + 1), dtype=np.int64)
+    top_rates = np.empty(len(ladders), dtype=np.int64)
+    for index, ladder in enumerate(ladders):
+        ladder_levels_number = len(ladder.thresholds)
+        thresholds[index, :ladder_levels_number] = ladder.thresholds
+        cumulative_rates[index, :ladder_levels_number + 1] = ladder.cumulative_rates
+        cumulative_rates[index, ladder_levels_number + 1:] = ladder.cumulative_rates[-1]
+        top_rates[index] = ladder.rates[-1] if ladder.rates else 100
+    return thresholds, cumulative_rates, top_rates
+
+
+def vectorized_best_deals_finder(dealers_cars: dict[AutoDealerModel, list[int]],
+                                 pricing_data: dict[str, dict]) -> dict[int, list[dict]]:
+    """Takes map of dealers to their suitable car ids and pricing data preloaded for the run,
+    prices all candidate deals at once with exact integer arithmetic (in ten-thousandths of
+    currency) and returns map of dealer ids to their best (minimal deal sum) deals"""
+    if np is None:
+        raise ImproperlyConfigured('NumPy must be installed to use numpy deals pricing')
+    ladders = [NO_DISCOUNT_LADDER]
+    ladders_indexes = {}
+    for seller_id, ladder in pricing_data['discount_ladders'].items():
+        ladders_indexes[seller_id] = len(ladders)
+        ladders.append(ladder)
+    dealers = list(dealers_cars)
+    candidates = [(dealer_index, park) for dealer_index, dealer in enumerate(dealers)
+                  for car_id in dealers_cars[dealer]
+                  for park in pricing_data['parks'].get(car_id, [])]
+    if not candidates:
+        return {}
+    dealer_indexes = np.fromiter((dealer_index for dealer_index, _ in candidates),
+                                 dtype=np.int64, count=len(candidates))
+    seller_ladders = np.fromiter((ladders_indexes.get(park.seller_id, 0)
+                                  for _, park in candidates),
+                                 dtype=np.int64, count=len(candidates))
+    purchase_numbers = np.fromiter((pricing_data['purchase_numbers'].
+                                    get((dealers[dealer_index].pk, park.seller_id), 0)
+                                    for dealer_index, park in candidates),
+                                   dtype=np.int64, count=len(candidates))
+    prices = np.fromiter((int(Decimal(park.car_price) * 100) for _, park in candidates),
+                         dtype=np.int64, count=len(candidates))
+    thresholds, cumulative_rates, top_rates = ladders_arrays_creator(ladders)
+    candidates_thresholds = thresholds[seller_ladders]
+    lower = (candidates_thresholds <= purchase_numbers[:, None]).sum(axis=1)
+    upper = (candidates_thresholds <
+             (purchase_numbers + DEAL_CARS_NUMBER)[:, None]).sum(axis=1)
+    rows = np.arange(len(candidates))
+    upper_threshold = candidates_thresholds[rows, np.maximum(upper - 1, 0)]
+    base_threshold = np.where(lower > 0, candidates_thresholds[rows, np.maximum(lower - 1, 0)],
+                              0)
+    rest_purchases = np.where(upper == lower, DEAL_CARS_NUMBER,
+                              DEAL_CARS_NUMBER - (upper_threshold - base_threshold))
+    deal_rates = cumulative_rates[seller_ladders, upper] - \
+        cumulative_rates[seller_ladders, lower] + \
+        np.where(rest_purchases > 0, rest_purchases * top_rates[seller_ladders], 0)
+    deal_sums = prices * deal_rates
+    best_deal_sums = np.full(len(dealers), np.iinfo(np.int64).max, dtype=np.int64)
+    np.minimum.at(best_deal_sums, dealer_indexes, deal_sums)
+    best_deals: dict[int, list[dict]] = {}
+    for index in np.flatnonzero(deal_sums == best_deal_sums[dealer_indexes]):
+        dealer_index, park = candidates[index]
+        best_deals.setdefault(dealers[dealer_index].pk, []). \
+            append({'seller': park.seller,
+                    'deal_sum': Decimal(int(deal_sums[index])).scaleb(-4),
+                    'car_model': park.car_model})
+    return best_deals
@@ -4,9 +4,10 @@ from django.shortcuts import get_object_or_404
 from rest_framework import generics
 from rest_framework.mixins import CreateModelMixin, ListModelMixin
 from rest_framework.response import Response
-from root.celery import app as celery_app
 from root.common.permissions import (CurrentDealerHasNoSpec, IsDealer,
                                      IsOwnerOrAdmin, IsSeller, IsVerified)
+from root.common.profiles import request_profile_getter
+from root.common.task_dispatch import task_on_commit_dispatcher
 from root.common.views import (BaseOwnModelReadView, BaseOwnModelRUDView,
                                BaseReadOnlyView, CustomRequest)
 from user.models import AutoDealerModel
@@ -34,11 +35,11 @@ class DealerSearchCarSpecificationCreateView(CreateModelMixin,
     serializer_class = DealerSearchCarSpecificationsSerializer
 
     def perform_create(self, serializer) -> None:
-        user = self.request.user
-        spec = serializer.save(dealer=AutoDealerModel.objects.get(user=user))
-        if celery_app.control.inspect().active():
-            spec_data = DealerSearchCarSpecificationsSerializer(spec).data
-            task_find_suit_cars_for_dealer.apply_async([spec_data], countdown=5)
+        dealer = request_profile_getter(self.request, AutoDealerModel) or \
+            AutoDealerModel.objects.get(user=self.request.user)
+        spec = serializer.save(dealer=dealer)
+        spec_data = DealerSearchCarSpecificationsSerializer(spec).data
+        task_on_commit_dispatcher(task_find_suit_cars_for_dealer, [spec_data], countdown=5)
 
     def post(self, request: CustomRequest, *args, **kwargs):
         return self.create(request, *args, **kwargs)
@@ -58,9 +59,8 @@ class DealerSearchCarSpecificationRUDView(BaseOwnModelRUDView):
                                              instance=obj)
         serialized_new_obj.is_valid(raise_exception=True)
         spec = serialized_new_obj.save()
-        if celery_app.control.inspect().active():
-            spec_data = self.serializer(spec).data
-            task_find_suit_cars_for_dealer.apply_async([spec_data], countdown=5)
+        spec_data = self.serializer(spec).data
+        task_on_commit_dispatcher(task_find_suit_cars_for_dealer, [spec_data], countdown=5)
         return Response(serialized_new_obj.data)
 
 
@@ -0,0 +1,103 @@
+"""This module contains compiled seller discount ladder used for car purchase deals pricing
+and per seller cache of compiled ladders"""
+
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal
+
+DEAL_CARS_NUMBER = 100
+
+
+@dataclass(frozen=True)
+class DiscountLadder:
+    """Immutable seller discount map, compiled once for pricing of many deals: sorted
+    integer purchase number thresholds, price rates (100 - discount, in percents) of
+    discount levels and cumulative rates of purchases made within levels bounds"""
+    thresholds: tuple[int, ...]
+    rates: tuple[int, ...]
+    zero_level_rate: int
+    cumulative_rates: tuple[int, ...]
+
+    @classmethod
+    def from_discount_map(cls, discount_map: dict) -> 'DiscountLadder':
+        """Takes seller purchase number discount map (as it is stored in json field)
+        and returns compiled discount ladder"""
+        discounts = {int(level): discount for level, discount in discount_map.items()
+                     if level == str(int(level))}
+        thresholds = tuple(sorted({int(level) for level in discount_map}))
+        rates = tuple(100 - discounts.get(threshold, 0) for threshold in thresholds)
+        zero_level_rate = 100 - discounts.get(0, 0)
+        cumulative_rates = [0]
+        for index, threshold in enumerate(thresholds):
+            if index:
+                level_rate = (threshold - thresholds[index - 1]) * rates[index - 1]
+            else:
+                level_rate = threshold * zero_level_rate
+            cumulative_rates.append(cumulative_rates[-1] + level_rate)
+        return cls(thresholds, rates, zero_level_rate, tuple(cumulative_rates))
+
+    def deal_levels_bounds(self, current_purchase_number: int) -> tuple[int, int]:
+        """Returns bounds of thresholds indexes, which are passed during the deal"""
+        return (bisect_right(self.thresholds, current_purchase_number),
+                bisect_left(self.thresholds, current_purchase_number + DEAL_CARS_NUMBER))
+
+    def rest_purchases_number(self, lower: int, upper: int) -> int:
+        """Returns number of purchases left to make within the highest discount level
+        after purchases within passed levels"""
+        if upper == lower:
+            return DEAL_CARS_NUMBER
+        base = self.thresholds[lower - 1] if lower else 0
+        return DEAL_CARS_NUMBER - (self.thresholds[upper - 1] - base)
+
+    def purchase_map(self, current_purchase_number: int) -> dict[int, int]:
+        """Takes number of dealer purchases (from this seller) and returns map with discount
+        levels and future number of purchases to make within each level"""
+        lower, upper = self.deal_levels_bounds(current_purchase_number)
+        purchase_map = {}
+        for index in range(upper - 1, lower - 1, -1):
+            if index:
+                purchase_map[self.thresholds[index - 1]] = \
+                    self.thresholds[index] - self.thresholds[index - 1]
+            else:
+                purchase_map[0] = self.thresholds[0]
+        rest_purchases = self.rest_purchases_number(lower, upper)
+        if rest_purchases > 0:
+            purchase_map[self.thresholds[-1] if self.thresholds else 0] = rest_purchases
+        return purchase_map
+
+    def deal_rate(self, current_purchase_number: int) -> int:
+        """Takes number of dealer purchases (from this seller) and returns sum of price
+        rates (in percents of car price) of all cars of the deal"""
+        lower, upper = self.deal_levels_bounds(current_purchase_number)
+        deal_rate = self.cumulative_rates[upper] - self.cumulative_rates[lower]
+        rest_purchases = self.rest_purchases_number(lower, upper)
+        if rest_purchases > 0:
+            deal_rate += rest_purchases * (self.rates[-1] if self.rates else 100)
+        return deal_rate
+
+    def deal_sum(self, current_purchase_number: int, car_price: Decimal) -> Decimal:
+        """Takes number of dealer purchases (from this seller) and price of the estimating
+        car and returns value of the potential car purchase deal"""
+        return Decimal(car_price) * self.deal_rate(current_purchase_number) / 100
+
+
+_sellers_ladders: dict[int, tuple[datetime, DiscountLadder]] = {}
+
+
+def seller_discount_ladder_getter(seller_id: int,
+                                  updated_at: datetime,
+                                  discount_map: dict) -> DiscountLadder:
+    """Returns cached compiled discount ladder of the seller if it was compiled from the
+    same discount levels model version, otherwise compiles and caches new one"""
+    cached_ladder = _sellers_ladders.get(seller_id)
+    if cached_ladder and cached_ladder[0] == updated_at:
+        return cached_ladder[1]
+    ladder = DiscountLadder.from_discount_map(discount_map)
+    _sellers_ladders[seller_id] = (updated_at, ladder)
+    return ladder
+
+
+def seller_discount_ladder_invalidator(seller_id: int):
+    """Removes compiled discount ladder of the seller from cache"""
+    _sellers_ladders.pop(seller_id, None)
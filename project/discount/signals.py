@@ -0,0 +1,15 @@
+"""This module contains signal receivers invalidating compiled seller discount ladders"""
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .discount_ladder import seller_discount_ladder_invalidator
+from .models import RegularCustomerDiscountLevelsModel
+
+
+@receiver(post_save, sender=RegularCustomerDiscountLevelsModel)
+@receiver(post_delete, sender=RegularCustomerDiscountLevelsModel)
+def invalidate_seller_discount_ladder(sender, instance: RegularCustomerDiscountLevelsModel,
+                                      **kwargs):
+    """Drops cached discount ladder of the seller, whose discount levels were changed"""
+    seller_discount_ladder_invalidator(instance.seller_id)
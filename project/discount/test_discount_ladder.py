@@ -0,0 +1,42 @@
+# pylint: skip-file
+
+from decimal import Decimal
+
+import pytest
+from user.models import AutoSellerModel
+
+from .discount_ladder import DiscountLadder, seller_discount_ladder_getter
+from .models import RegularCustomerDiscountLevelsModel
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.mark.parametrize('discount_map, current_purchase_number, purchase_map, deal_sum',
+                         [({'0': 10, '5': 20}, 0, {0: 5, 5: 95}, '80540.25'),
+                          ({'0': 10, '5': 20}, 3, {0: 5, 5: 95}, '80540.25'),
+                          ({'0': 10, '5': 20}, 7, {5: 100}, '80040.00'),
+                          ({'10': 5, '50': 10, '150': 20}, 0,
+                           {10: 40, 0: 10, 150: 50}, '88044.00'),
+                          ({'10': 5, '50': 10, '150': 20}, 40, {10: 40, 150: 60}, '86043.00'),
+                          ({'10': 5, '50': 10, '150': 20}, 120, {50: 100}, '90045.00'),
+                          ({'10': 5, '50': 10, '150': 20}, 200, {150: 100}, '80040.00'),
+                          ({'30': 15}, 80, {30: 100}, '85042.50')])
+def test_discount_ladder_prices_deals(discount_map, current_purchase_number,
+                                      purchase_map, deal_sum):
+    ladder = DiscountLadder.from_discount_map(discount_map)
+    assert ladder.purchase_map(current_purchase_number) == purchase_map
+    assert ladder.deal_sum(current_purchase_number, Decimal('1000.50')) == Decimal(deal_sum)
+
+
+def test_seller_discount_ladder_is_recompiled_after_discount_levels_change(all_profiles):
+    seller = AutoSellerModel.objects.get(id=all_profiles['seller']['profile_instance'].pk)
+    levels = RegularCustomerDiscountLevelsModel.objects. \
+        create(seller=seller, purchase_number_discount_map={'0': 10})
+    ladder = seller_discount_ladder_getter(seller.pk, levels.updated_at,
+                                           levels.purchase_number_discount_map)
+    assert seller_discount_ladder_getter(seller.pk, levels.updated_at, {}) is ladder
+    levels.purchase_number_discount_map = {'0': 20}
+    levels.save()
+    new_ladder = seller_discount_ladder_getter(seller.pk, levels.updated_at,
+                                               levels.purchase_number_discount_map)
+    assert new_ladder.deal_sum(0, Decimal(10)) == Decimal(800)
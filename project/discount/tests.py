@@ -3,7 +3,12 @@
 from random import randint
 
 import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from user.models import AutoDealerModel
+
+from .models import CurrentDiscountLevelPerDealerModel
 
 pytestmark = pytest.mark.django_db
 
@@ -67,6 +72,18 @@ def test_seller_can_create_his_discount_levels_with_correct_data(all_profiles,
     assert response.data['purchase_number_discount_map']
 
 
+def test_seller_profile_is_resolved_once_per_request(all_profiles,
+                                                    client):
+    seller = all_profiles['seller']['profile_instance']
+    client.force_authenticate(user=seller.user)
+    with CaptureQueriesContext(connection) as queries:
+        response = client.post(reverse("create-discount-levels"),
+                               data={'purchase_number_discount_map': {1: 5, 10: 10}})
+    assert response.status_code == 201
+    assert len([query for query in queries
+                if f'FROM "{seller._meta.db_table}"' in query['sql']]) == 1
+
+
 def test_seller_can_not_create_discount_levels_second_time(all_profiles,
                                                            discounts,
                                                            client):
@@ -139,3 +156,18 @@ def test_sellers_discount_levels_search_filter(all_profiles,
                           data=data)
     assert response.status_code == 200
     assert response.data[0]['purchase_number_discount_map']
+
+
+def test_current_discounts_list_query_count_does_not_grow_with_dealers(all_profiles,
+                                                                       current_levels,
+                                                                       list_queries_counter,
+                                                                       client):
+    seller = all_profiles['seller']['profile_instance']
+    client.force_authenticate(user=seller.user)
+    queries_number = list_queries_counter(reverse('my-current-seller-discounts-list'))
+    for dealer in AutoDealerModel.objects.all():
+        CurrentDiscountLevelPerDealerModel.objects.create(seller=seller, dealer=dealer,
+                                                          current_discount=5,
+                                                          current_purchase_number=10)
+    assert list_queries_counter(reverse('my-current-seller-discounts-list')) == \
+        queries_number
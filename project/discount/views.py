@@ -3,6 +3,7 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from root.common.permissions import (IsDealer, IsOwnerOrAdmin, IsSeller,
                                      IsVerified, SellerHasNoDiscountSet)
+from root.common.profiles import request_profile_getter
 from root.common.views import (BaseOwnModelReadView, BaseOwnModelRUDView,
                                BaseReadOnlyView, CustomRequest)
 from user.models import AutoDealerModel, AutoSellerModel
@@ -50,7 +51,8 @@ class SellerDiscountsCreateView(APIView):
     permission_classes = [IsSeller & SellerHasNoDiscountSet & IsVerified]
 
     def post(self, request: CustomRequest) -> Response:
-        user_data = {'seller': AutoSellerModel.objects.get(user=request.user)}
+        user_data = {'seller': request_profile_getter(request, AutoSellerModel) or
+                     AutoSellerModel.objects.get(user=request.user)}
         serialized_obj = DiscountLevelsSerializer(data=request.data)
         serialized_obj.is_valid(raise_exception=True)
         serialized_obj.save(**user_data)
@@ -1,6 +1,13 @@
 from django.apps import AppConfig
+from django.core.checks import Tags, register
+from root.common.task_dispatch import shared_cache_checker
 
 
 class OffersAppConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "offer"
+
+    def ready(self):
+        # pylint: disable=import-outside-toplevel, unused-import
+        from . import signals  # noqa: F401
+        register(shared_cache_checker, Tags.caches)
@@ -0,0 +1,22 @@
+"""This module contains management command checking and rebuilding open offers order book"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...matching import order_book_consistency_checker, order_book_rebuilder
+
+
+class Command(BaseCommand):
+    help = 'Checks open offers order book consistency with offers, optionally rebuilds it'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rebuild', action='store_true',
+                            help='Rebuild order book index before the check')
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            order_book_rebuilder()
+            self.stdout.write('Order book index rebuilt')
+        problems = order_book_consistency_checker()
+        if problems:
+            raise CommandError('\n'.join(problems))
+        self.stdout.write(self.style.SUCCESS('Order book is consistent with open offers'))
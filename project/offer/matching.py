@@ -0,0 +1,82 @@
+"""This module contains order book of open offers: offers of each car model are walked
+from the highest offered price (and the oldest offer) down with keyset pagination over
+the partial order book index, and tools to check and rebuild the order book"""
+
+from collections.abc import Iterator
+from decimal import Decimal
+
+from django.db import connection
+from django.db.models import Q
+
+from .models import OfferModel
+
+ORDER_BOOK_INDEX = 'offer_order_book_idx'
+
+ORDER_BOOK_PAGE_SIZE = 100
+
+
+def order_book_page_getter(car_model_id: int,
+                           min_price: Decimal = Decimal(0),
+                           after: OfferModel | None = None,
+                           page_size: int = ORDER_BOOK_PAGE_SIZE) -> list[OfferModel]:
+    """Takes car model id, the lowest price of offers to take, the last offer of previous
+    page (if there was one) and page size and returns next page of car model order book"""
+    offers = OfferModel.objects.filter(car_model_id=car_model_id, max_price__gte=min_price)
+    if after:
+        offers = offers.filter(Q(max_price__lt=after.max_price) |
+                               Q(max_price=after.max_price, created_at__gt=after.created_at) |
+                               Q(max_price=after.max_price, created_at=after.created_at,
+                                 id__gt=after.pk))
+    return list(offers.select_related('creator').
+                order_by('-max_price', 'created_at', 'id')[:page_size])
+
+
+def order_book_walker(car_model_id: int,
+                      min_price: Decimal = Decimal(0),
+                      page_size: int = ORDER_BOOK_PAGE_SIZE) -> Iterator[OfferModel]:
+    """Takes car model id, the lowest price of offers to take and page size and yields
+    open offers of the car model from the highest offered price down, page by page"""
+    page = order_book_page_getter(car_model_id, min_price, page_size=page_size)
+    while page:
+        yield from page
+        if len(page) < page_size:
+            break
+        page = order_book_page_getter(car_model_id, min_price, page[-1], page_size)
+
+
+def order_book_consistency_checker(page_size: int = ORDER_BOOK_PAGE_SIZE) -> list[str]:
+    """Checks that order book index exists and that walking order book of every car
+    model gives all open offers of the car model exactly once in price and age order,
+    returns list of found problems"""
+    problems = []
+    with connection.cursor() as cursor:
+        constraints = connection.introspection.get_constraints(cursor,
+                                                               OfferModel._meta.db_table)
+    if ORDER_BOOK_INDEX not in constraints:
+        problems.append(f'Index {ORDER_BOOK_INDEX} is missing')
+    car_model_ids = OfferModel.objects.values_list('car_model_id', flat=True). \
+        order_by('car_model_id').distinct()
+    for car_model_id in car_model_ids:
+        open_offers = list(OfferModel.objects.filter(car_model_id=car_model_id).
+                           values_list('id', 'max_price', 'created_at'))
+        expected_ids = [offer[0] for offer in sorted(open_offers,
+                                                     key=lambda offer: (-offer[1], offer[2],
+                                                                        offer[0]))]
+        book_ids = [offer.pk for offer in order_book_walker(car_model_id,
+                                                            page_size=page_size)]
+        if sorted(book_ids) != sorted(expected_ids):
+            problems.append(f'Order book of car model {car_model_id} does not match '
+                            f'open offers (missing: '
+                            f'{sorted(set(expected_ids) - set(book_ids))}, extra or '
+                            f'repeated: {sorted(set(book_ids) - set(expected_ids)) or book_ids})')
+        elif book_ids != expected_ids:
+            problems.append(f'Order book of car model {car_model_id} is not sorted '
+                            f'by offered price and offer age')
+    return problems
+
+
+def order_book_rebuilder():
+    """Rebuilds order book index, bloated by often closed and created offers"""
+    with connection.cursor() as cursor:
+        cursor.execute(f'REINDEX {"INDEX " if connection.vendor == "postgresql" else ""}'
+                       f'{connection.ops.quote_name(ORDER_BOOK_INDEX)}')
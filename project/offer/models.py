@@ -1,7 +1,7 @@
 # pylint: skip-file
 
 from django.db import models
-from django.db.models import DecimalField, ForeignKey
+from django.db.models import DecimalField, ForeignKey, Index, Q
 from root.common.models import BaseModel
 
 
@@ -10,3 +10,11 @@ class OfferModel(BaseModel):
     car_model: ForeignKey = ForeignKey('car_market.MarketAvailableCarModel',
                                        on_delete=models.CASCADE)
     creator: ForeignKey = ForeignKey('user.CarBuyerModel', on_delete=models.CASCADE)
+
+    class Meta:
+        indexes = [Index(fields=['car_model', '-max_price', 'created_at', 'id'],
+                         condition=Q(is_active=True),
+                         name='offer_order_book_idx'),
+                   Index(fields=['creator', 'car_model'],
+                         condition=Q(is_active=True),
+                         name='offer_creator_idx')]
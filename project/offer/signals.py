@@ -0,0 +1,71 @@
+"""This module contains signal receivers triggering matching of open offers with dealer
+car parks, which were created or restocked, and with started dealer promos"""
+
+import datetime
+
+from car_park.models import DealerCarParkModel
+from django.conf import settings
+from django.db.models.signals import m2m_changed, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from promo.models import DealerPromoModel
+from root.common.task_dispatch import task_on_commit_dispatcher, workers_are_running
+
+from .tasks import task_match_offers_with_parks, task_match_offers_with_promo
+
+
+@receiver(pre_save, sender=DealerCarParkModel)
+def remember_park_previous_stock(sender, instance: DealerCarParkModel, **kwargs):
+    """Stores available number and car price of the park before its change"""
+    instance.previous_stock = None
+    if instance.pk and workers_are_running():
+        instance.previous_stock = DealerCarParkModel.objects.filter(pk=instance.pk). \
+            values('available_number', 'car_price').first()
+
+
+@receiver(post_save, sender=DealerCarParkModel)
+def match_offers_with_restocked_park(sender, instance: DealerCarParkModel, created: bool,
+                                     **kwargs):
+    """Triggers matching of open offers with created park or with park, which got
+    more cars available or became cheaper"""
+    previous_stock = getattr(instance, 'previous_stock', None)
+    if created or not previous_stock or \
+            int(instance.available_number) > previous_stock['available_number'] or \
+            instance.car_price < previous_stock['car_price']:
+        if int(instance.available_number) > 0:
+            task_on_commit_dispatcher(task_match_offers_with_parks, [[instance.pk]])
+
+
+def promo_start_getter(promo: DealerPromoModel) -> datetime.datetime | None:
+    """Takes dealer promo and returns its start date as aware datetime (start date
+    of promo created with string or naive datetime is normalized), or None if it
+    can not be parsed"""
+    start_date = promo.start_date
+    if isinstance(start_date, str):
+        start_date = parse_datetime(start_date)
+    if start_date is not None and timezone.is_naive(start_date):
+        start_date = timezone.make_aware(start_date)
+    return start_date
+
+
+@receiver(post_save, sender=DealerPromoModel)
+def match_offers_with_saved_promo(sender, instance: DealerPromoModel, **kwargs):
+    """Triggers matching of open offers with created or changed promo, which has already
+    started or starts within open offers sweep interval, when it starts, matching of
+    promos starting later is left to the periodic sweep"""
+    start_date = promo_start_getter(instance)
+    now = timezone.now()
+    if start_date is None or \
+            start_date > now + datetime.timedelta(seconds=settings.OPEN_OFFERS_SWEEP_INTERVAL):
+        return
+    task_on_commit_dispatcher(task_match_offers_with_promo, [instance.pk],
+                              eta=max(start_date, now))
+
+
+@receiver(m2m_changed, sender=DealerPromoModel.promo_cars.through)
+@receiver(m2m_changed, sender=DealerPromoModel.promo_aims.through)
+def match_offers_with_extended_promo(sender, instance, action: str, reverse: bool, **kwargs):
+    """Triggers matching of open offers with promo, which got new cars or aims"""
+    if action == 'post_add' and not reverse:
+        match_offers_with_saved_promo(DealerPromoModel, instance)
@@ -5,15 +5,17 @@ from decimal import Decimal
 from car_park.models import DealerCarParkModel
 from celery import shared_task
 from django.db import transaction
-from django.db.models import ForeignKey
+from django.db.models import F, ForeignKey, Q, QuerySet, Value
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 from promo.models import DealerPromoModel
-from promo.serializers import DealersPromoSerializer
+from root.common.response_cache import response_cache_invalidator
 from sales_history.models import CarBuyerHistoryModel, DealerSalesHistoryModel
-from user.models import BuyerFromDealerPurchaseNumber, CarBuyerModel
+from sales_history.rollups import daily_rollups_updater
+from user.models import AutoDealerModel, BuyerFromDealerPurchaseNumber, CarBuyerModel
 
+from .matching import order_book_walker
 from .models import OfferModel
-from .serializers import OffersSerializer
 
 
 def select_park_to_buy_from(offer: dict, buyer: CarBuyerModel) -> dict | None:
@@ -29,6 +31,24 @@ def select_park_to_buy_from(offer: dict, buyer: CarBuyerModel) -> dict | None:
                                                            offer_price)
 
 
+def parks_promo_discounts_getter(buyer: CarBuyerModel,
+                                 park_ids: list[int]) -> dict[int, Decimal]:
+    """Takes car buyer model and ids of dealer car parks and returns map of park ids to
+    the biggest discount of currently active promos, aimed at the buyer, of each park"""
+    now = timezone.now()
+    promo_parks = DealerPromoModel.promo_cars.through.objects. \
+        filter(dealercarparkmodel_id__in=park_ids,
+               dealerpromomodel__promo_aims=buyer,
+               dealerpromomodel__is_active=True,
+               dealerpromomodel__end_date__gte=now,
+               dealerpromomodel__start_date__lte=now). \
+        values_list('dealercarparkmodel_id', 'dealerpromomodel__discount_size')
+    discounts: dict[int, Decimal] = {}
+    for park_id, discount_size in promo_parks:
+        discounts[park_id] = max(discounts.get(park_id, discount_size), discount_size)
+    return discounts
+
+
 def find_best_park_by_price_from_suitable_car_parks(buyer: CarBuyerModel,
                                                     suitable_car_parks_list:
                                                     list[DealerCarParkModel],
@@ -37,85 +57,309 @@ def find_best_park_by_price_from_suitable_car_parks(buyer: CarBuyerModel,
     if there are suitable cars on market, returns best park with minimal price to buy from"""
     selected_park = None
     if suitable_car_parks_list:
-        promos = DealerPromoModel.objects.filter(promo_cars__in=suitable_car_parks_list,
-                                                 promo_aims__in=[buyer],
-                                                 end_date__gte=timezone.now(),
-                                                 start_date__lte=timezone.now())
+        discounts = parks_promo_discounts_getter(buyer, [park.pk for park
+                                                         in suitable_car_parks_list])
         car_park_prices_with_promo = []
-        promo_parks_list = []
+        car_park_prices_without_promo = []
         for park in suitable_car_parks_list:
-            for promo in promos:
-                promo_cars = DealersPromoSerializer(promo).data['promo_cars']
-                if park.pk in promo_cars:
-                    actual_price = Decimal(park.car_price) * \
-                                   (100 - Decimal(promo.discount_size)) / 100
-                    if actual_price <= offer_price:
-                        promo_parks_list.append(park)
-                        car_park_prices_with_promo.append({"park": park,
-                                                           "actual_price": actual_price})
-        car_park_prices_without_promo = [{"park": park,
-                                          "actual_price": Decimal(park.car_price)}
-                                         for park in suitable_car_parks_list
-                                         if park not in promo_parks_list and
-                                         Decimal(park.car_price) <= offer_price]
+            if park.pk in discounts:
+                actual_price = Decimal(park.car_price) * (100 - Decimal(discounts[park.pk])) / 100
+                if actual_price <= offer_price:
+                    car_park_prices_with_promo.append({"park": park,
+                                                       "actual_price": actual_price})
+                    continue
+            if Decimal(park.car_price) <= offer_price:
+                car_park_prices_without_promo.append({"park": park,
+                                                      "actual_price": Decimal(park.car_price)})
         all_prices = car_park_prices_without_promo + car_park_prices_with_promo
         if all_prices:
-            the_lowest_car_price = min(price['actual_price'] for price in all_prices)
-            parks_to_buy_from = [price for price in all_prices
-                                 if price['actual_price'] == the_lowest_car_price]
-            selected_park = parks_to_buy_from[0]
+            selected_park = min(all_prices, key=lambda price: price['actual_price'])
     return selected_park
 
 
 def make_offer_deal(selected_park: dict,
                     buyer: CarBuyerModel | ForeignKey,
-                    offer_instance: OfferModel):
+                    offer_instance: OfferModel) -> bool:
     """Takes selected dealer car park to buy from and car buyer model and makes
-    a deal of car purchase, creates history records of car bought and sold for
-    buyer and dealer"""
-    dealer = selected_park['park'].dealer
+    a deal of car purchase with conditional updates of the offer and the park (so
+    the same offer can not be closed and the park can not be oversold twice by
+    concurrent workers), creates history records of car bought and sold for buyer
+    and dealer, returns whether the deal was made"""
+    park = selected_park['park']
+    dealer = park.dealer
+    car_price = selected_park['actual_price']
+    now = timezone.now()
     with transaction.atomic():
-        car_price = selected_park['actual_price']
-        park = selected_park['park']
-        park.available_number = int(park.available_number) - 1
-        dealer.balance = Decimal(dealer.balance) + car_price
-        dealer.save()
-        park.save()
-        DealerSalesHistoryModel.objects.create(dealer=dealer,
-                                               sold_car_model=park,
-                                               car_buyer=buyer,
-                                               selling_price=car_price,
-                                               sold_cars_quantity=1,
-                                               deal_sum=car_price)
-        CarBuyerHistoryModel.objects.create(bought_car_model=park,
-                                            auto_dealer=dealer,
-                                            bought_quantity=1,
-                                            car_price=car_price,
-                                            deal_sum=car_price,
-                                            buyer=buyer)
-        offer_instance.is_active = False
-        offer_instance.save()
+        if not OfferModel.objects.filter(pk=offer_instance.pk). \
+                update(is_active=False, updated_at=now):
+            return False
+        if not DealerCarParkModel.objects.filter(pk=park.pk, available_number__gt=0). \
+                update(available_number=F('available_number') - 1, updated_at=now):
+            transaction.set_rollback(True)
+            return False
+        response_cache_invalidator(DealerCarParkModel)
+        AutoDealerModel.objects.filter(pk=dealer.pk). \
+            update(balance=Coalesce(F('balance'), Value(Decimal(0))) + car_price,
+                   updated_at=now)
+        daily_rollups_updater(DealerSalesHistoryModel.objects.bulk_create([
+            DealerSalesHistoryModel(dealer=dealer,
+                                    sold_car_model=park,
+                                    car_buyer=buyer,
+                                    selling_price=car_price,
+                                    sold_cars_quantity=1,
+                                    deal_sum=car_price)]))
+        daily_rollups_updater(CarBuyerHistoryModel.objects.bulk_create([
+            CarBuyerHistoryModel(bought_car_model=park,
+                                 auto_dealer=dealer,
+                                 bought_quantity=1,
+                                 car_price=car_price,
+                                 deal_sum=car_price,
+                                 buyer=buyer)]))
         purchase_number_model = \
             BuyerFromDealerPurchaseNumber.objects.get_or_create(buyer=buyer,
                                                                 dealer=dealer)[0]
-        current_purchase_number = int(purchase_number_model.purchase_number)
-        purchase_number_model.purchase_number = current_purchase_number + 1
-        purchase_number_model.save()
+        BuyerFromDealerPurchaseNumber.objects.filter(pk=purchase_number_model.pk). \
+            update(purchase_number=F('purchase_number') + 1, updated_at=now)
+    offer_instance.is_active = False
+    park.available_number = int(park.available_number) - 1
+    return True
+
+
+def offer_deal_maker(offer_instance: OfferModel) -> bool:
+    """Takes open offer model, searches for best possible deal to buy a car on minimal
+    suitable price and makes it if buyer can afford it, returns whether the deal was made"""
+    buyer = offer_instance.creator
+    selected_park = select_park_to_buy_from({'car_model': offer_instance.car_model_id,
+                                             'max_price': offer_instance.max_price},
+                                            buyer)
+    if selected_park and buyer.balance is not None and \
+            selected_park['actual_price'] <= Decimal(buyer.balance):
+        return make_offer_deal(selected_park, buyer, offer_instance)
+    return False
+
+
+def offers_matcher(offers: QuerySet) -> int:
+    """Takes queryset of open offers and tries to make deals for them, starting from
+    the highest offered price (and the oldest offer), returns number of deals made"""
+    deals_number = 0
+    for offer_instance in offers.select_related('creator').order_by('-max_price', 'created_at'):
+        deals_number = deals_number + offer_deal_maker(offer_instance)
+    return deals_number
+
+
+def park_buyers_prices_getter(park: DealerCarParkModel) -> tuple[Decimal, dict[int, Decimal]]:
+    """Takes dealer car park and returns its car price and map of buyer ids to their
+    discounted prices, taking in account currently active promos of the park"""
+    now = timezone.now()
+    promo_aims = DealerPromoModel.objects.filter(promo_cars=park,
+                                                 end_date__gte=now,
+                                                 start_date__lte=now). \
+        values_list('discount_size', 'promo_aims')
+    car_price = Decimal(park.car_price)
+    buyers_prices: dict[int, Decimal] = {}
+    for discount_size, buyer_id in promo_aims:
+        if buyer_id is not None:
+            buyers_prices[buyer_id] = min(buyers_prices.get(buyer_id, car_price),
+                                          car_price * (100 - Decimal(discount_size)) / 100)
+    return car_price, buyers_prices
+
+
+def park_order_book_filler(park: DealerCarParkModel) -> int:
+    """Takes dealer car park and fills open offers of its car model order book from the
+    highest offered price down, while the park has available cars and offered prices
+    are not lower than park prices, returns number of deals made"""
+    car_price, buyers_prices = park_buyers_prices_getter(park)
+    deals_number = 0
+    for offer_instance in order_book_walker(park.car_model_id,
+                                            min(buyers_prices.values(), default=car_price)):
+        if park.available_number <= 0:
+            break
+        buyer = offer_instance.creator
+        actual_price = buyers_prices.get(buyer.pk, car_price)
+        if actual_price <= Decimal(offer_instance.max_price) and \
+                buyer.balance is not None and actual_price <= Decimal(buyer.balance):
+            deals_number = deals_number + make_offer_deal({'park': park,
+                                                           'actual_price': actual_price},
+                                                          buyer, offer_instance)
+    return deals_number
+
+
+def buyers_parks_discounts_getter(park_ids: list[int],
+                                  buyer_ids: list[int]) -> dict[tuple[int, int], Decimal]:
+    """Takes ids of dealer car parks and car buyers and returns map of (park id, buyer id)
+    pairs to the biggest discount of currently active promos of the park aimed at the buyer"""
+    now = timezone.now()
+    promos_parks = DealerPromoModel.promo_cars.through.objects. \
+        filter(dealercarparkmodel_id__in=park_ids,
+               dealerpromomodel__is_active=True,
+               dealerpromomodel__end_date__gte=now,
+               dealerpromomodel__start_date__lte=now). \
+        values_list('dealerpromomodel_id', 'dealercarparkmodel_id',
+                    'dealerpromomodel__discount_size')
+    promos_buyers: dict[int, list[int]] = {}
+    for promo_id, buyer_id in DealerPromoModel.promo_aims.through.objects. \
+            filter(dealerpromomodel_id__in={promo_id for promo_id, _, _ in promos_parks},
+                   carbuyermodel_id__in=buyer_ids). \
+            values_list('dealerpromomodel_id', 'carbuyermodel_id'):
+        promos_buyers.setdefault(promo_id, []).append(buyer_id)
+    discounts: dict[tuple[int, int], Decimal] = {}
+    for promo_id, park_id, discount_size in promos_parks:
+        for buyer_id in promos_buyers.get(promo_id, []):
+            discounts[park_id, buyer_id] = max(discounts.get((park_id, buyer_id), discount_size),
+                                               discount_size)
+    return discounts
+
+
+def open_offers_allocator(offers: list[OfferModel],
+                          parks: list[DealerCarParkModel],
+                          discounts: dict[tuple[int, int], Decimal],
+                          buyers_balances: dict[int, Decimal | None]) -> list[dict]:
+    """Takes open offers (ordered by offered price and age), dealer car parks with their
+    available cars, buyers promo discounts and balances, allocates parks cars to offers in
+    given order, so that no park is given more cars than it has, each offer gets the
+    cheapest park (as single offer deal would do), returns list of allocated deals"""
+    car_model_parks: dict[int, list[DealerCarParkModel]] = {}
+    for park in sorted(parks, key=lambda park: park.pk):
+        car_model_parks.setdefault(park.car_model_id, []).append(park)
+    rest_numbers = {park.pk: int(park.available_number) for park in parks}
+    deals = []
+    for offer in offers:
+        offer_price = Decimal(offer.max_price)
+        park_prices = []
+        for park in car_model_parks.get(offer.car_model_id, []):
+            if rest_numbers[park.pk] <= 0:
+                continue
+            discount_size = discounts.get((park.pk, offer.creator_id))
+            if discount_size is not None:
+                actual_price = Decimal(park.car_price) * (100 - Decimal(discount_size)) / 100
+                if actual_price <= offer_price:
+                    park_prices.append((actual_price, 1, park))
+                    continue
+            if Decimal(park.car_price) <= offer_price:
+                park_prices.append((Decimal(park.car_price), 0, park))
+        if not park_prices:
+            continue
+        actual_price, _, park = min(park_prices, key=lambda price: price[:2])
+        balance = buyers_balances.get(offer.creator_id)
+        if balance is not None and actual_price <= Decimal(balance):
+            rest_numbers[park.pk] -= 1
+            deals.append({'offer': offer, 'park': park, 'actual_price': actual_price})
+    return deals
+
+
+def offer_deals_applier(deals: list[dict]) -> None:
+    """Takes allocated offer deals (with parks and dealers locked by current transaction)
+    and applies them with bulk updates of offers, parks, dealers balances and purchase
+    numbers and bulk creation of history records"""
+    now = timezone.now()
+    parks = {deal['park'].pk: deal['park'] for deal in deals}
+    dealers = {dealer.pk: dealer for dealer in AutoDealerModel.objects.select_for_update().
+               filter(pk__in={park.dealer_id for park in parks.values()}).order_by('pk')}
+    purchase_numbers: dict[tuple[int, int], int] = {}
+    dealers_history, buyers_history = [], []
+    for deal in deals:
+        park, car_price, buyer_id = deal['park'], deal['actual_price'], deal['offer'].creator_id
+        park.available_number = int(park.available_number) - 1
+        dealer = dealers[park.dealer_id]
+        dealer.balance = Decimal(dealer.balance or 0) + car_price
+        purchase_numbers[buyer_id, dealer.pk] = purchase_numbers.get((buyer_id, dealer.pk), 0) + 1
+        dealers_history.append(DealerSalesHistoryModel(dealer=dealer,
+                                                       sold_car_model=park,
+                                                       car_buyer_id=buyer_id,
+                                                       selling_price=car_price,
+                                                       sold_cars_quantity=1,
+                                                       deal_sum=car_price))
+        buyers_history.append(CarBuyerHistoryModel(bought_car_model=park,
+                                                   auto_dealer=dealer,
+                                                   bought_quantity=1,
+                                                   car_price=car_price,
+                                                   deal_sum=car_price,
+                                                   buyer_id=buyer_id))
+    for instance in list(parks.values()) + list(dealers.values()):
+        instance.updated_at = now
+    OfferModel.objects.filter(pk__in=[deal['offer'].pk for deal in deals]). \
+        update(is_active=False, updated_at=now)
+    DealerCarParkModel.objects.bulk_update(parks.values(), ['available_number', 'updated_at'])
+    response_cache_invalidator(DealerCarParkModel)
+    AutoDealerModel.objects.bulk_update(dealers.values(), ['balance', 'updated_at'])
+    daily_rollups_updater(DealerSalesHistoryModel.objects.bulk_create(dealers_history))
+    daily_rollups_updater(CarBuyerHistoryModel.objects.bulk_create(buyers_history))
+    existing_numbers = [purchase_number for purchase_number
+                        in BuyerFromDealerPurchaseNumber.objects.select_for_update().
+                        filter(buyer_id__in={buyer_id for buyer_id, _ in purchase_numbers},
+                               dealer_id__in=dealers)
+                        if (purchase_number.buyer_id, purchase_number.dealer_id)
+                        in purchase_numbers]
+    for purchase_number in existing_numbers:
+        purchase_number.purchase_number = int(purchase_number.purchase_number) + \
+            purchase_numbers.pop((purchase_number.buyer_id, purchase_number.dealer_id))
+        purchase_number.updated_at = now
+    BuyerFromDealerPurchaseNumber.objects.bulk_update(existing_numbers,
+                                                      ['purchase_number', 'updated_at'])
+    BuyerFromDealerPurchaseNumber.objects.bulk_create(
+        [BuyerFromDealerPurchaseNumber(buyer_id=buyer_id, dealer_id=dealer_id,
+                                       purchase_number=bought_number)
+         for (buyer_id, dealer_id), bought_number in purchase_numbers.items()])
 
 
 @shared_task(name='make_deal_from_offer')
 def task_make_deal_from_offer(offer: dict):
     """Celery script that takes an offer and search for best possible deal to
-    buy a car on minimal suitable price, if currently there is no purchase options
-    waits 5 minutes before next check for the same offer"""
-    buyer = CarBuyerModel.objects.get(id=offer["creator"])
-    selected_park = select_park_to_buy_from(offer, buyer)
-    buyer_balance = Decimal(buyer.balance)
-    if selected_park and selected_park['actual_price'] <= buyer_balance:
-        offer_instance = OfferModel.objects.get(id=offer['id'])
-        make_offer_deal(selected_park, buyer, offer_instance)
-    else:
-        check_offer = OfferModel.objects.get_or_none(id=offer['id'])
-        if check_offer:
-            offer_data = OffersSerializer(check_offer).data
-            task_make_deal_from_offer.apply_async([offer_data], countdown=300)
+    buy a car on minimal suitable price, offers left without deal are matched
+    later on car parks and promos events or by periodic open offers sweep"""
+    offer_instance = OfferModel.objects.select_related('creator').filter(id=offer['id']).first()
+    if offer_instance:
+        offer_deal_maker(offer_instance)
+
+
+@shared_task(name='match_offers_with_dealer_parks')
+def task_match_offers_with_parks(park_ids: list[int]):
+    """Celery script that takes ids of created or restocked dealer car parks and fills
+    order books of parks car models with parks available cars"""
+    parks = DealerCarParkModel.objects.filter(id__in=park_ids, available_number__gt=0). \
+        select_related('dealer')
+    for park in parks:
+        park_order_book_filler(park)
+
+
+@shared_task(name='match_offers_with_dealer_promo')
+def task_match_offers_with_promo(promo_id: int):
+    """Celery script that takes id of started dealer promo and tries to make deals for open
+    offers of promo aims, which are made for promo cars and are not lower than their
+    discounted prices"""
+    now = timezone.now()
+    promo = DealerPromoModel.objects.filter(id=promo_id, end_date__gte=now,
+                                            start_date__lte=now).first()
+    if promo:
+        buyer_ids = list(promo.promo_aims.values_list('id', flat=True))
+        offers_filter = Q(pk__in=[])
+        for park in promo.promo_cars.filter(available_number__gt=0):
+            offers_filter |= Q(car_model_id=park.car_model_id,
+                               max_price__gte=Decimal(park.car_price) *
+                               (100 - Decimal(promo.discount_size)) / 100)
+        if buyer_ids:
+            offers_matcher(OfferModel.objects.filter(offers_filter, creator_id__in=buyer_ids))
+
+
+@shared_task(name='clear_open_offers')
+def task_clear_open_offers() -> int:
+    """Celery script that settles all open offers in one transaction: locks open offers
+    and parks of their car models, allocates parks cars to offers from the highest offered
+    price (and the oldest offer) down and applies all made deals in bulk, used as periodic
+    safety net for offers missed by event driven matching, returns number of deals made"""
+    with transaction.atomic():
+        offers = list(OfferModel.objects.select_for_update().
+                      order_by('-max_price', 'created_at', 'id'))
+        parks = list(DealerCarParkModel.objects.select_for_update().
+                     filter(car_model_id__in={offer.car_model_id for offer in offers},
+                            available_number__gt=0).order_by('pk'))
+        buyer_ids = list({offer.creator_id for offer in offers})
+        buyers_balances = dict(CarBuyerModel.objects.filter(pk__in=buyer_ids).
+                               values_list('pk', 'balance'))
+        deals = open_offers_allocator(offers, parks,
+                                      buyers_parks_discounts_getter([park.pk for park in parks],
+                                                                    buyer_ids),
+                                      buyers_balances)
+        if deals:
+            offer_deals_applier(deals)
+    return len(deals)
@@ -0,0 +1,52 @@
+# pylint: skip-file
+
+from decimal import Decimal
+
+import pytest
+from car_park.models import DealerCarParkModel
+from django.core.management import call_command
+from user.models import CarBuyerModel
+
+from .matching import order_book_consistency_checker, order_book_walker
+from .models import OfferModel
+from .tasks import park_order_book_filler
+
+pytestmark = pytest.mark.django_db(transaction=True)
+
+
+@pytest.fixture(scope='function', name='order_book_offers')
+def create_order_book_offers(all_profiles, cars):
+    buyer = all_profiles['buyer']['profile_instance']
+    CarBuyerModel.objects.filter(id=buyer.pk).update(balance=100000)
+    car_model = cars[0]
+    offers = [OfferModel.objects.create(max_price=max_price, car_model=car_model, creator=buyer)
+              for max_price in [900, 1500, 1200, 1500, 700, 1100]]
+    OfferModel.objects.filter(id=offers[-1].pk).update(is_active=False)
+    return {'car_model': car_model, 'offers': offers}
+
+
+def test_order_book_walks_open_offers_by_price_and_age(order_book_offers):
+    offers = order_book_offers['offers']
+    book = list(order_book_walker(order_book_offers['car_model'].pk, page_size=2))
+    assert [offer.pk for offer in book] == [offers[index].pk for index in [1, 3, 2, 0, 4]]
+    book = list(order_book_walker(order_book_offers['car_model'].pk, Decimal(1000),
+                                  page_size=2))
+    assert [offer.pk for offer in book] == [offers[index].pk for index in [1, 3, 2]]
+
+
+def test_order_book_is_consistent_with_open_offers(order_book_offers):
+    assert order_book_consistency_checker(page_size=2) == []
+    call_command('offer_order_book', '--rebuild')
+
+
+def test_park_fills_order_book_from_the_highest_offer(order_book_offers,
+                                                     dealers_for_control_cases):
+    offers = order_book_offers['offers']
+    park = DealerCarParkModel.objects.create(dealer=dealers_for_control_cases[0],
+                                             car_model=order_book_offers['car_model'],
+                                             available_number=2,
+                                             car_price=1000)
+    assert park_order_book_filler(park) == 2
+    open_offer_ids = set(OfferModel.objects.values_list('id', flat=True))
+    assert open_offer_ids == {offers[index].pk for index in [0, 2, 4]}
+    assert DealerCarParkModel.objects.get(id=park.pk).available_number == 0
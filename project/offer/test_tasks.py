@@ -1,11 +1,22 @@
 # pylint: skip-file
 
+from datetime import timedelta
 from decimal import Decimal
 
 import pytest
-from sales_history.models import CarBuyerHistoryModel
+from car_park.models import DealerCarParkModel
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from promo.models import DealerPromoModel
+from sales_history.models import CarBuyerHistoryModel, DealerSalesHistoryModel
+from user.models import AutoDealerModel, BuyerFromDealerPurchaseNumber, CarBuyerModel
 
-from .tasks import task_make_deal_from_offer
+from .models import OfferModel
+from .tasks import (find_best_park_by_price_from_suitable_car_parks, make_offer_deal,
+                    select_park_to_buy_from, task_clear_open_offers,
+                    task_make_deal_from_offer)
 
 pytestmark = pytest.mark.django_db(transaction=True)
 
@@ -26,3 +37,161 @@ def test_task_make_deal_from_offer_from_view(control_case_dealers_parks_offer,
     assert record.bought_car_model == chosen_park
     assert record.bought_car_model.car_model == chosen_park.car_model
     assert Decimal(record.car_price) <= Decimal(offer_data['max_price'])
+
+
+def test_make_offer_deal_closes_offer_and_sells_park_car_only_once(
+        control_case_dealers_parks_offer):
+    offer_data = control_case_dealers_parks_offer['offer_data']
+    buyer = CarBuyerModel.objects.get(id=offer_data['creator'])
+    selected_park = select_park_to_buy_from(offer_data, buyer)
+    offer_instance = OfferModel.objects.get(id=offer_data['id'])
+    stale_offer_instance = OfferModel.objects.get(id=offer_data['id'])
+    assert make_offer_deal(selected_park, buyer, offer_instance)
+    assert not make_offer_deal(selected_park, buyer, stale_offer_instance)
+    assert CarBuyerHistoryModel.objects.filter(buyer=buyer).count() == 1
+    park = DealerCarParkModel.objects.get(id=selected_park['park'].pk)
+    assert park.available_number == 100000 - 1
+
+
+def test_make_offer_deal_invalidates_cached_dealer_parks(control_case_dealers_parks_offer,
+                                                        client):
+    offer_data = control_case_dealers_parks_offer['offer_data']
+    buyer = CarBuyerModel.objects.get(id=offer_data['creator'])
+    selected_park = select_park_to_buy_from(offer_data, buyer)
+    park_url = reverse('dealer-park-detail', kwargs={'pk': selected_park['park'].pk})
+    client.force_authenticate(user=buyer.user)
+    assert client.get(park_url).data['available_number'] == 100000
+    assert make_offer_deal(selected_park, buyer,
+                           OfferModel.objects.get(id=offer_data['id']))
+    assert client.get(park_url).data['available_number'] == 100000 - 1
+
+
+def test_make_offer_deal_does_not_oversell_empty_park(control_case_dealers_parks_offer):
+    offer_data = control_case_dealers_parks_offer['offer_data']
+    buyer = CarBuyerModel.objects.get(id=offer_data['creator'])
+    selected_park = select_park_to_buy_from(offer_data, buyer)
+    DealerCarParkModel.objects.filter(id=selected_park['park'].pk).update(available_number=0)
+    offer_instance = OfferModel.objects.get(id=offer_data['id'])
+    assert not make_offer_deal(selected_park, buyer, offer_instance)
+    assert OfferModel.objects.filter(id=offer_data['id']).exists()
+    assert not CarBuyerHistoryModel.objects.filter(buyer=buyer).exists()
+    assert DealerCarParkModel.objects.get(id=selected_park['park'].pk).available_number == 0
+
+
+def test_created_cheaper_park_triggers_offer_matching(control_case_dealers_parks_offer,
+                                                      workers_heartbeat,
+                                                      celery_app,
+                                                      celery_worker):
+    offer_data = control_case_dealers_parks_offer['offer_data']
+    dealer = control_case_dealers_parks_offer['predefined_park'].dealer
+    DealerCarParkModel.objects.update(available_number=0)
+    task_make_deal_from_offer.delay(offer_data)
+    assert OfferModel.objects.filter(id=offer_data['id']).exists()
+    new_park = DealerCarParkModel.objects.create(dealer=dealer,
+                                                 car_model_id=offer_data['car_model'],
+                                                 available_number=1,
+                                                 car_price=950)
+    assert not OfferModel.objects.filter(id=offer_data['id']).exists()
+    record = CarBuyerHistoryModel.objects.get(buyer_id=offer_data['creator'])
+    assert record.bought_car_model == new_park
+    assert DealerCarParkModel.objects.get(id=new_park.pk).available_number == 0
+
+
+def test_started_promo_triggers_offer_matching(control_case_dealers_parks_offer,
+                                               workers_heartbeat,
+                                               celery_app,
+                                               celery_worker):
+    offer_data = control_case_dealers_parks_offer['offer_data']
+    DealerPromoModel.objects.update(end_date=timezone.now() - timedelta(days=1))
+    park = DealerCarParkModel.objects.get(car_model_id=offer_data['car_model'],
+                                          car_price=1100)
+    DealerCarParkModel.objects.filter(car_price=1000).update(available_number=0)
+    task_make_deal_from_offer.delay(offer_data)
+    assert OfferModel.objects.filter(id=offer_data['id']).exists()
+    promo = DealerPromoModel.objects.create(promo_name='promo', promo_description='promo',
+                                            start_date=timezone.now(),
+                                            end_date=timezone.now() + timedelta(days=1),
+                                            discount_size=10, creator=park.dealer)
+    promo.promo_aims.add(offer_data['creator'])
+    assert OfferModel.objects.filter(id=offer_data['id']).exists()
+    promo.promo_cars.add(park)
+    assert not OfferModel.objects.filter(id=offer_data['id']).exists()
+    record = CarBuyerHistoryModel.objects.get(buyer_id=offer_data['creator'])
+    assert record.bought_car_model == park
+    assert Decimal(record.car_price) == Decimal('990')
+
+
+def test_clear_open_offers_settles_offers_missed_by_events(control_case_dealers_parks_offer,
+                                                           celery_app,
+                                                           celery_worker):
+    offer_data = control_case_dealers_parks_offer['offer_data']
+    task_clear_open_offers.delay()
+    assert not OfferModel.objects.filter(id=offer_data['id']).exists()
+    record = CarBuyerHistoryModel.objects.get(buyer_id=offer_data['creator'])
+    assert record.bought_car_model == control_case_dealers_parks_offer['predefined_park']
+    assert Decimal(record.car_price) == Decimal(900)
+
+
+def test_clear_open_offers_allocates_last_cars_by_price_and_age(
+        control_case_dealers_parks_offer):
+    offer_data = control_case_dealers_parks_offer['offer_data']
+    park = control_case_dealers_parks_offer['predefined_park']
+    buyer = CarBuyerModel.objects.get(id=offer_data['creator'])
+    CarBuyerModel.objects.filter(id=buyer.pk).update(balance=100000)
+    DealerCarParkModel.objects.exclude(id=park.pk).update(available_number=0)
+    DealerCarParkModel.objects.filter(id=park.pk).update(available_number=2)
+    dealer_balance = Decimal(park.dealer.balance or 0)
+    offers = [OfferModel.objects.create(max_price=max_price, car_model_id=offer_data['car_model'],
+                                        creator=buyer)
+              for max_price in [5000, 1000]]
+    assert task_clear_open_offers() == 2
+    assert list(OfferModel.objects.values_list('id', flat=True)) == [offers[1].pk]
+    assert DealerCarParkModel.objects.get(id=park.pk).available_number == 0
+    assert CarBuyerHistoryModel.objects.filter(buyer=buyer).count() == 2
+    assert DealerSalesHistoryModel.objects.filter(sold_car_model=park).count() == 2
+    assert BuyerFromDealerPurchaseNumber.objects.get(buyer=buyer, dealer=park.dealer). \
+        purchase_number == 2
+    assert AutoDealerModel.objects.get(id=park.dealer_id).balance == \
+        dealer_balance + 2 * Decimal(900)
+    assert task_clear_open_offers() == 0
+
+
+@pytest.mark.parametrize('settle_by_sweep', [False, True])
+def test_offer_deal_adds_price_to_dealer_without_balance(control_case_dealers_parks_offer,
+                                                         settle_by_sweep):
+    offer_data = control_case_dealers_parks_offer['offer_data']
+    park = control_case_dealers_parks_offer['predefined_park']
+    AutoDealerModel.objects.filter(id=park.dealer_id).update(balance=None)
+    if settle_by_sweep:
+        assert task_clear_open_offers() == 1
+    else:
+        buyer = CarBuyerModel.objects.get(id=offer_data['creator'])
+        assert make_offer_deal(select_park_to_buy_from(offer_data, buyer), buyer,
+                               OfferModel.objects.get(id=offer_data['id']))
+    assert AutoDealerModel.objects.get(id=park.dealer_id).balance == Decimal(900)
+
+
+def test_best_park_search_query_count_does_not_grow_with_parks_and_promos(
+        control_case_dealers_parks_offer):
+    offer_data = control_case_dealers_parks_offer['offer_data']
+    buyer = CarBuyerModel.objects.get(id=offer_data['creator'])
+    parks = list(DealerCarParkModel.objects.filter(car_model_id=offer_data['car_model']))
+    with CaptureQueriesContext(connection) as queries_before:
+        selected_park = find_best_park_by_price_from_suitable_car_parks(buyer, parks,
+                                                                        Decimal(1000))
+    assert selected_park['park'] == control_case_dealers_parks_offer['predefined_park']
+    assert selected_park['actual_price'] == Decimal(900)
+    for discount_size in [1, 2, 5]:
+        promo = DealerPromoModel.objects.create(promo_name='promo', promo_description='promo',
+                                                start_date=timezone.now(),
+                                                end_date=timezone.now() + timedelta(days=1),
+                                                discount_size=discount_size,
+                                                creator=parks[0].dealer)
+        promo.promo_aims.add(buyer)
+        promo.promo_cars.add(*parks)
+    with CaptureQueriesContext(connection) as queries_after:
+        selected_park = find_best_park_by_price_from_suitable_car_parks(buyer, parks,
+                                                                        Decimal(1000))
+    assert len(queries_after) == len(queries_before) == 1
+    assert selected_park['park'] == control_case_dealers_parks_offer['predefined_park']
+    assert selected_park['actual_price'] == Decimal(900)
@@ -1,7 +1,17 @@
 # pylint: skip-file
 
+import datetime
+import logging
+from unittest.mock import patch
+
 import pytest
+from django.test import override_settings
 from django.urls import reverse
+from django.utils import timezone
+from promo.models import DealerPromoModel
+from root.common.task_dispatch import shared_cache_checker
+
+from .tasks import task_match_offers_with_promo
 
 pytestmark = pytest.mark.django_db
 
@@ -167,3 +177,59 @@ def test_offer_for_dealer_ordering_filters(offer, additional_profiles, offer_dat
                           data=data)
     assert response.status_code == 200
     assert float(response.data[0]['max_price']) >= float(response.data[1]['max_price'])
+
+
+def test_created_offer_is_sent_to_workers_on_commit_only_while_they_run(
+        all_profiles, offer_data, client, django_capture_on_commit_callbacks, request):
+    user = all_profiles['buyer']['profile_instance'].user
+    client.force_authenticate(user=user)
+    with django_capture_on_commit_callbacks() as callbacks:
+        response = client.post(reverse('my-offer-list'), data=offer_data)
+    assert response.status_code == 201
+    assert not callbacks
+    request.getfixturevalue('workers_heartbeat')
+    with django_capture_on_commit_callbacks() as callbacks:
+        response = client.post(reverse('my-offer-list'), data=offer_data)
+    assert response.status_code == 201
+    assert len(callbacks) == 1
+
+
+def test_only_started_or_soon_starting_promos_are_sent_to_workers(
+        all_profiles, django_capture_on_commit_callbacks, workers_heartbeat):
+    promo_data = {'promo_name': 'promo', 'promo_description': 'promo', 'discount_size': 10,
+                  'end_date': timezone.now() + datetime.timedelta(days=400),
+                  'creator': all_profiles['dealer']['profile_instance']}
+    for start_date, dispatched in [(timezone.now() + datetime.timedelta(days=30), False),
+                                   ((timezone.now() + datetime.timedelta(days=300)).
+                                    date().isoformat(), False),
+                                   (datetime.datetime.now(), True),
+                                   (timezone.now() + datetime.timedelta(minutes=5), True)]:
+        with patch.object(task_match_offers_with_promo, 'apply_async') as apply_async, \
+                django_capture_on_commit_callbacks(execute=True):
+            DealerPromoModel.objects.create(start_date=start_date, **promo_data)
+        assert apply_async.call_count == int(dispatched)
+        if dispatched:
+            assert timezone.is_aware(apply_async.call_args.kwargs['eta'])
+
+
+def test_skipped_dispatch_is_logged(all_profiles, django_capture_on_commit_callbacks, caplog):
+    with caplog.at_level(logging.WARNING), \
+            patch.object(task_match_offers_with_promo, 'apply_async') as apply_async, \
+            django_capture_on_commit_callbacks(execute=True):
+        DealerPromoModel.objects.create(promo_name='promo', promo_description='promo',
+                                        discount_size=10, start_date=timezone.now(),
+                                        end_date=timezone.now() + datetime.timedelta(days=1),
+                                        creator=all_profiles['dealer']['profile_instance'])
+    assert not apply_async.called
+    assert 'match_offers_with_dealer_promo is not dispatched' in caplog.text
+
+
+def test_celery_dispatching_requires_shared_cache():
+    with override_settings(CELERY_BROKER_URL='redis://redis:6379/0'):
+        assert [error.id for error in shared_cache_checker(None)] == ['root.E001']
+        with override_settings(CACHES={'default': {
+                'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+                'LOCATION': 'redis://redis:6379/1'}}):
+            assert not shared_cache_checker(None)
+    with override_settings(CELERY_BROKER_URL=None):
+        assert not shared_cache_checker(None)
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class PromosConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "promo"
+
+    def ready(self):
+        # pylint: disable=import-outside-toplevel, unused-import
+        from . import signals  # noqa: F401
@@ -2,7 +2,7 @@
 
 from django.db import models
 from django.db.models import (CharField, DateTimeField, DecimalField,
-                              ForeignKey, ManyToManyField, TextField)
+                              ForeignKey, Index, ManyToManyField, Q, TextField)
 from root.common.models import BaseModel
 
 
@@ -22,8 +22,24 @@ class DealerPromoModel(BasePromoModel):
     promo_cars: ManyToManyField = ManyToManyField('car_park.DealerCarParkModel')
     creator: ForeignKey = ForeignKey('user.AutoDealerModel', on_delete=models.CASCADE)
 
+    class Meta:
+        indexes = [Index(fields=['end_date', 'start_date'],
+                         condition=Q(is_active=True),
+                         name='dealer_promo_window_idx'),
+                   Index(fields=['creator', 'end_date'],
+                         condition=Q(is_active=True),
+                         name='dealer_promo_owner_idx')]
+
 
 class SellerPromoModel(BasePromoModel):
     promo_cars: ManyToManyField = ManyToManyField('car_park.SellerCarParkModel')
     promo_aims: ManyToManyField = ManyToManyField('user.AutoDealerModel')
     creator: ForeignKey = ForeignKey('user.AutoSellerModel', on_delete=models.CASCADE)
+
+    class Meta:
+        indexes = [Index(fields=['end_date', 'start_date'],
+                         condition=Q(is_active=True),
+                         name='seller_promo_window_idx'),
+                   Index(fields=['creator', 'end_date'],
+                         condition=Q(is_active=True),
+                         name='seller_promo_owner_idx')]
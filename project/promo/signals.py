@@ -0,0 +1,17 @@
+"""This module contains signal receivers invalidating cached dealer promos responses"""
+
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from root.common.response_cache import response_cache_invalidator
+
+from .models import DealerPromoModel
+
+
+@receiver(post_save, sender=DealerPromoModel)
+@receiver(post_delete, sender=DealerPromoModel)
+@receiver(m2m_changed, sender=DealerPromoModel.promo_cars.through)
+@receiver(m2m_changed, sender=DealerPromoModel.promo_aims.through)
+def invalidate_dealer_promos_responses(sender, **kwargs):
+    """Makes cached dealer promos responses stale after dealer promo (or its cars
+    and aims) change"""
+    response_cache_invalidator(DealerPromoModel)
@@ -3,6 +3,8 @@
 import pytest
 from django.urls import reverse
 
+from .models import DealerPromoModel
+
 pytestmark = pytest.mark.django_db
 
 
@@ -290,3 +292,17 @@ def test_promo_own_ordering_filters(seller_promo, dealer_promo, client,
     assert response.status_code == 200
     assert float(response.data[0]['discount_size']) >= \
            float(response.data[1]['discount_size'])
+
+
+def test_dealer_promos_list_query_count_does_not_grow_with_promos(
+        all_profiles, dealer_promo, car_parks, promo_data, list_queries_counter, client,
+        django_capture_on_commit_callbacks):
+    client.force_authenticate(all_profiles['buyer']['profile_instance'].user)
+    queries_number = list_queries_counter(reverse('dealer-promo-list'))
+    with django_capture_on_commit_callbacks(execute=True):
+        for _ in range(5):
+            promo_data['promo_name'] = f"{promo_data['promo_name']}1"
+            promo = DealerPromoModel.objects.create(**promo_data)
+            promo.promo_cars.add(car_parks['dealer_park'])
+            promo.promo_aims.add(all_profiles['buyer']['profile_instance'])
+    assert list_queries_counter(reverse('dealer-promo-list')) == queries_number
@@ -2,6 +2,7 @@ from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters
 from root.common.permissions import (IsDealer, IsOwnerOrAdmin, IsSeller,
                                      IsVerified)
+from root.common.response_cache import CachedResponseMixin
 from root.common.views import BaseCRUDView, BaseReadOnlyView
 from user.models import AutoDealerModel, AutoSellerModel
 
@@ -10,7 +11,7 @@ from .promo_filter import PromoFilterDealer, PromoFilterSeller
 from .serializers import DealersPromoSerializer, SellersPromoSerializer
 
 
-class DealerPromoReadOnlyView(BaseReadOnlyView):
+class DealerPromoReadOnlyView(CachedResponseMixin, BaseReadOnlyView):
     serializer = DealersPromoSerializer
     model = DealerPromoModel
     filterset_class = PromoFilterDealer
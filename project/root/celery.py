@@ -5,6 +5,7 @@ import os
 
 from celery import Celery
 from celery.schedules import crontab
+from django.conf import settings
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'root.settings')
 
@@ -21,7 +22,24 @@ def debug_task(self):
     print(f'Request: {self.request}')
 
 
+@app.task(name='workers_heartbeat')
+def task_workers_heartbeat():
+    """Marks celery workers as running for web process task dispatchers"""
+    # pylint: disable=import-outside-toplevel
+    from root.common.task_dispatch import workers_heartbeat_updater
+    workers_heartbeat_updater()
+
+
 app.conf.beat_schedule = {
+    'mark_workers_running_every_thirty_seconds': {
+        'task': 'workers_heartbeat',
+        'schedule': 30.0,
+    },
+    # Safety net for offers, missed by event driven matching, settles them in batch
+    'clear_open_offers_every_ten_minutes': {
+        'task': 'clear_open_offers',
+        'schedule': float(settings.OPEN_OFFERS_SWEEP_INTERVAL),
+    },
     'evaluate_best_sellers_for_dealers_every_hour': {
         'task': 'find_suit_sellers_for_dealers',
         'schedule': 3600.0,
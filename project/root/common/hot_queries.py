@@ -0,0 +1,102 @@
+"""This module contains hot queries of tasks, filters and views, which composite and partial
+models indexes are designed for, and reporting of their database query plans"""
+
+import datetime
+from dataclasses import dataclass
+from typing import Callable
+
+from car_market.models import MarketAvailableCarModel
+from car_park.models import DealerCarParkModel, SellerCarParkModel
+from django.db.models import QuerySet
+from django.utils import timezone
+from offer.models import OfferModel
+from promo.models import DealerPromoModel, SellerPromoModel
+from sales_history.models import (CarBuyerHistoryModel, DealerSalesHistoryModel,
+                                  SellerSalesHistoryModel)
+from user.models import BuyerFromDealerPurchaseNumber, DealerFromSellerPurchaseNumber
+
+
+@dataclass(frozen=True)
+class HotQuery:
+    """Description of hot query: its name, creator of queryset with the query shape and
+    name of index the query is expected to use"""
+    name: str
+    queryset_creator: Callable[[], QuerySet]
+    index_name: str
+
+
+HOT_QUERIES = (
+    HotQuery('parks_to_buy_from',
+             lambda: DealerCarParkModel.objects.filter(car_model=0, available_number__gt=0),
+             'dealer_park_stock_idx'),
+    HotQuery('dealer_own_parks',
+             lambda: DealerCarParkModel.objects.filter(dealer=0, car_model=0),
+             'dealer_park_owner_idx'),
+    HotQuery('seller_parks_of_cars',
+             lambda: SellerCarParkModel.objects.filter(car_model__in=[0]),
+             'seller_park_stock_idx'),
+    HotQuery('sellers_parks_of_cars',
+             lambda: SellerCarParkModel.objects.filter(seller__in=[0], car_model__in=[0]),
+             'seller_park_owner_idx'),
+    HotQuery('dealer_sales_history',
+             lambda: DealerSalesHistoryModel.objects.
+             filter(dealer=0, date__gte=datetime.date.today()),
+             'dealer_history_date_idx'),
+    HotQuery('seller_sales_history',
+             lambda: SellerSalesHistoryModel.objects.
+             filter(seller=0, date__gte=datetime.date.today()),
+             'seller_history_date_idx'),
+    HotQuery('dealer_purchases_history',
+             lambda: SellerSalesHistoryModel.objects.
+             filter(car_buyer=0, date__gte=datetime.date.today()),
+             'seller_buyer_date_idx'),
+    HotQuery('buyer_purchases_history',
+             lambda: CarBuyerHistoryModel.objects.
+             filter(buyer=0, date__gte=datetime.date.today()),
+             'buyer_history_date_idx'),
+    HotQuery('dealer_current_promos',
+             lambda: DealerPromoModel.objects.
+             filter(end_date__gte=timezone.now(), start_date__lte=timezone.now()),
+             'dealer_promo_window_idx'),
+    HotQuery('seller_current_promos',
+             lambda: SellerPromoModel.objects.
+             filter(end_date__gte=timezone.now(), start_date__lte=timezone.now()),
+             'seller_promo_window_idx'),
+    HotQuery('dealer_own_promos',
+             lambda: DealerPromoModel.objects.filter(creator=0, end_date__gte=timezone.now()),
+             'dealer_promo_owner_idx'),
+    HotQuery('seller_own_promos',
+             lambda: SellerPromoModel.objects.filter(creator=0, end_date__gte=timezone.now()),
+             'seller_promo_owner_idx'),
+    HotQuery('offers_order_book',
+             lambda: OfferModel.objects.filter(car_model=0, max_price__gte=0).
+             order_by('-max_price', 'created_at', 'id'),
+             'offer_order_book_idx'),
+    HotQuery('buyers_offers_of_car',
+             lambda: OfferModel.objects.filter(creator__in=[0], car_model=0),
+             'offer_creator_idx'),
+    HotQuery('spec_suitable_cars',
+             lambda: MarketAvailableCarModel.objects.
+             filter(year_of_production__gte=0, engine_volume__gte=0),
+             'market_car_spec_idx'),
+    HotQuery('dealer_from_seller_purchase_number',
+             lambda: DealerFromSellerPurchaseNumber.objects.filter(seller=0, dealer=0),
+             'dealer_seller_purchases_idx'),
+    HotQuery('buyer_from_dealer_purchase_number',
+             lambda: BuyerFromDealerPurchaseNumber.objects.filter(buyer=0, dealer=0),
+             'buyer_dealer_purchases_idx'),
+)
+
+
+def hot_queries_plans_reporter(names: list[str] | None = None,
+                               **explain_options) -> list[tuple[HotQuery, str, bool]]:
+    """Takes optional names of hot queries (all queries by default) and database specific
+    EXPLAIN options and returns list of hot queries with their query plans and flags,
+    if the plans use expected indexes"""
+    reports = []
+    for hot_query in HOT_QUERIES:
+        if names and hot_query.name not in names:
+            continue
+        plan = hot_query.queryset_creator().explain(**explain_options)
+        reports.append((hot_query, plan, hot_query.index_name in plan))
+    return reports
@@ -0,0 +1,47 @@
+"""This module contains cursor (keyset) pagination and streaming of base views lists"""
+
+import json
+
+from django.conf import settings
+from django.db.models import QuerySet
+from django.http import StreamingHttpResponse
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+from rest_framework.serializers import ModelSerializer
+from rest_framework.utils.encoders import JSONEncoder
+
+
+class LinkHeaderCursorPagination(CursorPagination):
+    """Cursor pagination, ordered by ordering already applied to listed queryset (or by
+    requested ordering) followed by object id, which keeps list response body as it was
+    (a list of objects) and passes links to the next and previous pages in Link header;
+    cursor holds position of the first ordering field and offset among objects with the
+    same value of it, id only makes order of such objects deterministic"""
+    page_size = settings.LIST_PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = settings.LIST_MAX_PAGE_SIZE
+    ordering = 'id'
+
+    def get_ordering(self, request, queryset, view) -> tuple:
+        ordering = tuple(queryset.query.order_by)
+        if not ordering or any(not isinstance(field, str) or '__' in field
+                               for field in ordering):
+            ordering = super().get_ordering(request, queryset, view)
+        if not {'id', '-id', 'pk', '-pk'} & set(ordering):
+            ordering = ordering + ('id',)
+        return ordering
+
+    def get_paginated_response(self, data) -> Response:
+        links = [f'<{url}>; rel="{rel}"'
+                 for rel, url in (('next', self.get_next_link()),
+                                  ('prev', self.get_previous_link())) if url]
+        return Response(data, headers={'Link': ', '.join(links)} if links else None)
+
+
+def ndjson_response_creator(objects: QuerySet,
+                            serializer: type[ModelSerializer]) -> StreamingHttpResponse:
+    """Takes queryset and serializer and returns response streaming serialized objects
+    as newline delimited json, objects are loaded from database in chunks"""
+    lines = (json.dumps(serializer(obj).data, cls=JSONEncoder) + '\n'
+             for obj in objects.iterator(chunk_size=settings.LIST_PAGE_SIZE))
+    return StreamingHttpResponse(lines, content_type='application/x-ndjson')
@@ -4,8 +4,9 @@ from car_spec.models import DealerSearchCarSpecificationModel
 from discount.models import RegularCustomerDiscountLevelsModel
 from rest_framework import permissions
 from rest_framework.request import Request
-from user.models import (AutoDealerModel, AutoSellerModel, CarBuyerModel,
-                         CustomUserModel)
+from user.models import AutoDealerModel, AutoSellerModel, CustomUserModel
+
+from .profiles import request_profile_getter
 
 
 class CustomUserRequest(Request):
@@ -16,15 +17,13 @@ class UserHasNoProfile(permissions.BasePermission):
     message = 'You already have profile'
 
     def has_permission(self, request: CustomUserRequest, view) -> bool:
-        return not bool(AutoDealerModel.objects.get_or_none(user=request.user) or
-                        AutoSellerModel.objects.get_or_none(user=request.user) or
-                        CarBuyerModel.objects.get_or_none(user=request.user))
+        return not bool(request_profile_getter(request))
 
 
 class SellerHasNoDiscountSet(permissions.BasePermission):
 
     def has_permission(self, request: CustomUserRequest, view) -> bool:
-        seller = AutoSellerModel.objects.get_or_none(user=request.user)
+        seller = request_profile_getter(request, AutoSellerModel)
         if seller:
             return not bool(RegularCustomerDiscountLevelsModel.objects.get_or_none(seller=seller))
         return False
@@ -41,26 +40,25 @@ class CurrentDealerHasNoSpec(permissions.BasePermission):
     message = 'You already have a specification'
 
     def has_permission(self, request: CustomUserRequest, view) -> bool:
-        user = request.user
-        current_dealer = AutoDealerModel.objects.get(user=user)
+        current_dealer = request_profile_getter(request, AutoDealerModel) or \
+            AutoDealerModel.objects.get(user=request.user)
         return not \
             bool(DealerSearchCarSpecificationModel.objects.get_or_none(dealer=current_dealer))
 
 
 class IsOwnerOrAdmin(permissions.BasePermission):
+    owner_fields = ('user', 'dealer', 'seller', 'buyer', 'creator')
+
     def has_object_permission(self, request: CustomUserRequest, view, obj) -> bool:
         if request.user and bool(request.user.is_staff):
             return True
-        if hasattr(obj, 'user'):
-            return obj.user == request.user
-        elif hasattr(obj, 'dealer'):
-            return obj.dealer.user == request.user
-        elif hasattr(obj, 'seller'):
-            return obj.seller.user == request.user
-        elif hasattr(obj, 'buyer'):
-            return obj.buyer.user == request.user
-        elif hasattr(obj, 'creator'):
-            return obj.creator.user == request.user
+        for owner_field in self.owner_fields:
+            if hasattr(type(obj), owner_field):
+                field = obj._meta.get_field(owner_field)
+                if owner_field == 'user':
+                    return getattr(obj, field.attname) == request.user.pk
+                owner = request_profile_getter(request, field.related_model)
+                return bool(owner) and getattr(obj, field.attname) == owner.pk
         return False
 
 
@@ -0,0 +1,40 @@
+"""This module contains per request resolution of user profiles, shared by permissions
+and views, so that profile of request user is loaded from database only once"""
+
+from django.db.models import Model
+from rest_framework.request import Request
+from user.models import (AutoDealerModel, AutoSellerModel, BaseModel,
+                         CarBuyerModel, CustomUserModel)
+
+PROFILE_MODELS: dict[str, type[BaseModel]] = {'DEALER': AutoDealerModel,
+                                              'SELLER': AutoSellerModel,
+                                              'BUYER': CarBuyerModel}
+
+
+def user_profile_finder(user: CustomUserModel) -> BaseModel | None:
+    """Takes user and returns his profile, looked up in profile table of his user type
+    (staff users may have profile of any type), returns None if user has no profile"""
+    if not user or not user.is_authenticated:
+        return None
+    if user.user_type in PROFILE_MODELS and not user.is_staff:
+        profile_models = [PROFILE_MODELS[user.user_type]]
+    else:
+        profile_models = list(PROFILE_MODELS.values())
+    for profile_model in profile_models:
+        profile = profile_model.objects.get_or_none(user=user)
+        if profile:
+            return profile
+    return None
+
+
+def request_profile_getter(request: Request,
+                           profile_model: type[BaseModel | Model] | None = None) -> \
+        BaseModel | Model | None:
+    """Takes request and optionally expected profile model and returns profile of request
+    user, which is resolved once per request and exposed as request.user_profile"""
+    if not hasattr(request, 'user_profile'):
+        request.user_profile = user_profile_finder(request.user)
+    profile = request.user_profile
+    if profile_model and not isinstance(profile, profile_model):
+        return profile_model.objects.get_or_none(user=request.user)
+    return profile
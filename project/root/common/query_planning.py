@@ -0,0 +1,80 @@
+"""This module contains planning of select_related and prefetch_related lookups of base
+views querysets, made from fields of serializers the querysets are listed with"""
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Model, Prefetch, QuerySet
+from rest_framework.serializers import (BaseSerializer, ListSerializer,
+                                        ManyRelatedField, ModelSerializer,
+                                        RelatedField)
+
+_serializers_plans: dict[type, tuple[tuple[str, ...], tuple]] = {}
+
+
+def forward_relations_path_getter(model: type[Model], source: str) -> str | None:
+    """Takes model and dotted source of serializer field and returns lookup path of
+    forward foreign key and one to one relations, passed by the source, if there are any"""
+    relations = []
+    for attribute in source.split('.')[:-1]:
+        try:
+            field = model._meta.get_field(attribute)
+        except FieldDoesNotExist:
+            break
+        if not (field.many_to_one or field.one_to_one) or field.auto_created:
+            break
+        relations.append(attribute)
+        model = field.related_model
+    return '__'.join(relations) or None
+
+
+def serializer_relations_planner(serializer: BaseSerializer,
+                                 model: type[Model],
+                                 prefix: str = '') -> tuple[list[str], list]:
+    """Takes serializer, model it serializes and lookup prefix and returns lists of
+    select_related and prefetch_related lookups needed to serialize model objects
+    without additional queries per object"""
+    select_related, prefetch_related = [], []
+    for field in serializer.fields.values():
+        if field.write_only or field.source == '*':
+            continue
+        if isinstance(field, ManyRelatedField):
+            try:
+                related_model = model._meta.get_field(field.source).related_model
+            except FieldDoesNotExist:
+                continue
+            if isinstance(field.child_relation, RelatedField) and \
+                    field.child_relation.use_pk_only_optimization():
+                queryset = related_model._default_manager.only('pk')
+            else:
+                queryset = related_model._default_manager.all()
+            prefetch_related.append(Prefetch(prefix + field.source, queryset=queryset))
+        elif isinstance(field, ListSerializer) and isinstance(field.child, ModelSerializer):
+            prefetch_related.append(prefix + field.source)
+        elif isinstance(field, ModelSerializer):
+            select_related.append(prefix + field.source)
+            nested_select, nested_prefetch = \
+                serializer_relations_planner(field, field.Meta.model,
+                                             f'{prefix}{field.source}__')
+            select_related.extend(nested_select)
+            prefetch_related.extend(nested_prefetch)
+        elif '.' in field.source:
+            relations_path = forward_relations_path_getter(model, field.source)
+            if relations_path:
+                select_related.append(prefix + relations_path)
+    return select_related, prefetch_related
+
+
+def serializer_queryset_planner(queryset: QuerySet,
+                                serializer_class: type[ModelSerializer]) -> QuerySet:
+    """Takes queryset and model serializer, it is going to be listed with, and returns
+    queryset with select_related and prefetch_related lookups planned (once per
+    serializer) from the serializer fields"""
+    if serializer_class not in _serializers_plans:
+        select_related, prefetch_related = \
+            serializer_relations_planner(serializer_class(), queryset.model)
+        _serializers_plans[serializer_class] = (tuple(select_related), tuple(prefetch_related))
+    select_related, prefetch_related = _serializers_plans[serializer_class]
+    if select_related:
+        queryset = queryset.select_related(*select_related)
+    if prefetch_related:
+        queryset = queryset.prefetch_related(*prefetch_related)
+    return queryset
@@ -0,0 +1,97 @@
+"""This module contains shared (redis) cache of read only views responses, keyed on
+normalized request query params and versioned per model, with ETag support"""
+
+import hashlib
+import json
+import time
+from typing import Callable, Type
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Model
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+RESPONSE_CACHE_PREFIX = 'response_cache'
+CACHED_HEADERS = ('Link',)
+
+
+def model_version_key_creator(model: Type[Model]) -> str:
+    """Takes model class and returns cache key of its cached responses version"""
+    return f'{RESPONSE_CACHE_PREFIX}_version:{model._meta.label_lower}'
+
+
+def models_versions_getter(models: tuple[Type[Model], ...]) -> list[int]:
+    """Takes model classes and returns current versions of their cached responses,
+    versions missing in cache are initialized"""
+    keys = [model_version_key_creator(model) for model in models]
+    versions = cache.get_many(keys)
+    for key in set(keys) - set(versions):
+        cache.add(key, time.time_ns(), None)
+        versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def response_cache_invalidator(model: Type[Model]):
+    """Takes model class and makes all cached responses built from its data stale,
+    after current transaction commit"""
+    transaction.on_commit(lambda: cache.set(model_version_key_creator(model),
+                                            time.time_ns(), None))
+
+
+def response_cache_key_creator(request: Request, models: tuple[Type[Model], ...]) -> str:
+    """Takes request and model classes, whose data is listed in response, and returns
+    cache key of response, which does not depend on query params order and empty params"""
+    query_params = sorted((param, value)
+                          for param, values in request.query_params.lists()
+                          for value in values if value != '')
+    request_hash = hashlib.md5(f'{request.build_absolute_uri(request.path)}?'
+                               f'{urlencode(query_params)}'.encode()).hexdigest()
+    versions = '.'.join(str(version) for version in models_versions_getter(models))
+    return f'{RESPONSE_CACHE_PREFIX}:{versions}:{request_hash}'
+
+
+def response_etag_creator(data) -> str:
+    """Takes response data and returns quoted ETag of its content"""
+    return quote_etag(hashlib.md5(json.dumps(data, cls=JSONEncoder).encode()).hexdigest())
+
+
+class CachedResponseMixin:
+    """Serves list and retrieve responses of read only views from shared cache, which
+    is invalidated on changes of cached models (view model by default)"""
+    model: Type[Model]
+    cached_models: tuple[Type[Model], ...] | None = None
+    stream_query_param: str
+
+    def cached_response_getter(self, request: Request, handler: Callable,
+                               *args) -> Response:
+        if request.query_params.get(self.stream_query_param):
+            return handler(request, *args)
+        key = response_cache_key_creator(request, self.cached_models or (self.model,))
+        cached_response = cache.get(key)
+        if cached_response is None:
+            response = handler(request, *args)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            cached_response = {'data': response.data,
+                               'etag': response_etag_creator(response.data),
+                               'headers': {header: response[header]
+                                           for header in CACHED_HEADERS
+                                           if response.has_header(header)}}
+            cache.set(key, cached_response, settings.RESPONSE_CACHE_TIMEOUT)
+        headers = {'ETag': cached_response['etag'], **cached_response['headers']}
+        if cached_response['etag'] in \
+                parse_etags(request.headers.get('If-None-Match', '')):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(cached_response['data'], headers=headers)
+
+    def list(self, request: Request) -> Response:
+        return self.cached_response_getter(request, super().list)
+
+    def retrieve(self, request: Request, pk: int) -> Response:
+        return self.cached_response_getter(request, super().retrieve, pk)
@@ -0,0 +1,91 @@
+"""This module contains search filter backed by PostgreSQL pg_trgm trigram indexes, which
+finds objects by substrings or similar words of their search fields and ranks them by
+similarity to search terms, on other databases it works as DRF search filter"""
+
+import operator
+from functools import reduce
+from typing import Callable, Type
+
+from django.apps import AppConfig
+from django.contrib.postgres.lookups import TrigramWordSimilar
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.db import connections
+from django.db.models import Model, Q, QuerySet
+from django.db.models.functions import Greatest, Upper
+from django.db.models.lookups import Contains
+from rest_framework import filters
+
+
+def trigram_indexes_sql_creator(model: Type[Model],
+                                quote_name: Callable[[str], str]) -> list[str]:
+    """Takes model, which declares its searched text fields names mapped to names of their
+    indexes in trigram_indexes attribute, and database quote name function and returns
+    statements creating missing trigram GIN indexes of upper cased fields values (serving
+    case insensitive contains and trigram similarity lookups)"""
+    return [f'CREATE INDEX IF NOT EXISTS {quote_name(index_name)} '
+            f'ON {quote_name(model._meta.db_table)} '
+            f'USING gin (UPPER({quote_name(model._meta.get_field(field).column)}) '
+            f'gin_trgm_ops)'
+            for field, index_name in getattr(model, 'trigram_indexes', {}).items()]
+
+
+def trigram_extension_creator(using: str, **kwargs):
+    """Creates pg_trgm extension before migrations of PostgreSQL database, so trigram
+    indexes can be created after them"""
+    connection = connections[using]
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+
+
+def trigram_indexes_creator(app_config: AppConfig, using: str, **kwargs):
+    """Creates missing trigram indexes of app models after migrations of PostgreSQL
+    database, the indexes are not part of models state, so migrations generated on any
+    database are the same"""
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        tables = connection.introspection.table_names(cursor)
+        for model in app_config.get_models():
+            if model._meta.db_table in tables:
+                for statement in trigram_indexes_sql_creator(model, connection.ops.quote_name):
+                    cursor.execute(statement)
+
+
+class TrigramSearchFilter(filters.SearchFilter):
+    """Drop-in replacement of DRF search filter, which on PostgreSQL finds objects, whose
+    search fields contain every search term or a word similar to it, and orders them by
+    sum of terms similarities (requested ordering is applied over it), on other databases
+    or with prefixed search fields it works as DRF search filter"""
+    rank_field = 'search_rank'
+
+    def trigram_filter_queryset(self, queryset: QuerySet, search_fields: list[str],
+                                search_terms: list[str]) -> QuerySet:
+        """Takes queryset, search fields and search terms and returns queryset of objects,
+        whose search fields contain every term or a word similar to it, ordered by sum
+        of terms similarities"""
+        conditions, ranks = [], []
+        for term in search_terms:
+            term = term.upper()
+            conditions.append(reduce(operator.or_,
+                                     (Q(Contains(Upper(field), term)) |
+                                      Q(TrigramWordSimilar(Upper(field), term))
+                                      for field in search_fields)))
+            similarities = [TrigramWordSimilarity(term, Upper(field)) for field in search_fields]
+            ranks.append(Greatest(*similarities) if len(similarities) > 1 else similarities[0])
+        queryset = queryset.filter(reduce(operator.and_, conditions))
+        if self.must_call_distinct(queryset, search_fields):
+            queryset = queryset.distinct()
+        return queryset.annotate(**{self.rank_field: reduce(operator.add, ranks)}).\
+            order_by(f'-{self.rank_field}')
+
+    def filter_queryset(self, request, queryset: QuerySet, view) -> QuerySet:
+        search_fields = self.get_search_fields(view, request)
+        search_terms = self.get_search_terms(request)
+        if not search_fields or not search_terms or \
+                connections[queryset.db].vendor != 'postgresql' or \
+                any(str(field)[0] in self.lookup_prefixes for field in search_fields):
+            return super().filter_queryset(request, queryset, view)
+        return self.trigram_filter_queryset(queryset, [str(field) for field in search_fields],
+                                            search_terms)
@@ -0,0 +1,51 @@
+"""This module contains celery tasks dispatching helpers, which enqueue tasks only while
+celery workers are known to be running, judging by the heartbeat flag in shared cache"""
+
+import logging
+
+from celery import Task
+from django.conf import settings
+from django.core.cache import cache
+from django.core.checks import Error
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+WORKERS_HEARTBEAT_KEY = 'celery_workers_heartbeat'
+
+PROCESS_LOCAL_CACHE_BACKENDS = ('django.core.cache.backends.locmem.LocMemCache',
+                                'django.core.cache.backends.dummy.DummyCache')
+
+
+def workers_heartbeat_updater():
+    """Marks celery workers as running until the heartbeat timeout expires"""
+    cache.set(WORKERS_HEARTBEAT_KEY, True, settings.WORKERS_HEARTBEAT_TIMEOUT)
+
+
+def workers_are_running() -> bool:
+    """Returns whether celery workers have sent heartbeat recently"""
+    return bool(cache.get(WORKERS_HEARTBEAT_KEY))
+
+
+def task_on_commit_dispatcher(task: Task, args: list, **options) -> bool:
+    """Takes celery task, its arguments and apply_async options and enqueues the task
+    after current transaction commit if celery workers are running, returns whether
+    the task is going to be dispatched"""
+    if not workers_are_running():
+        logger.warning('Celery workers heartbeat is missing, task %s is not dispatched',
+                       task.name)
+        return False
+    transaction.on_commit(lambda: task.apply_async(args, **options))
+    return True
+
+
+def shared_cache_checker(app_configs, **kwargs) -> list[Error]:
+    """Django system check, which refuses to start with celery broker configured and
+    process local default cache, in which web processes never see workers heartbeat"""
+    if settings.CELERY_BROKER_URL and \
+            settings.CACHES['default']['BACKEND'] in PROCESS_LOCAL_CACHE_BACKENDS:
+        return [Error('Celery tasks dispatching needs cache shared by web and celery '
+                      'processes, but default cache is process local',
+                      hint='Set CACHE_URL to the redis shared with celery workers',
+                      id='root.E001')]
+    return []
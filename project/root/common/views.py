@@ -1,6 +1,7 @@
 from typing import Type
 
 from django.db.models import Model, QuerySet
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend, FilterSet
 from rest_framework import filters, status, viewsets
@@ -10,12 +11,33 @@ from rest_framework.serializers import ModelSerializer
 from rest_framework.views import APIView
 from user.models import BaseModel, CustomUserModel
 
+from .pagination import LinkHeaderCursorPagination, ndjson_response_creator
+from .profiles import request_profile_getter
+from .query_planning import serializer_queryset_planner
+from .search import TrigramSearchFilter
+
 
 class CustomRequest(Request):
     user: CustomUserModel
 
 
-class BaseReadOnlyView(viewsets.ViewSet):
+class PaginatedListMixin:
+    serializer: Type[ModelSerializer]
+    pagination_class: Type[LinkHeaderCursorPagination] = LinkHeaderCursorPagination
+    stream_query_param: str = 'stream'
+
+    def list_response_creator(self, request: CustomRequest,
+                              objects: QuerySet) -> Response | StreamingHttpResponse:
+        objects = serializer_queryset_planner(objects, self.serializer)
+        if request.query_params.get(self.stream_query_param) == 'ndjson':
+            return ndjson_response_creator(objects, self.serializer)
+        paginator = self.pagination_class()
+        page = paginator.paginate_queryset(objects, request, view=self)
+        serialized_objs = self.serializer(page, many=True)
+        return paginator.get_paginated_response(serialized_objs.data)
+
+
+class BaseReadOnlyView(PaginatedListMixin, viewsets.ViewSet):
     model: Type[BaseModel]
     serializer: Type[ModelSerializer]
     filterset_class: Type[FilterSet] | None = None
@@ -31,7 +53,7 @@ class BaseReadOnlyView(viewsets.ViewSet):
         else:
             objects = self.model.objects.all()
         if self.search_fields:
-            search = filters.SearchFilter()
+            search = TrigramSearchFilter()
             objects = search.filter_queryset(request=request,
                                              queryset=objects,
                                              view=self)
@@ -42,11 +64,9 @@ class BaseReadOnlyView(viewsets.ViewSet):
                                             view=self)
         return objects
 
-    def list(self, request: CustomRequest) -> Response:
+    def list(self, request: CustomRequest) -> Response | StreamingHttpResponse:
         filtered_objects = self.get_filtered_objects_list(request)
-        serialized_objs = self.serializer(filtered_objects,
-                                          many=True)
-        return Response(serialized_objs.data)
+        return self.list_response_creator(request, filtered_objects)
 
     def retrieve(self, request: CustomRequest, pk: int) -> Response:
         obj = get_object_or_404(self.model.objects.all(), id=pk)
@@ -68,7 +88,8 @@ class BaseOwnModelRUDView(APIView):
     user_model: Type[BaseModel | Model]
 
     def profile_getter(self, request: CustomRequest) -> BaseModel | Model:
-        user_profile = self.user_model.objects.get(user=request.user)
+        user_profile = request_profile_getter(request, self.user_model) or \
+            self.user_model.objects.get(user=request.user)
         return user_profile
 
     def get(self, request: CustomRequest) -> Response:
@@ -101,7 +122,7 @@ class BaseOwnModelRUDView(APIView):
         return self.serializer()
 
 
-class BaseOwnModelReadView(viewsets.ViewSet):
+class BaseOwnModelReadView(PaginatedListMixin, viewsets.ViewSet):
     model: Type[BaseModel]
     serializer: Type[ModelSerializer]
     user_type: str
@@ -119,7 +140,7 @@ class BaseOwnModelReadView(viewsets.ViewSet):
         else:
             objects = self.model.objects.all()
         if self.search_fields:
-            search = filters.SearchFilter()
+            search = TrigramSearchFilter()
             objects = search.filter_queryset(request=request,
                                              queryset=objects,
                                              view=self)
@@ -131,15 +152,15 @@ class BaseOwnModelReadView(viewsets.ViewSet):
         return objects
 
     def profile_getter(self, request: CustomRequest) -> BaseModel | Model:
-        user_profile = self.user_model.objects.get(user=request.user)
+        user_profile = request_profile_getter(request, self.user_model) or \
+            self.user_model.objects.get(user=request.user)
         return user_profile
 
-    def list(self, request: CustomRequest) -> Response:
+    def list(self, request: CustomRequest) -> Response | StreamingHttpResponse:
         profile = self.profile_getter(request)
         filtered_objects = self.get_filtered_objects_list(request)
         objs_set = filtered_objects.filter(**{self.user_type: profile})
-        serialized_objs = self.serializer(objs_set, many=True)
-        return Response(serialized_objs.data)
+        return self.list_response_creator(request, objs_set)
 
     def retrieve(self, request: CustomRequest, pk: int) -> Response:
         profile = self.profile_getter(request)
@@ -156,7 +177,7 @@ class BaseOwnModelReadView(viewsets.ViewSet):
         return self.serializer()
 
 
-class BaseCRUDView(viewsets.ViewSet):
+class BaseCRUDView(PaginatedListMixin, viewsets.ViewSet):
     model: Type[BaseModel]
     serializer: Type[ModelSerializer]
     user_data: str
@@ -174,7 +195,7 @@ class BaseCRUDView(viewsets.ViewSet):
         else:
             objects = self.model.objects.all()
         if self.search_fields:
-            search = filters.SearchFilter()
+            search = TrigramSearchFilter()
             objects = search.filter_queryset(request=request,
                                              queryset=objects,
                                              view=self)
@@ -186,7 +207,8 @@ class BaseCRUDView(viewsets.ViewSet):
         return objects
 
     def profile_getter(self, request: CustomRequest) -> BaseModel | Model:
-        user_profile = self.user_model.objects.get(user=request.user)
+        user_profile = request_profile_getter(request, self.user_model) or \
+            self.user_model.objects.get(user=request.user)
         return user_profile
 
     def retrieve(self, request: CustomRequest, pk: int) -> Response:
@@ -218,11 +240,10 @@ class BaseCRUDView(viewsets.ViewSet):
         serialized_obj.save(**user_data)
         return Response(serialized_obj.data, status=status.HTTP_201_CREATED)
 
-    def list(self, request: CustomRequest) -> Response:
+    def list(self, request: CustomRequest) -> Response | StreamingHttpResponse:
         filtered_objects = self.get_filtered_objects_list(request)
         objs = filtered_objects.filter(**{self.user_data: self.profile_getter(request)})
-        serialized_objs = self.serializer(objs, many=True)
-        return Response(serialized_objs.data)
+        return self.list_response_creator(request, objs)
 
     def get_serializer(self):
         """
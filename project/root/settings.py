@@ -161,6 +161,13 @@ REST_FRAMEWORK = {
     ),
 }
 
+# Base views lists are always split into cursor paginated pages of given size (page_size
+# query parameter may change it up to the max), whole lists should be consumed with
+# ?stream=ndjson, which does not load them into memory at once
+LIST_PAGE_SIZE = 100
+
+LIST_MAX_PAGE_SIZE = 1000
+
 AUTH_USER_MODEL = "user.CustomUserModel"
 
 SIMPLE_JWT = {
@@ -185,6 +192,43 @@ CELERY_TASK_SERIALIZER = 'json'
 
 CELERY_RESULT_SERIALIZER = 'json'
 
+# Redis cache shared by web and celery processes (task locks, flags, responses),
+# local memory cache is used when no cache url is given (e.g. during tests)
+if os.getenv('CACHE_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('CACHE_URL'),
+        }
+    }
+
+# Cached responses of public read only views live until their models change or timeout
+RESPONSE_CACHE_TIMEOUT = int(os.getenv('RESPONSE_CACHE_TIMEOUT', '300'))
+
+# Cached sales series live until profile rollups change or timeout
+SALES_SERIES_CACHE_TIMEOUT = int(os.getenv('SALES_SERIES_CACHE_TIMEOUT', '3600'))
+
+# Hourly suitable sellers search is split into shards of given number of dealers,
+# lock prevents overlapping runs (expires before the next beat tick)
+SUITABLE_SELLERS_SHARD_SIZE = int(os.getenv('SUITABLE_SELLERS_SHARD_SIZE', '500'))
+
+SUITABLE_SELLERS_LOCK_TIMEOUT = 3300
+
+# Deals pricing backend of hourly suitable sellers search: 'python' or 'numpy'
+# (requires numpy), numpy results may be verified against python Decimal pricing
+DEALS_PRICING_BACKEND = os.getenv('DEALS_PRICING_BACKEND', 'python')
+
+DEALS_PRICING_VERIFICATION = bool(os.getenv('DEALS_PRICING_VERIFICATION'))
+
+# Celery workers heartbeat flag is refreshed by beat task, tasks are dispatched from
+# web process (e.g. on model events) only while the flag is set, so the flag needs
+# the cache shared by web and celery processes (CACHE_URL)
+WORKERS_HEARTBEAT_TIMEOUT = 90
+
+# Open offers are settled by periodic sweep, matching of promos, which start later
+# than one sweep interval from now, is left to the sweep instead of being scheduled
+OPEN_OFFERS_SWEEP_INTERVAL = 600
+
 PASSWORD_RESET_TIMEOUT = 86400
 
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
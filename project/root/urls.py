@@ -41,6 +41,7 @@ urlpatterns = [
     path('offer/', include('offer.urls')),
     path('promo/', include('promo.urls')),
     path('discount/', include('discount.urls')),
+    path('stats/', include('auto_market_stats.urls')),
     path('debug_toolbar/', include('debug_toolbar.urls')),
     re_path(r'^swagger(?P<format>\.json|\.yaml)$',
             schema_view.without_ui(cache_timeout=0),
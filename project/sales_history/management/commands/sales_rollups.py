@@ -0,0 +1,18 @@
+"""This module contains management command rebuilding daily sales rollups from history"""
+
+from django.core.management.base import BaseCommand
+
+from ...rollups import daily_rollups_rebuilder
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds daily sales rollups from active sales history records'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--only-outdated', action='store_true',
+                            help='Rebuild only rollups, whose totals differ from totals of '
+                                 'history records (e.g. not built from existing history yet)')
+
+    def handle(self, *args, **options):
+        rollups_number = daily_rollups_rebuilder(only_outdated=options['only_outdated'])
+        self.stdout.write(self.style.SUCCESS(f'{rollups_number} daily sales rollups rebuilt'))
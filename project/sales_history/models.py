@@ -1,5 +1,5 @@
 from django.db import models
-from django.db.models import DateField, DecimalField, ForeignKey, IntegerField
+from django.db.models import DateField, DecimalField, ForeignKey, Index, IntegerField, Q
 from root.common.models import BaseModel
 
 
@@ -19,6 +19,11 @@ class DealerSalesHistoryModel(BaseSalesHistoryModel):
                                             on_delete=models.CASCADE)
     car_buyer: ForeignKey = ForeignKey('user.CarBuyerModel', on_delete=models.CASCADE)
 
+    class Meta:
+        indexes = [Index(fields=['dealer', 'date'],
+                         condition=Q(is_active=True),
+                         name='dealer_history_date_idx')]
+
 
 class SellerSalesHistoryModel(BaseSalesHistoryModel):
     seller: ForeignKey = ForeignKey('user.AutoSellerModel', on_delete=models.CASCADE)
@@ -26,6 +31,14 @@ class SellerSalesHistoryModel(BaseSalesHistoryModel):
                                             on_delete=models.CASCADE)
     car_buyer: ForeignKey = ForeignKey('user.AutoDealerModel', on_delete=models.CASCADE)
 
+    class Meta:
+        indexes = [Index(fields=['seller', 'date'],
+                         condition=Q(is_active=True),
+                         name='seller_history_date_idx'),
+                   Index(fields=['car_buyer', 'date'],
+                         condition=Q(is_active=True),
+                         name='seller_buyer_date_idx')]
+
 
 class CarBuyerHistoryModel(BaseModel):
     bought_car_model: ForeignKey = ForeignKey('car_park.DealerCarParkModel',
@@ -37,3 +50,63 @@ class CarBuyerHistoryModel(BaseModel):
     deal_sum: DecimalField = DecimalField(max_digits=12, decimal_places=2)
     buyer: ForeignKey = ForeignKey('user.CarBuyerModel', on_delete=models.CASCADE)
     date: DateField = DateField(auto_now_add=True)
+
+    class Meta:
+        indexes = [Index(fields=['buyer', 'date'],
+                         condition=Q(is_active=True),
+                         name='buyer_history_date_idx')]
+
+
+class BaseDailySalesRollupModel(models.Model):
+    date: DateField = DateField()
+    cars_quantity: IntegerField = IntegerField(default=0)
+    deal_sum: DecimalField = DecimalField(default=0, max_digits=20, decimal_places=2)
+    min_price: DecimalField = DecimalField(max_digits=12, decimal_places=2, null=True)
+    max_price: DecimalField = DecimalField(max_digits=12, decimal_places=2, null=True)
+
+    class Meta:
+        abstract = True
+
+
+class DealerDailySalesRollupModel(BaseDailySalesRollupModel):
+    dealer: ForeignKey = ForeignKey('user.AutoDealerModel', on_delete=models.CASCADE)
+    car_park: ForeignKey = ForeignKey('car_park.DealerCarParkModel', on_delete=models.CASCADE)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['dealer', 'car_park', 'date'],
+                                               name='dealer_daily_sales_rollup_key')]
+        indexes = [models.Index(fields=['dealer', 'date'],
+                                name='dealer_sales_rollup_date_idx')]
+
+
+class SellerDailySalesRollupModel(BaseDailySalesRollupModel):
+    seller: ForeignKey = ForeignKey('user.AutoSellerModel', on_delete=models.CASCADE)
+    car_park: ForeignKey = ForeignKey('car_park.SellerCarParkModel', on_delete=models.CASCADE)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['seller', 'car_park', 'date'],
+                                               name='seller_daily_sales_rollup_key')]
+        indexes = [models.Index(fields=['seller', 'date'],
+                                name='seller_sales_rollup_date_idx')]
+
+
+class DealerDailyPurchasesRollupModel(BaseDailySalesRollupModel):
+    dealer: ForeignKey = ForeignKey('user.AutoDealerModel', on_delete=models.CASCADE)
+    car_park: ForeignKey = ForeignKey('car_park.SellerCarParkModel', on_delete=models.CASCADE)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['dealer', 'car_park', 'date'],
+                                               name='dealer_daily_purchases_rollup_key')]
+        indexes = [models.Index(fields=['dealer', 'date'],
+                                name='dealer_purch_rollup_date_idx')]
+
+
+class BuyerDailyPurchasesRollupModel(BaseDailySalesRollupModel):
+    buyer: ForeignKey = ForeignKey('user.CarBuyerModel', on_delete=models.CASCADE)
+    car_park: ForeignKey = ForeignKey('car_park.DealerCarParkModel', on_delete=models.CASCADE)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['buyer', 'car_park', 'date'],
+                                               name='buyer_daily_purchases_rollup_key')]
+        indexes = [models.Index(fields=['buyer', 'date'],
+                                name='buyer_purch_rollup_date_idx')]
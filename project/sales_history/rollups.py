@@ -0,0 +1,233 @@
+"""This module contains daily rollups of sales history records (number of cars, sum of deals
+and min/max car price per profile, car park and date), which are updated incrementally with
+created history records and recalculated from history records after their change"""
+
+import datetime
+import time
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Iterable, Type
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Max, Min, Model, Sum
+
+from .models import (BaseDailySalesRollupModel, BuyerDailyPurchasesRollupModel,
+                     CarBuyerHistoryModel, DealerDailyPurchasesRollupModel,
+                     DealerDailySalesRollupModel, DealerSalesHistoryModel,
+                     SellerDailySalesRollupModel, SellerSalesHistoryModel)
+
+ROLLUP_TOTALS_FIELDS = ['cars_quantity', 'deal_sum', 'min_price', 'max_price']
+
+RollupKey = tuple[int, int, datetime.date]
+
+
+@dataclass(frozen=True)
+class RollupSpec:
+    """Description of daily rollup of history records model: history and rollup models,
+    names of history records profile, car park, cars quantity and car price fields and
+    name of rollup profile field"""
+    history_model: Type[Model]
+    rollup_model: Type[BaseDailySalesRollupModel]
+    profile_field: str
+    rollup_profile_field: str
+    car_park_field: str
+    quantity_field: str
+    price_field: str
+
+    def record_key(self, history_record: Model) -> RollupKey:
+        """Returns key of rollup, which history record belongs to"""
+        return (getattr(history_record, f'{self.profile_field}_id'),
+                getattr(history_record, f'{self.car_park_field}_id'),
+                history_record.date)
+
+    def rollup_key(self, rollup: BaseDailySalesRollupModel) -> RollupKey:
+        """Returns key of rollup"""
+        return getattr(rollup, f'{self.rollup_profile_field}_id'), rollup.car_park_id, \
+            rollup.date
+
+
+ROLLUP_SPECS = (
+    RollupSpec(DealerSalesHistoryModel, DealerDailySalesRollupModel,
+               'dealer', 'dealer', 'sold_car_model', 'sold_cars_quantity', 'selling_price'),
+    RollupSpec(SellerSalesHistoryModel, SellerDailySalesRollupModel,
+               'seller', 'seller', 'sold_car_model', 'sold_cars_quantity', 'selling_price'),
+    RollupSpec(SellerSalesHistoryModel, DealerDailyPurchasesRollupModel,
+               'car_buyer', 'dealer', 'sold_car_model', 'sold_cars_quantity', 'selling_price'),
+    RollupSpec(CarBuyerHistoryModel, BuyerDailyPurchasesRollupModel,
+               'buyer', 'buyer', 'bought_car_model', 'bought_quantity', 'car_price'),
+)
+
+
+def rollup_spec_getter(history_model: Type[Model], profile_field: str) -> RollupSpec:
+    """Takes history records model and name of its profile field and returns description
+    of daily rollup of the model records by this profile"""
+    return next(spec for spec in ROLLUP_SPECS
+                if spec.history_model is history_model and spec.profile_field == profile_field)
+
+
+def history_record_rollups_keys_getter(history_record: Model) -> dict[str, set[RollupKey]]:
+    """Takes history record and returns map of its profile fields names to keys of rollups,
+    which the record belongs to"""
+    return {spec.profile_field: {spec.record_key(history_record)} for spec in ROLLUP_SPECS
+            if spec.history_model is type(history_record)}
+
+
+def profile_rollups_version_key_creator(rollup_model: Type[BaseDailySalesRollupModel],
+                                        profile_id: int) -> str:
+    """Takes rollup model and profile id and returns cache key of version of profile rollups,
+    which is changed with every change of them"""
+    return f'sales_rollups_version:{rollup_model._meta.label_lower}:{profile_id}'
+
+
+def profiles_rollups_versions_updater(rollup_model: Type[BaseDailySalesRollupModel],
+                                      profile_ids: Iterable[int]):
+    """Takes rollup model and ids of profiles, whose rollups were changed, and changes
+    versions of their rollups after current transaction commit"""
+    keys = [profile_rollups_version_key_creator(rollup_model, profile_id)
+            for profile_id in set(profile_ids)]
+    transaction.on_commit(lambda: cache.set_many({key: time.time_ns() for key in keys}, None))
+
+
+def rollups_by_keys_getter(spec: RollupSpec, keys: Iterable[RollupKey],
+                           for_update: bool = False) -> dict[RollupKey,
+                                                             BaseDailySalesRollupModel]:
+    """Takes rollup description and rollup keys and returns map of keys to existing
+    rollups, optionally locking found rollups"""
+    keys = set(keys)
+    rollups = spec.rollup_model.objects.\
+        filter(**{f'{spec.rollup_profile_field}_id__in': {key[0] for key in keys}},
+               car_park_id__in={key[1] for key in keys},
+               date__in={key[2] for key in keys})
+    if for_update:
+        rollups = rollups.select_for_update().order_by('pk')
+    return {spec.rollup_key(rollup): rollup for rollup in rollups
+            if spec.rollup_key(rollup) in keys}
+
+
+def history_records_deltas_collector(spec: RollupSpec, history_records: list[Model]) \
+        -> dict[RollupKey, dict[str, int | Decimal]]:
+    """Takes rollup description and created history records and returns map of rollup keys
+    to number of cars, sum of deals and min/max price of active records"""
+    deltas: dict[RollupKey, dict[str, int | Decimal]] = {}
+    for history_record in history_records:
+        if not history_record.is_active:
+            continue
+        price = Decimal(getattr(history_record, spec.price_field))
+        delta = deltas.setdefault(spec.record_key(history_record),
+                                  {'cars_quantity': 0, 'deal_sum': Decimal(0),
+                                   'min_price': price, 'max_price': price})
+        delta['cars_quantity'] += int(getattr(history_record, spec.quantity_field))
+        delta['deal_sum'] += Decimal(history_record.deal_sum)
+        delta['min_price'] = min(delta['min_price'], price)
+        delta['max_price'] = max(delta['max_price'], price)
+    return deltas
+
+
+def daily_rollups_updater(history_records: list[Model]):
+    """Takes created history records of one model and adds them to all daily rollups of
+    the model, missing rollups are created"""
+    if not history_records:
+        return
+    for spec in ROLLUP_SPECS:
+        if spec.history_model is not type(history_records[0]):
+            continue
+        deltas = history_records_deltas_collector(spec, history_records)
+        if not deltas:
+            continue
+        with transaction.atomic():
+            spec.rollup_model.objects.\
+                bulk_create([spec.rollup_model(**{f'{spec.rollup_profile_field}_id': key[0]},
+                                               car_park_id=key[1], date=key[2])
+                             for key in deltas], ignore_conflicts=True)
+            rollups = rollups_by_keys_getter(spec, deltas, for_update=True)
+            for key, rollup in rollups.items():
+                delta = deltas[key]
+                rollup.cars_quantity = int(rollup.cars_quantity) + delta['cars_quantity']
+                rollup.deal_sum = Decimal(rollup.deal_sum) + delta['deal_sum']
+                rollup.min_price = delta['min_price'] if rollup.min_price is None else \
+                    min(Decimal(rollup.min_price), delta['min_price'])
+                rollup.max_price = delta['max_price'] if rollup.max_price is None else \
+                    max(Decimal(rollup.max_price), delta['max_price'])
+            spec.rollup_model.objects.bulk_update(rollups.values(), ROLLUP_TOTALS_FIELDS)
+            profiles_rollups_versions_updater(spec.rollup_model, (key[0] for key in deltas))
+
+
+def rollups_totals_calculator(spec: RollupSpec, history_records):
+    """Takes rollup description and history records queryset and returns queryset of rollup
+    totals of active records grouped by rollup keys"""
+    return history_records.\
+        values(spec.profile_field, spec.car_park_field, 'date').\
+        annotate(cars_quantity=Sum(spec.quantity_field),
+                 deal_sum=Sum('deal_sum'),
+                 min_price=Min(spec.price_field),
+                 max_price=Max(spec.price_field)).\
+        order_by()
+
+
+def rollup_creator(spec: RollupSpec, totals: dict) -> BaseDailySalesRollupModel:
+    """Takes rollup description and rollup totals of history records and returns
+    (not saved) rollup"""
+    return spec.rollup_model(**{f'{spec.rollup_profile_field}_id': totals[spec.profile_field]},
+                             car_park_id=totals[spec.car_park_field],
+                             date=totals['date'],
+                             **{field: totals[field] for field in ROLLUP_TOTALS_FIELDS})
+
+
+def daily_rollups_recalculator(history_model: Type[Model], keys: dict[str, set[RollupKey]]):
+    """Takes history records model and map of its profile fields names to keys of rollups,
+    whose history records were changed or deleted, and recalculates those rollups from
+    active history records"""
+    for spec in ROLLUP_SPECS:
+        spec_keys = keys.get(spec.profile_field)
+        if spec.history_model is not history_model or not spec_keys:
+            continue
+        history_records = history_model.objects.\
+            filter(**{f'{spec.profile_field}_id__in': {key[0] for key in spec_keys},
+                      f'{spec.car_park_field}_id__in': {key[1] for key in spec_keys}},
+                   date__in={key[2] for key in spec_keys})
+        with transaction.atomic():
+            rollups = rollups_by_keys_getter(spec, spec_keys, for_update=True)
+            spec.rollup_model.objects.filter(pk__in=[rollup.pk for rollup in rollups.values()]).\
+                delete()
+            spec.rollup_model.objects.\
+                bulk_create([rollup_creator(spec, totals) for totals
+                             in rollups_totals_calculator(spec, history_records)
+                             if (totals[spec.profile_field], totals[spec.car_park_field],
+                                 totals['date']) in spec_keys])
+            profiles_rollups_versions_updater(spec.rollup_model, (key[0] for key in spec_keys))
+
+
+def rollups_outdated_checker(spec: RollupSpec) -> bool:
+    """Takes rollup description and returns True, if totals of its rollups differ from totals
+    of active history records (e.g. rollups were never built from history existing before
+    them), otherwise False"""
+    history_totals = spec.history_model.objects.\
+        aggregate(cars_quantity=Sum(spec.quantity_field), deal_sum=Sum('deal_sum'))
+    rollups_totals = spec.rollup_model.objects.\
+        aggregate(cars_quantity=Sum('cars_quantity'), deal_sum=Sum('deal_sum'))
+    return any(Decimal(history_totals[field] or 0) != Decimal(rollups_totals[field] or 0)
+               for field in ('cars_quantity', 'deal_sum'))
+
+
+def daily_rollups_rebuilder(only_outdated: bool = False) -> int:
+    """Recalculates all daily rollups (or only rollups, whose totals differ from history
+    records totals) from active history records and changes versions of rollups of all
+    profiles, which had or got rollups, returns number of created rollups"""
+    rollups_number = 0
+    with transaction.atomic():
+        for spec in ROLLUP_SPECS:
+            if only_outdated and not rollups_outdated_checker(spec):
+                continue
+            profile_id_field = f'{spec.rollup_profile_field}_id'
+            profile_ids = set(spec.rollup_model.objects.
+                              values_list(profile_id_field, flat=True).order_by().distinct())
+            spec.rollup_model.objects.all().delete()
+            rollups = spec.rollup_model.objects.\
+                bulk_create((rollup_creator(spec, totals) for totals in
+                             rollups_totals_calculator(spec, spec.history_model.objects.all())),
+                            batch_size=1000)
+            profile_ids.update(getattr(rollup, profile_id_field) for rollup in rollups)
+            profiles_rollups_versions_updater(spec.rollup_model, profile_ids)
+            rollups_number += len(rollups)
+    return rollups_number
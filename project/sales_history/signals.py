@@ -0,0 +1,47 @@
+"""This module contains signal receivers keeping daily sales rollups up to date with
+history records, which were created, changed or deleted one by one (history records
+created in bulk are added to rollups explicitly)"""
+
+from django.db.models import Model
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .models import CarBuyerHistoryModel, DealerSalesHistoryModel, SellerSalesHistoryModel
+from .rollups import (daily_rollups_recalculator, daily_rollups_updater,
+                      history_record_rollups_keys_getter)
+
+
+@receiver(pre_save, sender=DealerSalesHistoryModel)
+@receiver(pre_save, sender=SellerSalesHistoryModel)
+@receiver(pre_save, sender=CarBuyerHistoryModel)
+def remember_history_record_previous_rollups(sender, instance: Model, **kwargs):
+    """Stores keys of rollups, which the changed history record belonged to before
+    its change"""
+    instance.previous_rollups_keys = {}
+    if instance.pk:
+        previous_record = sender.objects.filter(pk=instance.pk).first()
+        if previous_record:
+            instance.previous_rollups_keys = history_record_rollups_keys_getter(previous_record)
+
+
+@receiver(post_save, sender=DealerSalesHistoryModel)
+@receiver(post_save, sender=SellerSalesHistoryModel)
+@receiver(post_save, sender=CarBuyerHistoryModel)
+def update_rollups_with_history_record(sender, instance: Model, created: bool, **kwargs):
+    """Adds created history record to rollups or recalculates rollups, which changed
+    history record belonged to before and after its change"""
+    if created:
+        daily_rollups_updater([instance])
+        return
+    keys = history_record_rollups_keys_getter(instance)
+    for profile_field, previous_keys in getattr(instance, 'previous_rollups_keys', {}).items():
+        keys[profile_field] |= previous_keys
+    daily_rollups_recalculator(sender, keys)
+
+
+@receiver(post_delete, sender=DealerSalesHistoryModel)
+@receiver(post_delete, sender=SellerSalesHistoryModel)
+@receiver(post_delete, sender=CarBuyerHistoryModel)
+def recalculate_rollups_without_history_record(sender, instance: Model, **kwargs):
+    """Recalculates rollups, which deleted history record belonged to"""
+    daily_rollups_recalculator(sender, history_record_rollups_keys_getter(instance))
@@ -5,45 +5,84 @@ from decimal import Decimal
 from car_market.models import MarketAvailableCarModel
 from car_park.models import DealerCarParkModel, SellerCarParkModel
 from car_spec.models import DealerSuitableCarModel, DealerSuitableSellerModel
-from car_spec.serializers import (DealerSuitableCarModelsSerializer,
-                                  DealerSuitableSellerSerializer)
 from celery import shared_task
 from django.db import transaction
-from django.db.models import QuerySet
+from django.db.models import Prefetch
 from django.utils import timezone
+from offer.tasks import task_match_offers_with_parks
 from promo.models import SellerPromoModel
-from promo.serializers import SellersPromoSerializer
+from root.common.response_cache import response_cache_invalidator
+from root.common.task_dispatch import task_on_commit_dispatcher
 from user.models import AutoDealerModel, DealerFromSellerPurchaseNumber
 
 from .models import SellerSalesHistoryModel
+from .rollups import daily_rollups_updater
 
 
-def selected_and_promo_car_prices_collector(promos: QuerySet[SellerPromoModel],
+def promo_prices_index_creator() -> dict[int, dict[int, list[dict[str, SellerCarParkModel |
+                                                                      Decimal]]]]:
+    """Loads all currently active seller promos with their promo car parks and aims at once
+    and returns map of dealer ids to their promo car parks with the best price (all parks
+    tied at this price) for each car model"""
+    now = timezone.now()
+    promo_parks = Prefetch('promo_cars',
+                           queryset=SellerCarParkModel.objects.
+                           select_related('seller', 'car_model').order_by('id'))
+    promos = SellerPromoModel.objects.filter(end_date__gte=now, start_date__lte=now). \
+        prefetch_related(promo_parks).order_by('id')
+    promo_aims = SellerPromoModel.promo_aims.through.objects. \
+        filter(sellerpromomodel__in=promos). \
+        values_list('sellerpromomodel_id', 'autodealermodel_id')
+    promo_dealers: dict[int, list[int]] = {}
+    for promo_id, dealer_id in promo_aims:
+        promo_dealers.setdefault(promo_id, []).append(dealer_id)
+    promo_prices: dict[int, dict[int, list[dict[str, SellerCarParkModel | Decimal]]]] = {}
+    for promo in promos:
+        for park in promo.promo_cars.all():
+            price = Decimal(park.car_price * (100 - Decimal(promo.discount_size)) / 100)
+            for dealer_id in promo_dealers.get(promo.pk, []):
+                dealer_prices = promo_prices.setdefault(dealer_id, {})
+                best_prices = dealer_prices.get(park.car_model_id)
+                if not best_prices or price < best_prices[0]['price']:
+                    dealer_prices[park.car_model_id] = [{'car_park': park, 'price': price}]
+                elif price == best_prices[0]['price']:
+                    best_prices.append({'car_park': park, 'price': price})
+    return promo_prices
+
+
+def seller_parks_index_creator(seller_ids: set[int],
+                               car_ids: set[int]) -> dict[int, list[SellerCarParkModel]]:
+    """Loads car parks of given sellers selling given cars at once and returns
+    map of seller ids to their car parks"""
+    seller_parks: dict[int, list[SellerCarParkModel]] = {}
+    parks = SellerCarParkModel.objects.filter(seller_id__in=seller_ids,
+                                              car_model_id__in=car_ids). \
+        select_related('seller', 'car_model').order_by('id')
+    for park in parks:
+        seller_parks.setdefault(park.seller_id, []).append(park)
+    return seller_parks
+
+
+def selected_and_promo_car_prices_collector(dealer_promo_prices: dict[int, list[dict]],
                                             suitable_cars: list[int],
                                             best_sellers: list[int],
-                                            best_seller_cars: list[int]) -> \
+                                            best_seller_cars: list[int],
+                                            seller_parks: dict[int,
+                                                               list[SellerCarParkModel]]) -> \
         list[dict[str, SellerCarParkModel | Decimal]] | list:
-    """Takes promo models, list of suitable for dealer cars, list of suitable for dealer sellers,
-    list of suitable seller's cars to buy and returns list of possible car prices (with or without
-    promo) for each evaluated seller car park (or empty list if there is no such cars in parks)"""
-    car_prices = []
-    for promo in promos:
-        promo_data = SellersPromoSerializer(promo).data
-        promo_discount = Decimal(promo_data['discount_size'])
-        promo_car_parks = [SellerCarParkModel.objects.get(id=car_park_id) for car_park_id
-                           in promo_data["promo_cars"] if
-                           SellerCarParkModel.objects.get(id=car_park_id).car_model.pk
-                           in suitable_cars]
-        for park in promo_car_parks:
-            car_prices.append({'car_park': park,
-                               'price': Decimal(park.car_price * (100 -
-                                                                  promo_discount) / 100)})
+    """Takes dealer best promo prices (of tied parks) by car models, list of suitable for
+    dealer cars, list of suitable for dealer sellers, list of suitable seller's cars to buy
+    and preloaded seller car parks, returns list of possible car prices (with or without
+    promo) for each evaluated seller car park (or empty list if there is no such cars
+    in parks)"""
+    car_prices = [car_price for car_id in suitable_cars
+                  for car_price in dealer_promo_prices.get(car_id, [])]
+    best_seller_cars_set = set(best_seller_cars)
     for seller in best_sellers:
-        seller_park = SellerCarParkModel.objects.filter(seller=seller,
-                                                        car_model__in=best_seller_cars)
-        for park in seller_park:
-            car_prices.append({'car_park': park,
-                               'price': Decimal(park.car_price)})
+        for park in seller_parks.get(seller, []):
+            if park.car_model_id in best_seller_cars_set:
+                car_prices.append({'car_park': park,
+                                   'price': Decimal(park.car_price)})
     return car_prices
 
 
@@ -64,67 +103,163 @@ def best_deal_finder(car_prices: list) -> list[dict[str,
     return chosen_deals
 
 
-def make_a_deal_and_create_dealer_park(chosen_deal: dict,
-                                       dealer: AutoDealerModel,
-                                       margin_size: int):
-    """Takes the chosen deal, dealer model and size of margin to adjust on bought cars and
-    makes a deal within passed in parameters, creates history records about the deal made"""
-    balance = dealer.balance
-    seller_park = chosen_deal['seller_park']
-    bought_cars_number = 0
-    while balance > chosen_deal['price']:
-        bought_cars_number = bought_cars_number + 1
-        balance = balance - chosen_deal['price']
-    if bought_cars_number:
-        with transaction.atomic():
-            dealer_park = DealerCarParkModel.objects. \
-                create(dealer=dealer,
-                       car_model=chosen_deal['car'],
-                       car_price=chosen_deal['price'] * Decimal((100 + margin_size) / 100),
-                       available_number=0)
-            dealer.balance = balance
-            dealer.save()
-            seller_park.available_number = seller_park.available_number - bought_cars_number
-            seller_park.save()
-            dealer_park.available_number = bought_cars_number
-            dealer_park.save()
-            SellerSalesHistoryModel.objects.create(seller=seller_park.seller,
-                                                   sold_car_model=seller_park,
-                                                   car_buyer=dealer,
-                                                   selling_price=chosen_deal['price'],
-                                                   sold_cars_quantity=bought_cars_number,
-                                                   deal_sum=bought_cars_number *
-                                                   chosen_deal['price'])
-            purchase_number_model = \
-                DealerFromSellerPurchaseNumber.objects.get_or_create(seller=seller_park.seller,
-                                                                     dealer=dealer)[0]
-            current_purchase_number = int(purchase_number_model.purchase_number)
-            purchase_number_model.purchase_number = \
-                current_purchase_number + bought_cars_number
-            purchase_number_model.save()
+def affordable_cars_number_calculator(balance: Decimal | None, price: Decimal) -> int:
+    """Takes dealer balance and car price and returns number of cars dealer can buy, while
+    his balance stays greater than car price (the same as buying cars one by one)"""
+    if not balance or price <= 0 or balance <= price:
+        return 0
+    cars_number, rest = divmod(Decimal(balance), Decimal(price))
+    return int(cars_number) if rest else int(cars_number) - 1
+
+
+def purchase_planner(chosen_deals: list[dict],
+                     balance: Decimal | None) -> list[tuple[dict, int]]:
+    """Takes list of tied (equally priced) chosen deals and dealer balance and returns list
+    of deals with number of cars to buy within each of them, dealer budget is split evenly
+    between deals seller parks, so that no park is asked for more cars than it has available"""
+    parks_deals: dict[int, dict] = {}
+    for deal in chosen_deals:
+        parks_deals.setdefault(deal['seller_park'].pk, deal)
+    unique_deals = list(parks_deals.values())
+    if not unique_deals:
+        return []
+    cars_to_buy = affordable_cars_number_calculator(balance, unique_deals[0]['price'])
+    planned_numbers = {}
+    deals_by_availability = sorted(unique_deals,
+                                   key=lambda deal: deal['seller_park'].available_number)
+    for index, deal in enumerate(deals_by_availability):
+        deal_share = cars_to_buy // (len(deals_by_availability) - index)
+        planned_numbers[deal['seller_park'].pk] = \
+            max(min(deal_share, deal['seller_park'].available_number), 0)
+        cars_to_buy = cars_to_buy - planned_numbers[deal['seller_park'].pk]
+    return [(deal, planned_numbers[deal['seller_park'].pk]) for deal in unique_deals
+            if planned_numbers[deal['seller_park'].pk]]
+
+
+def make_deals_and_create_dealers_parks(dealers_planned_deals:
+                                        list[tuple[AutoDealerModel, list[tuple[dict, int]]]],
+                                        margin_size: int) -> int:
+    """Takes dealers with their planned deals (with numbers of cars to buy) and size of
+    margin to adjust on bought cars, locks dealers and seller parks rows, cuts planned
+    numbers to their current balances and available numbers, makes deals of all dealers
+    with bulk updates of dealers balances, seller parks and purchase numbers and bulk
+    creation of dealer parks and history records about the deals made, returns number of
+    bought cars"""
+    dealers_planned_deals = [(dealer, planned_deals)
+                             for dealer, planned_deals in dealers_planned_deals if planned_deals]
+    if not dealers_planned_deals:
+        return 0
+    now = timezone.now()
+    with transaction.atomic():
+        balances = dict(AutoDealerModel.objects.select_for_update().
+                        filter(pk__in=[dealer.pk for dealer, _ in dealers_planned_deals]).
+                        order_by('pk').values_list('pk', 'balance'))
+        available_numbers = dict(SellerCarParkModel.objects.select_for_update().
+                                 filter(pk__in={deal['seller_park'].pk
+                                                for _, planned_deals in dealers_planned_deals
+                                                for deal, _ in planned_deals}).
+                                 order_by('pk').values_list('pk', 'available_number'))
+        buying_dealers, seller_parks, dealer_parks, sales_history = {}, {}, [], []
+        purchase_numbers: dict[tuple[int, int], int] = {}
+        for dealer, planned_deals in dealers_planned_deals:
+            balance = balances.get(dealer.pk)
+            for deal, planned_number in planned_deals:
+                seller_park = deal['seller_park']
+                bought_cars_number = min(planned_number,
+                                         available_numbers.get(seller_park.pk, 0),
+                                         affordable_cars_number_calculator(balance,
+                                                                           deal['price']))
+                if bought_cars_number <= 0:
+                    continue
+                deal_sum = bought_cars_number * deal['price']
+                balance = balance - deal_sum
+                available_numbers[seller_park.pk] -= bought_cars_number
+                seller_park.available_number = available_numbers[seller_park.pk]
+                seller_park.updated_at = now
+                seller_parks[seller_park.pk] = seller_park
+                dealer_parks.append(DealerCarParkModel(dealer=dealer,
+                                                       car_model=deal['car'],
+                                                       car_price=deal['price'] *
+                                                       Decimal((100 + margin_size) / 100),
+                                                       available_number=bought_cars_number))
+                sales_history.append(SellerSalesHistoryModel(seller_id=seller_park.seller_id,
+                                                             sold_car_model=seller_park,
+                                                             car_buyer=dealer,
+                                                             selling_price=deal['price'],
+                                                             sold_cars_quantity=bought_cars_number,
+                                                             deal_sum=deal_sum))
+                purchase_numbers[seller_park.seller_id, dealer.pk] = \
+                    purchase_numbers.get((seller_park.seller_id, dealer.pk), 0) + \
+                    bought_cars_number
+                dealer.balance = balance
+                dealer.updated_at = now
+                buying_dealers[dealer.pk] = dealer
+        if not dealer_parks:
+            return 0
+        bought_cars_number = sum(purchase_numbers.values())
+        SellerCarParkModel.objects.bulk_update(seller_parks.values(),
+                                               ['available_number', 'updated_at'])
+        AutoDealerModel.objects.bulk_update(buying_dealers.values(), ['balance', 'updated_at'])
+        DealerCarParkModel.objects.bulk_create(dealer_parks)
+        response_cache_invalidator(DealerCarParkModel)
+        task_on_commit_dispatcher(task_match_offers_with_parks,
+                                  [[dealer_park.pk for dealer_park in dealer_parks]])
+        daily_rollups_updater(SellerSalesHistoryModel.objects.bulk_create(sales_history))
+        existing_numbers = [purchase_number for purchase_number
+                            in DealerFromSellerPurchaseNumber.objects.select_for_update().
+                            filter(seller_id__in={seller_id for seller_id, _ in purchase_numbers},
+                                   dealer_id__in=buying_dealers)
+                            if (purchase_number.seller_id, purchase_number.dealer_id)
+                            in purchase_numbers]
+        for purchase_number in existing_numbers:
+            purchase_number.purchase_number = int(purchase_number.purchase_number) + \
+                purchase_numbers.pop((purchase_number.seller_id, purchase_number.dealer_id))
+            purchase_number.updated_at = now
+        DealerFromSellerPurchaseNumber.objects.bulk_update(existing_numbers,
+                                                           ['purchase_number', 'updated_at'])
+        DealerFromSellerPurchaseNumber.objects.bulk_create(
+            [DealerFromSellerPurchaseNumber(seller_id=seller_id, dealer_id=dealer_id,
+                                            purchase_number=bought_number)
+             for (seller_id, dealer_id), bought_number in purchase_numbers.items()])
+    return bought_cars_number
 
 
 @shared_task(name='purchase_cars_for_dealers')
 def task_dealer_cars_purchase():
     """Celery script that checks car market for all dealers having suitable cars/sellers model
     filled and makes best precalculated deals (of cars purchase) if there are some taking in
-    account current seller promos"""
-    for ready_dealer in DealerSuitableSellerModel.objects.all():
+    account current seller promos, market data is loaded once for all dealers and deals of
+    all dealers are made at once"""
+    ready_dealers = list(DealerSuitableSellerModel.objects.select_related('dealer').
+                         prefetch_related('suitable_seller', 'deal_car_models'))
+    suit_cars = {suit_cars_model.dealer_id: [car.pk for car in suit_cars_model.car_model.all()]
+                 for suit_cars_model in DealerSuitableCarModel.objects.
+                 filter(dealer_id__in=[ready_dealer.dealer_id
+                                       for ready_dealer in ready_dealers]).
+                 prefetch_related('car_model')}
+    promo_prices = promo_prices_index_creator()
+    seller_parks = seller_parks_index_creator(
+        {seller.pk for ready_dealer in ready_dealers
+         for seller in ready_dealer.suitable_seller.all()},
+        {car.pk for ready_dealer in ready_dealers
+         for car in ready_dealer.deal_car_models.all()})
+    dealers_planned_deals = []
+    for ready_dealer in ready_dealers:
         dealer = ready_dealer.dealer
-        best_seller_cars = DealerSuitableSellerSerializer(ready_dealer).data['deal_car_models']
-        best_sellers = DealerSuitableSellerSerializer(ready_dealer).data["suitable_seller"]
-        suit_cars_model = DealerSuitableCarModel.objects.get(dealer=dealer)
-        suit_cars_list = DealerSuitableCarModelsSerializer(suit_cars_model).data['car_model']
-        promos = SellerPromoModel.objects.filter(end_date__gte=timezone.now(),
-                                                 start_date__lte=timezone.now(),
-                                                 promo_cars__car_model__in=suit_cars_list,
-                                                 promo_aims__in=[dealer.id])
-        car_prices = selected_and_promo_car_prices_collector(promos,
-                                                             suit_cars_list,
-                                                             best_sellers,
-                                                             best_seller_cars)
+        car_prices = \
+            selected_and_promo_car_prices_collector(promo_prices.get(dealer.pk, {}),
+                                                    suit_cars.get(dealer.pk, []),
+                                                    [seller.pk for seller
+                                                     in ready_dealer.suitable_seller.all()],
+                                                    [car.pk for car
+                                                     in ready_dealer.deal_car_models.all()],
+                                                    seller_parks)
         if car_prices:
             chosen_deals = best_deal_finder(car_prices)
             if chosen_deals:
-                chosen_deal = chosen_deals[0]
-                make_a_deal_and_create_dealer_park(chosen_deal, dealer, 20)
+                planned_deals = purchase_planner(chosen_deals, dealer.balance)
+                for deal, planned_number in planned_deals:
+                    deal['seller_park'].available_number = \
+                        int(deal['seller_park'].available_number) - planned_number
+                dealers_planned_deals.append((dealer, planned_deals))
+    make_deals_and_create_dealers_parks(dealers_planned_deals, 20)
@@ -0,0 +1,105 @@
+# pylint: skip-file
+
+from datetime import date, timedelta
+from decimal import Decimal
+
+import pytest
+from django.core.cache import cache
+from django.core.management import call_command
+
+from .models import (BuyerDailyPurchasesRollupModel, DealerDailyPurchasesRollupModel,
+                     DealerDailySalesRollupModel, SellerDailySalesRollupModel,
+                     SellerSalesHistoryModel)
+from .rollups import (daily_rollups_rebuilder, daily_rollups_updater,
+                      profile_rollups_version_key_creator)
+
+pytestmark = pytest.mark.django_db
+
+ROLLUP_MODELS = (DealerDailySalesRollupModel, SellerDailySalesRollupModel,
+                 DealerDailyPurchasesRollupModel, BuyerDailyPurchasesRollupModel)
+
+
+def rollups_snapshot() -> list[tuple]:
+    return [sorted(model.objects.values_list(*[field.attname for field in model._meta.fields
+                                               if field.name != 'id']))
+            for model in ROLLUP_MODELS]
+
+
+def test_created_history_records_are_added_to_daily_rollups(seller_history_record):
+    record = seller_history_record['record_instance']
+    rollup = SellerDailySalesRollupModel.objects.get(seller=record.seller)
+    assert rollup.car_park_id == record.sold_car_model_id
+    assert rollup.date == date.today()
+    assert rollup.cars_quantity == record.sold_cars_quantity
+    assert rollup.min_price == rollup.max_price == Decimal(record.selling_price)
+    purchases_rollup = DealerDailyPurchasesRollupModel.objects.get(dealer=record.car_buyer)
+    assert purchases_rollup.deal_sum == rollup.deal_sum
+    daily_rollups_updater(SellerSalesHistoryModel.objects.bulk_create([
+        SellerSalesHistoryModel(seller=record.seller,
+                                sold_car_model=record.sold_car_model,
+                                car_buyer=record.car_buyer,
+                                selling_price=Decimal(10),
+                                sold_cars_quantity=2,
+                                deal_sum=Decimal(20))]))
+    rollup.refresh_from_db()
+    assert rollup.cars_quantity == record.sold_cars_quantity + 2
+    assert rollup.min_price == Decimal(10)
+    assert rollup.max_price == Decimal(record.selling_price)
+    assert SellerDailySalesRollupModel.objects.count() == 1
+
+
+def test_changed_history_records_are_recalculated_in_daily_rollups(history_records):
+    record = history_records['dealer']
+    record.date = date.today() - timedelta(days=3)
+    record.save()
+    rollup = DealerDailySalesRollupModel.objects.get(dealer=record.dealer)
+    assert rollup.date == record.date
+    assert rollup.cars_quantity == record.sold_cars_quantity
+    record.is_active = False
+    record.save()
+    assert not DealerDailySalesRollupModel.objects.exists()
+    history_records['buyer'].delete()
+    assert not BuyerDailyPurchasesRollupModel.objects.exists()
+
+
+def test_rebuilt_daily_rollups_are_equal_to_incremental_ones(history_records,
+                                                             seller_history_record,
+                                                             buyer_history_record):
+    history_records['seller'].date = date.today() - timedelta(days=1)
+    history_records['seller'].save()
+    incremental_rollups = rollups_snapshot()
+    assert all(incremental_rollups)
+    assert daily_rollups_rebuilder() == sum(len(rollups) for rollups in incremental_rollups)
+    assert rollups_snapshot() == incremental_rollups
+    call_command('sales_rollups')
+    assert rollups_snapshot() == incremental_rollups
+
+
+def test_rebuilt_daily_rollups_change_profiles_rollups_versions(
+        history_records, django_capture_on_commit_callbacks):
+    dealer_record, seller_record = history_records['dealer'], history_records['seller']
+    type(dealer_record).objects.filter(pk=dealer_record.pk).update(is_active=False)
+    keys = [profile_rollups_version_key_creator(DealerDailySalesRollupModel,
+                                                dealer_record.dealer_id),
+            profile_rollups_version_key_creator(SellerDailySalesRollupModel,
+                                                seller_record.seller_id)]
+    cache.set_many({key: 0 for key in keys}, None)
+    with django_capture_on_commit_callbacks(execute=True):
+        daily_rollups_rebuilder()
+    assert not DealerDailySalesRollupModel.objects.exists()
+    assert SellerDailySalesRollupModel.objects.exists()
+    assert 0 not in cache.get_many(keys).values()
+    assert len(cache.get_many(keys)) == 2
+
+
+def test_outdated_daily_rollups_are_backfilled_from_existing_history(history_records,
+                                                                     seller_history_record):
+    incremental_rollups = rollups_snapshot()
+    for model in ROLLUP_MODELS:
+        model.objects.all().delete()
+    call_command('sales_rollups', '--only-outdated')
+    assert rollups_snapshot() == incremental_rollups
+    SellerDailySalesRollupModel.objects.all().delete()
+    assert daily_rollups_rebuilder(only_outdated=True) == len(incremental_rollups[1])
+    assert rollups_snapshot() == incremental_rollups
+    assert daily_rollups_rebuilder(only_outdated=True) == 0
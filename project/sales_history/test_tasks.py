@@ -1,10 +1,22 @@
 # pylint: skip-file
 
+from decimal import Decimal
+from types import SimpleNamespace
+
+import uuid
+
 import pytest
 from car_park.models import DealerCarParkModel, SellerCarParkModel
+from car_spec.models import DealerSuitableCarModel, DealerSuitableSellerModel
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from promo.models import SellerPromoModel
+from user.models import AutoDealerModel, CustomUserModel, DealerFromSellerPurchaseNumber
 
 from .models import SellerSalesHistoryModel
-from .tasks import task_dealer_cars_purchase
+from .tasks import (affordable_cars_number_calculator, make_deals_and_create_dealers_parks,
+                    promo_prices_index_creator, purchase_planner,
+                    task_dealer_cars_purchase)
 
 pytestmark = pytest.mark.django_db(transaction=True)
 
@@ -33,3 +45,115 @@ def test_task_dealer_cars_purchase(deals_preparations,
     seller_history = SellerSalesHistoryModel.objects.get(seller_id=seller_id)
     assert seller_park == seller_history.sold_car_model
     assert dealer_park.car_model == seller_history.sold_car_model.car_model
+
+
+def buying_dealers_creator(dealers_number: int, like_dealer_id: int) -> list[int]:
+    suit_sellers = DealerSuitableSellerModel.objects.get(dealer_id=like_dealer_id)
+    suit_cars = DealerSuitableCarModel.objects.get(dealer_id=like_dealer_id)
+    dealer_ids = []
+    for _ in range(dealers_number):
+        filler = uuid.uuid4().hex
+        user = CustomUserModel.objects.create_user(username=f'test{filler}',
+                                                   password=f'pass{filler}',
+                                                   email=f'test{filler}@am.com',
+                                                   user_type='DEALER', is_verified=True)
+        dealer = AutoDealerModel.objects.create(name=f'tdealer{filler}', home_country='AL',
+                                                user=user, balance=10000)
+        dealer_suit_sellers = DealerSuitableSellerModel.objects.get_or_create(dealer=dealer)[0]
+        dealer_suit_sellers.suitable_seller.set(suit_sellers.suitable_seller.all())
+        dealer_suit_sellers.deal_car_models.set(suit_sellers.deal_car_models.all())
+        DealerSuitableCarModel.objects.get_or_create(dealer=dealer)[0].\
+            car_model.set(suit_cars.car_model.all())
+        dealer_ids.append(dealer.pk)
+    return dealer_ids
+
+
+def test_task_dealer_cars_purchase_query_count_does_not_grow_with_buying_dealers(
+        deals_preparations):
+    task_dealer_cars_purchase()
+    queries_numbers = []
+    for dealers_number in [2, 4]:
+        dealer_ids = buying_dealers_creator(dealers_number, deals_preparations['dealer_id'])
+        with CaptureQueriesContext(connection) as queries:
+            task_dealer_cars_purchase()
+        assert DealerCarParkModel.objects.filter(dealer_id__in=dealer_ids). \
+            values('dealer_id').distinct().count() == dealers_number
+        assert DealerFromSellerPurchaseNumber.objects. \
+            filter(dealer_id__in=dealer_ids).count() == dealers_number
+        queries_numbers.append(len(queries))
+    assert queries_numbers[0] == queries_numbers[1]
+
+
+def loop_affordable_cars_number(balance, price):
+    cars_number = 0
+    while balance > price:
+        cars_number = cars_number + 1
+        balance = balance - price
+    return cars_number
+
+
+@pytest.mark.parametrize('balance, price', [(Decimal('10'), Decimal('3')),
+                                            (Decimal('9'), Decimal('3')),
+                                            (Decimal('3'), Decimal('3')),
+                                            (Decimal('2.5'), Decimal('3')),
+                                            (Decimal('1000.01'), Decimal('0.01')),
+                                            (Decimal('1234.56'), Decimal('78.9'))])
+def test_affordable_cars_number_matches_one_by_one_purchase(balance, price):
+    assert affordable_cars_number_calculator(balance, price) == \
+        loop_affordable_cars_number(balance, price)
+
+
+def test_affordable_cars_number_of_huge_balance():
+    assert affordable_cars_number_calculator(Decimal('10000000000'), Decimal('0.01')) == \
+        10 ** 12 - 1
+
+
+def test_purchase_planner_splits_budget_and_respects_parks_availability():
+    deals = [{'seller_park': SimpleNamespace(pk=pk, available_number=available_number),
+              'price': Decimal('10')}
+             for pk, available_number in [(1, 100), (2, 3), (3, 100)]]
+    plan = purchase_planner(deals + [deals[0]], Decimal('300'))
+    assert [(deal['seller_park'].pk, number) for deal, number in plan] == \
+        [(1, 13), (2, 3), (3, 13)]
+    plan = purchase_planner(deals, Decimal('100000'))
+    assert [number for _, number in plan] == [100, 3, 100]
+    assert not purchase_planner(deals, Decimal('10'))
+
+
+def test_promo_prices_index_keeps_parks_tied_at_best_price(seller_promos):
+    promo = SellerPromoModel.objects.get()
+    park = promo.promo_cars.get()
+    tied_park, expensive_park = SellerCarParkModel.objects.get(pk=park.pk), \
+        SellerCarParkModel.objects.get(pk=park.pk)
+    tied_park.pk = None
+    tied_park.save()
+    expensive_park.pk = None
+    expensive_park.car_price = Decimal(park.car_price) + 1
+    expensive_park.save()
+    promo.promo_cars.add(tied_park, expensive_park)
+    dealer_id = promo.promo_aims.values_list('id', flat=True)[0]
+    best_prices = promo_prices_index_creator()[dealer_id][park.car_model_id]
+    assert [price['car_park'].pk for price in best_prices] == [park.pk, tied_park.pk]
+    assert best_prices[0]['price'] == best_prices[1]['price'] == \
+        Decimal(park.car_price) * 75 / 100
+
+
+def test_make_deals_cuts_stale_plan_to_current_park_and_balance(deals_preparations):
+    dealer = AutoDealerModel.objects.get(id=deals_preparations['dealer_id'])
+    seller_park = SellerCarParkModel.objects. \
+        get(seller_id=deals_preparations['unsuit_sellers'][0])
+    SellerCarParkModel.objects.filter(id=seller_park.pk).update(available_number=2)
+    AutoDealerModel.objects.filter(id=dealer.pk).update(balance=Decimal('1000000000'))
+    deal = {'seller_park': seller_park, 'car': seller_park.car_model,
+            'price': Decimal(seller_park.car_price)}
+    assert make_deals_and_create_dealers_parks([(dealer, [(deal, 5)])], 20) == 2
+    assert SellerCarParkModel.objects.get(id=seller_park.pk).available_number == 0
+    assert make_deals_and_create_dealers_parks([(dealer, [(deal, 5)])], 20) == 0
+    history = SellerSalesHistoryModel.objects.get(sold_car_model=seller_park)
+    assert history.sold_cars_quantity == 2
+    assert AutoDealerModel.objects.get(id=dealer.pk).balance == \
+        Decimal('1000000000') - 2 * Decimal(seller_park.car_price)
+    SellerCarParkModel.objects.filter(id=seller_park.pk).update(available_number=1)
+    assert make_deals_and_create_dealers_parks([(dealer, [(deal, 5)])], 20) == 1
+    assert DealerFromSellerPurchaseNumber.objects. \
+        get(seller_id=seller_park.seller_id, dealer=dealer).purchase_number == 3
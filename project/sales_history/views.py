@@ -2,6 +2,7 @@ from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters
 from root.common.permissions import (IsBuyer, IsDealer, IsOwnerOrAdmin,
                                      IsSeller, IsVerified)
+from root.common.search import TrigramSearchFilter
 from root.common.views import BaseOwnModelReadView
 from user.models import AutoDealerModel, AutoSellerModel, CarBuyerModel
 
@@ -23,7 +24,7 @@ class SellerSalesHistoryOwnView(BaseOwnModelReadView):
     user_type = 'seller'
     filterset_class = SellerSalesHistoryFilter
     filter_backends = (DjangoFilterBackend,
-                       filters.SearchFilter,
+                       TrigramSearchFilter,
                        filters.OrderingFilter,)
     search_fields = ['sold_car_model__car_model__car_model_name']
     ordering_fields = ['deal_sum', 'date',
@@ -38,7 +39,7 @@ class DealerSalesHistoryOwnView(BaseOwnModelReadView):
     user_type = 'dealer'
     filterset_class = DealerSalesHistoryFilter
     filter_backends = (DjangoFilterBackend,
-                       filters.SearchFilter,
+                       TrigramSearchFilter,
                        filters.OrderingFilter,)
     search_fields = ['sold_car_model__car_model__car_model_name']
     ordering_fields = ['deal_sum', 'date',
@@ -53,7 +54,7 @@ class BuyerPurchaseHistoryOwnView(BaseOwnModelReadView):
     user_type = 'buyer'
     filterset_class = BuyerPurchaseHistoryFilter
     filter_backends = (DjangoFilterBackend,
-                       filters.SearchFilter,
+                       TrigramSearchFilter,
                        filters.OrderingFilter,)
     search_fields = ['bought_car_model__car_model__car_model_name']
     ordering_fields = ['deal_sum', 'date',
@@ -5,8 +5,12 @@ from unittest.mock import MagicMock
 import pytest
 # pylint: disable=consider-using-from-import
 import user.views as views
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework.test import APIClient
-from root.celery import app as celery_app
+from root.common.task_dispatch import (WORKERS_HEARTBEAT_KEY,
+                                       workers_heartbeat_updater)
 from root.common.views import CustomRequest
 
 
@@ -25,13 +29,33 @@ def get_client() -> APIClient:
     return APIClient()
 
 
-@pytest.fixture(scope='session', autouse=True)
-def do_not_call_celery():
-    """Creates mock imitating no celery workers being run, for
-    some views not to send tasks to running celery worker during
-    test session"""
-    celery_inspect = celery_app.control.inspect()
-    celery_inspect.active = MagicMock(return_value=False)
+@pytest.fixture(scope='function', name='list_queries_counter')
+def get_list_queries_counter(client: APIClient):
+    """Returns function, which requests list endpoint by passed url (and query params)
+    with test client and returns number of database queries made during the request"""
+    def count_list_queries(url: str, data: dict | None = None) -> int:
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url, data=data)
+        assert response.status_code == 200
+        return len(queries)
+    return count_list_queries
+
+
+@pytest.fixture(scope='function', name='workers_heartbeat')
+def set_workers_heartbeat():
+    """Marks celery workers as running for task dispatchers, to let them send
+    tasks (executed locally with celery_app fixture) during the test"""
+    workers_heartbeat_updater()
+    yield
+    cache.delete(WORKERS_HEARTBEAT_KEY)
+
+
+@pytest.fixture(scope='function', autouse=True)
+def clear_cache():
+    """Clears shared cache after each test, not to serve responses cached
+    from database records of previous tests"""
+    yield
+    cache.clear()
 
 
 @pytest.fixture(scope='session', autouse=True)
@@ -4,8 +4,8 @@ from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin
 from django.contrib.auth.validators import UnicodeUsernameValidator
 from django.db import models
 from django.db.models import (BooleanField, CharField, DateTimeField,
-                              DecimalField, EmailField, ForeignKey,
-                              IntegerField, OneToOneField)
+                              DecimalField, EmailField, ForeignKey, Index,
+                              IntegerField, OneToOneField, Q)
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from django_countries.fields import CountryField
@@ -90,8 +90,18 @@ class DealerFromSellerPurchaseNumber(BaseModel):
     dealer: ForeignKey = ForeignKey('AutoDealerModel', on_delete=models.CASCADE)
     purchase_number: IntegerField = IntegerField(default=0)
 
+    class Meta:
+        indexes = [Index(fields=['seller', 'dealer'],
+                         condition=Q(is_active=True),
+                         name='dealer_seller_purchases_idx')]
+
 
 class BuyerFromDealerPurchaseNumber(BaseModel):
     buyer: ForeignKey = ForeignKey('CarBuyerModel', on_delete=models.CASCADE)
     dealer: ForeignKey = ForeignKey('AutoDealerModel', on_delete=models.CASCADE)
     purchase_number: IntegerField = IntegerField(default=0)
+
+    class Meta:
+        indexes = [Index(fields=['buyer', 'dealer'],
+                         condition=Q(is_active=True),
+                         name='buyer_dealer_purchases_idx')]